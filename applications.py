@@ -0,0 +1,158 @@
+"""
+Discord applications served by this deployment.
+
+One handler can answer several applications (e.g. a production and a
+staging bot) that each have their own public keys and their own subset of
+the commands. Each application is configured once in DISCORD_APPLICATIONS,
+a JSON object keyed by application name:
+
+    {
+      "terrabot": {"id": "1180000000000000000", "path": "/terrabot",
+                   "public_keys": ["<hex>"]},
+      "staging": {"id": "1190000000000000000", "path": "/staging",
+                  "public_keys": ["<hex>"], "commands": ["hello", "info"]}
+    }
+
+Discord is pointed at a different interactions URL per application, so the
+request path picks the application before the signature is checked. Paths
+that no application claims go to the default application: the only one
+configured or, with several or none, one that accepts the keys of
+DISCORD_PUBLIC_KEY(S) and exposes every command. The table and each
+application's command table (commands.registry_for) are built once per
+container.
+"""
+import os
+
+import codec
+
+# Matches public_keys.DEFAULT_APP: keys not scoped to an application
+DEFAULT_APP = None
+
+
+class Application:
+    """
+    One Discord application: its ID, the path its interactions arrive on,
+    its public keys and the names of the commands it exposes (None: all).
+    """
+
+    __slots__ = ('name', 'id', 'path', 'public_keys', 'commands')
+
+    def __init__(self, name, id=DEFAULT_APP, path=None, public_keys=(), commands=None):
+        self.name = name
+        self.id = id
+        self.path = normalize_path(path) if path else None
+        self.public_keys = tuple(public_keys)
+        self.commands = frozenset(commands) if commands is not None else None
+
+    def __repr__(self):
+        return f'Application({self.name!r}, id={self.id!r}, path={self.path!r})'
+
+
+DEFAULT_APPLICATION = Application('default')
+
+
+def normalize_path(path):
+    """
+    Lower-case ``path`` without trailing slashes or query string.
+    """
+    return '/' + path.split('?', 1)[0].strip('/').lower()
+
+
+def event_path(event):
+    """
+    Request path of a Lambda event from API Gateway (REST or HTTP API) or a
+    function URL, or None.
+    """
+    return event.get('rawPath') or event.get('path')
+
+
+class ApplicationTable:
+    """
+    Applications indexed by path and by ID.
+    """
+
+    def __init__(self, applications=()):
+        self._applications = {}
+        self._by_path = {}
+        self._by_id = {}
+        for application in applications:
+            self.add(application)
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """
+        Build the table from the JSON in DISCORD_APPLICATIONS.
+        """
+        environ = os.environ if environ is None else environ
+        config = environ.get('DISCORD_APPLICATIONS', '').strip()
+        if not config:
+            return cls()
+        return cls(
+            Application(name, **settings) for name, settings in codec.loads(config).items()
+        )
+
+    def add(self, application):
+        if application.name in self._applications:
+            raise ValueError(f"Application '{application.name}' is already configured")
+        if application.id is DEFAULT_APP:
+            raise ValueError(f"Application '{application.name}' needs an id")
+        if application.id in self._by_id:
+            raise ValueError(f"Application ID {application.id} is already configured")
+        if application.path is not None:
+            if application.path in self._by_path:
+                raise ValueError(f"Path '{application.path}' is already used")
+            self._by_path[application.path] = application
+        self._applications[application.name] = application
+        self._by_id[application.id] = application
+
+    def __iter__(self):
+        return iter(self._applications.values())
+
+    def __len__(self):
+        return len(self._applications)
+
+    @property
+    def default(self):
+        if len(self._applications) == 1:
+            return next(iter(self._applications.values()))
+        return DEFAULT_APPLICATION
+
+    def get(self, name):
+        return self._applications.get(name)
+
+    def by_id(self, application_id):
+        """
+        Return the application with ``application_id``, or the default one.
+        """
+        return self._by_id.get(application_id) or self.default
+
+    def resolve(self, path=None):
+        """
+        Return the application served on ``path``, or the default one.
+        """
+        if path and self._by_path:
+            application = self._by_path.get(normalize_path(path))
+            if application is not None:
+                return application
+        return self.default
+
+
+_applications = None
+
+
+def get_applications():
+    """
+    Return the application table of this container, loading it on first use.
+    """
+    global _applications
+    if _applications is None:
+        _applications = ApplicationTable.from_env()
+    return _applications
+
+
+def set_applications(applications):
+    """
+    Replace the application table, e.g. with one built in code.
+    """
+    global _applications
+    _applications = applications
@@ -0,0 +1,104 @@
+"""
+Prefix index for autocomplete choices.
+
+Discord sends an APPLICATION_COMMAND_AUTOCOMPLETE interaction on every
+keystroke and shows at most 25 choices, so lookups over lists of tens of
+thousands of entries have to be cheap. PrefixIndex sorts the case-folded
+names once per container; a prefix search is a bisect plus a scan over the
+matches it returns. With ``fuzzy=True`` queries that do not fill the list
+with prefix matches are completed with substring matches, found with
+``str.find`` over all names joined in one string and ranked so that matches
+at the start of a word come first.
+
+The choice objects sent to Discord are built when the index is, so a lookup
+only returns references to them.
+"""
+from bisect import bisect_left, bisect_right
+
+# Discord limits
+MAX_CHOICES = 25
+MAX_NAME_LENGTH = 100
+
+SEPARATOR = '\n'
+
+
+def _choice(entry):
+    if isinstance(entry, str):
+        name, value = entry, entry
+    else:
+        name, value = entry
+    return {'name': name[:MAX_NAME_LENGTH], 'value': value}
+
+
+class PrefixIndex:
+    """
+    Sorted, case-insensitive index over autocomplete choices. ``entries`` are
+    strings or ``(name, value)`` pairs.
+    """
+
+    __slots__ = ('fuzzy', '_keys', '_choices', '_haystack', '_offsets')
+
+    def __init__(self, entries, fuzzy=False):
+        choices = [_choice(entry) for entry in entries]
+        choices.sort(key=lambda choice: choice['name'].casefold())
+        self.fuzzy = fuzzy
+        self._keys = [choice['name'].casefold() for choice in choices]
+        self._choices = choices
+        self._haystack = None
+        self._offsets = None
+        if fuzzy:
+            self._build_haystack()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _build_haystack(self):
+        offsets = []
+        position = 0
+        for key in self._keys:
+            offsets.append(position)
+            position += len(key) + len(SEPARATOR)
+        self._haystack = SEPARATOR.join(self._keys)
+        self._offsets = offsets
+
+    def prefix(self, query, limit=MAX_CHOICES):
+        """
+        Return up to ``limit`` choices whose name starts with ``query``, in
+        alphabetical order.
+        """
+        query = query.casefold()
+        keys = self._keys
+        start = bisect_left(keys, query)
+        end = start + limit
+        if end > len(keys) or not keys[end - 1].startswith(query):
+            # Fewer matches than the limit: find where they stop
+            end = bisect_right(keys, query + '\U0010ffff', start, min(end, len(keys)))
+        return self._choices[start:end]
+
+    def search(self, query, limit=MAX_CHOICES):
+        """
+        Prefix matches first, then (with fuzzy ranking) substring matches,
+        word starts before other positions and shorter names first.
+        """
+        matches = self.prefix(query, limit)
+        if not self.fuzzy or len(matches) >= limit or not query or SEPARATOR in query:
+            return matches
+
+        query = query.casefold()
+        haystack, offsets, keys = self._haystack, self._offsets, self._keys
+        ranked = []
+        position = haystack.find(query)
+        # Look at a few more candidates than needed so ranking has a choice
+        while position != -1 and len(ranked) < limit * 4:
+            index = bisect_right(offsets, position) - 1
+            offset = position - offsets[index]
+            if offset:
+                # Matches at offset 0 are already among the prefix matches
+                word_start = keys[index][offset - 1] in ' -_/:.('
+                ranked.append((not word_start, offset, len(keys[index]), index))
+            # One candidate per name: continue after the end of this one
+            position = haystack.find(query, offsets[index] + len(keys[index]))
+        ranked.sort()
+
+        choices = self._choices
+        return matches + [choices[index] for *_, index in ranked[:limit - len(matches)]]
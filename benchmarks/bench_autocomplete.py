@@ -0,0 +1,96 @@
+"""
+Autocomplete lookup latency against index size.
+
+Builds a PrefixIndex over synthetic item names and times a prefix search
+for queries of one and three characters, a fuzzy search for text that only
+appears in the middle of words and a query that matches nothing (a full scan
+of the joined names), plus a full type 4 interaction through
+bot.handle_interaction at the largest size.
+
+Usage: python benchmarks/bench_autocomplete.py
+"""
+import json
+import logging
+import random
+import time
+
+import benchutil
+
+from autocomplete import PrefixIndex
+
+SIZES = (1_000, 10_000, 100_000)
+
+WORDS = (
+    'espada', 'escudo', 'arco', 'poción', 'hierro', 'diamante', 'oro', 'madera',
+    'piedra', 'lana', 'cobre', 'antigua', 'mágica', 'rota', 'encantada', 'roja',
+    'azul', 'verde', 'larga', 'corta', 'minecraft', 'servidor', 'mapa', 'mod',
+)
+
+
+def item_names(count, seed=1):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(' '.join(rng.choices(WORDS, k=rng.randint(2, 4))) + f' {rng.randint(1, 999)}')
+    return sorted(names)
+
+
+def autocomplete_event(value):
+    return {
+        'headers': {},
+        'body': json.dumps({
+            'type': 4,
+            'id': '1',
+            'application_id': '2',
+            'token': 't',
+            'data': {
+                'id': '3',
+                'name': 'objeto',
+                'type': 1,
+                'options': [{'name': 'nombre', 'type': 3, 'value': value, 'focused': True}],
+            },
+        }),
+    }
+
+
+def main():
+    rows = []
+    index = None
+    for size in SIZES:
+        names = item_names(size)
+        start = time.perf_counter()
+        index = PrefixIndex(names, fuzzy=True)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        rows.append((
+            f'{size:,}',
+            f'{build_ms:.1f}',
+            f'{benchutil.best_of(lambda: index.prefix("e"), 2000):.2f}',
+            f'{benchutil.best_of(lambda: index.prefix("esp"), 2000):.2f}',
+            f'{benchutil.best_of(lambda: index.search("cantad"), 200):.1f}',
+            f'{benchutil.best_of(lambda: index.search("zzz"), 20):.1f}',
+        ))
+    benchutil.print_table(
+        ('entries', 'build ms', "prefix 'e' us", "prefix 'esp' us", "fuzzy 'cantad' us",
+         "no match 'zzz' us"),
+        rows,
+    )
+
+    import bot
+    import commands
+    from request_log import RequestLog
+
+    @commands.autocomplete('objeto', 'nombre')
+    def nombre(interaction, value):
+        return index.search(value)
+
+    logger = logging.getLogger('terrabot.bench')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    event = autocomplete_event('cantad')
+    dispatch_us = benchutil.best_of(lambda: bot.handle_interaction(event, RequestLog(logger)), 200)
+    print(f"\nbot.handle_interaction, type 4 over {len(index):,} entries: {dispatch_us:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Parse and serialize typical Discord payloads with every installed codec.
+
+Covers a PING, a slash command with options and a component interaction
+carrying a large ``message`` object, plus the reply serialization.
+
+Usage: python benchmarks/bench_codec.py
+"""
+import benchutil
+
+import codec
+
+NUMBER = 5_000
+
+
+def ping():
+    return {'type': 1, 'id': '1', 'application_id': '2', 'version': 1}
+
+
+def slash_command():
+    return {
+        'type': 2,
+        'id': '1160000000000000000',
+        'application_id': '1150000000000000000',
+        'guild_id': '1140000000000000000',
+        'channel_id': '1130000000000000000',
+        'token': 'a' * 180,
+        'version': 1,
+        'locale': 'es-ES',
+        'member': {
+            'user': {'id': '1', 'username': 'terra', 'global_name': 'Terra'},
+            'roles': [str(1100000000000000000 + i) for i in range(10)],
+            'permissions': '2222085186637376',
+        },
+        'data': {
+            'id': '1170000000000000000',
+            'name': 'buscar',
+            'type': 1,
+            'options': [
+                {'name': 'texto', 'type': 3, 'value': 'servidores de minecraft'},
+                {'name': 'pagina', 'type': 4, 'value': 2},
+                {'name': 'publico', 'type': 5, 'value': True},
+            ],
+        },
+    }
+
+
+def component(embeds=10):
+    interaction = slash_command()
+    interaction['type'] = 3
+    interaction['data'] = {'custom_id': 'page:3:ab12cd', 'component_type': 2}
+    interaction['message'] = {
+        'id': '1180000000000000000',
+        'content': 'Resultados',
+        'embeds': [
+            {
+                'title': f'Resultado {i}',
+                'description': 'ñandú ' * 60,
+                'fields': [{'name': f'campo {j}', 'value': 'v' * 40} for j in range(8)],
+            }
+            for i in range(embeds)
+        ],
+        'components': [
+            {
+                'type': 1,
+                'components': [
+                    {'type': 2, 'style': 1, 'label': str(n), 'custom_id': f'page:{n}:ab12cd'}
+                    for n in range(5)
+                ],
+            }
+        ],
+    }
+    return interaction
+
+
+PAYLOADS = (
+    ('ping', ping()),
+    ('slash command', slash_command()),
+    ('component + message', component()),
+)
+
+
+def installed_codecs():
+    codecs = []
+    for name in ('json', 'ujson', 'orjson'):
+        try:
+            codecs.append(codec.select_codec(name))
+        except ImportError:
+            continue
+    return codecs
+
+
+def main():
+    rows = []
+    for name, payload in PAYLOADS:
+        text = codec.select_codec('json').dumps(payload)
+        for selected in installed_codecs():
+            loads_us = benchutil.best_of(lambda: selected.loads(text), NUMBER)
+            dumps_us = benchutil.best_of(lambda: selected.dumps(payload), NUMBER)
+            bytes_us = benchutil.best_of(lambda: selected.dumps_bytes(payload), NUMBER)
+            rows.append((
+                name,
+                len(text.encode('utf-8')),
+                selected.name,
+                f'{loads_us:.2f}',
+                f'{dumps_us:.2f}',
+                f'{bytes_us:.2f}',
+            ))
+
+    print(f'default codec: {codec.CODEC.name}')
+    benchutil.print_table(
+        ('payload', 'bytes', 'codec', 'loads us', 'dumps us', 'dumps_bytes us'),
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
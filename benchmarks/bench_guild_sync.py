@@ -0,0 +1,92 @@
+"""
+Wall time of syncing guild commands into many guilds.
+
+Runs command_sync.sync_guilds against fake_discord.FakeDiscord with a round
+trip latency, a bucket per guild for the bulk overwrite and the global
+limit emulated. A quarter of the guilds already have the current commands;
+the rest get one PUT each. Each concurrency level starts from the same
+state, and a last run resumes from a checkpoint that already lists half of
+the guilds.
+
+Usage: python benchmarks/bench_guild_sync.py [--guilds 200] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+import benchutil
+
+import command_sync
+import commands
+from fake_discord import FakeDiscord
+from rest_client import AsyncRestClient
+
+APPLICATION_ID = '1'
+LEVELS = (1, 8, 32)
+
+
+def stand_in(guild_ids, latency):
+    discord = FakeDiscord(latency=latency)
+    discord.global_limit(50, 1.0)
+    local = commands.schemas()
+    for i, guild_id in enumerate(guild_ids):
+        path = command_sync.commands_path(APPLICATION_ID, guild_id)
+        discord.respond('GET', path, payload=local if i % 4 == 0 else [])
+        discord.limit('PUT', path, 2, 1.0)
+    return discord.start()
+
+
+def run(guild_ids, latency, concurrency, checkpoint=None):
+    discord = stand_in(guild_ids, latency)
+
+    async def main():
+        async with AsyncRestClient('token', discord.api_base, pool_size=concurrency) as client:
+            return await command_sync.sync_guilds(
+                client, APPLICATION_ID, commands.schemas(), guild_ids, concurrency, checkpoint
+            )
+
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(main())
+        elapsed = time.perf_counter() - start
+    finally:
+        discord.stop()
+    outcomes = {}
+    for result in results:
+        outcomes[result.outcome] = outcomes.get(result.outcome, 0) + 1
+    return elapsed, len(discord.requests), discord.rate_limited, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--guilds', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+    logging.getLogger('rest_client').setLevel(logging.ERROR)
+
+    guild_ids = [str(1_000_000_000_000_000 + i) for i in range(args.guilds)]
+    rows = []
+    for concurrency in LEVELS:
+        elapsed, sent, limited, outcomes = run(guild_ids, args.latency, concurrency)
+        rows.append((concurrency, f'{elapsed:.2f}', sent, limited, outcomes))
+
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoint = command_sync.Checkpoint(
+            os.path.join(directory, 'checkpoint.json'),
+            command_sync.fingerprint(APPLICATION_ID, commands.schemas()),
+        )
+        for guild_id in guild_ids[:len(guild_ids) // 2]:
+            checkpoint.completed[guild_id] = command_sync.UPDATED
+        checkpoint.save()
+        elapsed, sent, limited, outcomes = run(guild_ids, args.latency, LEVELS[-1], checkpoint)
+        rows.append((f'{LEVELS[-1]} resumed', f'{elapsed:.2f}', sent, limited, outcomes))
+
+    print(f'{args.guilds} guilds, {args.latency * 1000:.0f} ms round trip')
+    benchutil.print_table(('concurrency', 'seconds', 'requests', '429s', 'outcomes'), rows)
+
+
+if __name__ == '__main__':
+    main()
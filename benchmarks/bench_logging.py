@@ -0,0 +1,96 @@
+"""
+Bytes written and CPU time spent on logging per interaction.
+
+"before" replays the f-string logging calls the handlers used to make at
+INFO level (whole event, headers and parsed body on every request). "after"
+is bot.lambda_handler with its single structured RequestLog line. Both run at
+INFO and at DEBUG against a handler that only counts bytes.
+
+Usage: python benchmarks/bench_logging.py
+"""
+import json
+import logging
+
+import benchutil
+
+import bot
+from request_log import RequestLog
+
+NUMBER = 2_000
+
+
+class CountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.bytes = 0
+
+    def emit(self, record):
+        self.bytes += len(self.format(record)) + 1
+
+
+def make_event(size):
+    body = json.dumps({
+        'type': 2,
+        'token': 'x' * 180,
+        'member': {'user': {'id': '1', 'username': 'terra'}, 'roles': ['1'] * 20},
+        'data': {'name': 'hello', 'options': [{'name': 'text', 'value': 'y' * size}]},
+    })
+    headers = {
+        'content-type': 'application/json',
+        'x-signature-ed25519': 'ab' * 64,
+        'x-signature-timestamp': '1700000000',
+    }
+    return {'headers': headers, 'body': body}
+
+
+def before(event):
+    # The logging the handlers did before RequestLog, minus the dispatch
+    logging.info(f"Received event: {event}")
+    logging.info(f"Headers: {event.get('headers', {})}")
+    headers = event.get('headers', {})
+    logging.info(f"Signature: {headers.get('x-signature-ed25519', '')}")
+    logging.info(f"Timestamp: {headers.get('x-signature-timestamp', '')}")
+    logging.info("Skipping signature verification for testing purposes")
+    body_json = json.loads(event['body'])
+    logging.info(f"Received command interaction: {body_json}")
+    logging.info(f"Command name: {body_json['data']['name']}")
+
+
+def after(event):
+    log = RequestLog(bot.logger)
+    bot.handle_interaction(event, log)
+    log.emit(200)
+
+
+def main():
+    root = logging.getLogger()
+    counter = CountingHandler()
+    counter.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+    root.handlers[:] = [counter]
+
+    rows = []
+    for size in (100, 10_000):
+        event = make_event(size)
+        for level in (logging.INFO, logging.DEBUG):
+            root.setLevel(level)
+            for name, func in (('before', before), ('after', after)):
+                counter.bytes = 0
+                func(event)
+                written = counter.bytes
+                micros = benchutil.best_of(lambda: func(event), NUMBER, repeat=3)
+                rows.append((
+                    len(event['body']),
+                    logging.getLevelName(level),
+                    name,
+                    written,
+                    f'{micros:.1f}',
+                ))
+
+    root.setLevel(logging.INFO)
+    benchutil.print_table(
+        ('body bytes', 'level', 'logging', 'log bytes/request', 'us/request'), rows
+    )
+
+
+if __name__ == '__main__':
+    main()
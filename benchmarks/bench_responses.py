@@ -0,0 +1,74 @@
+"""
+Time spent building response envelopes in bot.lambda_handler.
+
+"before" rebuilds the nested payload and calls json.dumps on every request,
+as the handler used to. "after" returns the envelope serialized at import
+time, or fills a ResponseTemplate for parameterized replies.
+
+Usage: python benchmarks/bench_responses.py
+"""
+import json
+
+import benchutil
+
+import bot
+import commands
+
+NUMBER = 200_000
+
+
+def inline(content):
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({
+            'type': 4,
+            'data': {
+                'content': content
+            }
+        })
+    }
+
+
+CASES = (
+    (
+        '/hello',
+        lambda: inline('¡Hola! Soy TerraBot, tu asistente serverless.'),
+        lambda: commands.lookup('hello').handler(None),
+    ),
+    (
+        '/info',
+        lambda: inline('TerraBot v2.0 - Desplegado en AWS Lambda con Terraform'),
+        lambda: commands.lookup('info').handler(None),
+    ),
+    (
+        'unknown command',
+        lambda: inline(f'Comando `{"weather"}` no reconocido.'),
+        lambda: bot.UNKNOWN_COMMAND_RESPONSE.render(command_name='weather'),
+    ),
+    (
+        'component',
+        lambda: inline(f'Interacción con componente `{"page:2"}` recibida.'),
+        lambda: bot.COMPONENT_RESPONSE.render(custom_id='page:2'),
+    ),
+)
+
+
+def main():
+    rows = []
+    for name, before, after in CASES:
+        assert json.loads(before()['body']) == json.loads(after()['body']), name
+        before_us = benchutil.best_of(before, NUMBER)
+        after_us = benchutil.best_of(after, NUMBER)
+        rows.append((
+            name,
+            f'{before_us:.3f}',
+            f'{after_us:.3f}',
+            f'{before_us / after_us:.1f}x',
+        ))
+
+    benchutil.print_table(('response', 'before us', 'after us', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
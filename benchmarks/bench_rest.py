@@ -0,0 +1,112 @@
+"""
+Discord REST calls through rest_client against rate limited Discord.
+
+Sends the same batch of messages to one channel through
+fake_discord.FakeDiscord, with the channel's bucket and the global limit
+emulated, three ways:
+
+- urllib, one connection per request and no rate limit handling (how
+  followup.py and register_commands.py used to call Discord); 429s are
+  simply failed requests;
+- RestClient, one request after another over pooled connections;
+- AsyncRestClient with the batch gathered at once.
+
+For each it prints the wall time, the requests that reached the stand-in,
+the 429s collected and how many ended in an error, plus the connections
+opened.
+
+Usage: python benchmarks/bench_rest.py [--requests 60]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+
+import benchutil
+
+from fake_discord import FakeDiscord
+from rest_client import AsyncRestClient, RestClient
+
+BUCKET = (10, 0.5)
+GLOBAL = (50, 1.0)
+
+
+def stand_in():
+    discord = FakeDiscord()
+    discord.limit('POST', '/channels/1/messages', *BUCKET)
+    discord.global_limit(*GLOBAL)
+    return discord.start()
+
+
+PATH = '/channels/1/messages'
+
+
+def run_urllib(discord, count):
+    failed = 0
+    for i in range(count):
+        request = urllib.request.Request(
+            discord.api_base + PATH, data=json.dumps({'content': str(i)}).encode(),
+            method='POST', headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+        except urllib.error.HTTPError:
+            failed += 1
+    return failed, count
+
+
+def run_sync(discord, count):
+    client = RestClient(api_base=discord.api_base)
+    failed = sum(
+        not client.request('POST', PATH, json={'content': str(i)}).ok for i in range(count)
+    )
+    client.close()
+    return failed, client.stats()['connections_created']
+
+
+def run_async(discord, count):
+    async def main():
+        async with AsyncRestClient(api_base=discord.api_base) as client:
+            responses = await asyncio.gather(*(
+                client.request('POST', PATH, json={'content': str(i)}) for i in range(count)
+            ))
+            return sum(not response.ok for response in responses), client.stats()
+    failed, stats = asyncio.run(main())
+    return failed, stats['connections_created']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=60)
+    args = parser.parse_args()
+    # Retries are expected here; keep their log lines out of the table
+    logging.getLogger('rest_client').setLevel(logging.ERROR)
+
+    rows = []
+    for name, run in (('urllib', run_urllib), ('RestClient', run_sync),
+                      ('AsyncRestClient', run_async)):
+        discord = stand_in()
+        try:
+            start = time.perf_counter()
+            failed, connections = run(discord, args.requests)
+            elapsed = time.perf_counter() - start
+        finally:
+            discord.stop()
+        rows.append((
+            name, f'{elapsed:.2f}', len(discord.requests), discord.rate_limited, failed,
+            connections,
+        ))
+
+    print(f'{args.requests} POST requests, bucket {BUCKET[0]}/{BUCKET[1]} s, '
+          f'global {GLOBAL[0]}/{GLOBAL[1]} s')
+    benchutil.print_table(
+        ('client', 'seconds', 'sent', '429s', 'failed', 'connections'), rows
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare the cold-start cost of the lean verifier (ed25519_verify) with
+``import nacl.signing``.
+
+Each import runs in a fresh interpreter with the same path as in
+cold_start.py; the table shows the median import time, the number of modules
+loaded and the time of the first verification after the import, which
+includes sodium initialization for the lean path.
+
+Usage: python benchmarks/bench_startup.py [--runs 15]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+import benchutil
+from cold_start import _env, import_breakdown
+
+# Import the verifier, then check one signature made with a throwaway key.
+# The signature is computed in the parent so signing is never timed.
+SCRIPT = '''
+import time
+start = time.perf_counter()
+{import_line}
+imported = time.perf_counter()
+{verify_line}
+print(imported - start, time.perf_counter() - imported)
+'''
+
+# (module, import line, verify line) per path
+PATHS = (
+    (
+        'ed25519_verify',
+        'from ed25519_verify import VerifyKey',
+        'VerifyKey({key!r}).verify_detached({signature!r}, {message!r})',
+    ),
+    (
+        'nacl.signing',
+        'from nacl.signing import VerifyKey',
+        'VerifyKey({key!r}).verify({message!r}, {signature!r})',
+    ),
+)
+
+
+def signed_message():
+    from nacl.signing import SigningKey
+    signing_key = SigningKey(b'\x01' * 32)
+    message = b'1700000000{"type":1}'
+    signature = signing_key.sign(message).signature
+    return signing_key.verify_key.encode(), signature, message
+
+
+def measure(import_line, verify_line, runs):
+    import_ms, verify_ms = [], []
+    for _ in range(runs + 1):
+        result = subprocess.run(
+            [sys.executable, '-c', SCRIPT.format(import_line=import_line, verify_line=verify_line)],
+            env=_env(), cwd=benchutil.ROOT, capture_output=True, text=True, check=True,
+        )
+        imported, verified = result.stdout.split()
+        import_ms.append(float(imported) * 1000)
+        verify_ms.append(float(verified) * 1000)
+    # The first run only populates __pycache__
+    return statistics.median(import_ms[1:]), statistics.median(verify_ms[1:])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verifier cold-start comparison')
+    parser.add_argument('--runs', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    public_key, signature, message = signed_message()
+
+    rows = []
+    for module, import_line, verify_template in PATHS:
+        verify_line = verify_template.format(key=public_key, signature=signature, message=message)
+        import_ms, verify_ms = measure(import_line, verify_line, args.runs)
+        modules = len(import_breakdown(module))
+        rows.append((module, f'{import_ms:.2f}', modules, f'{verify_ms:.3f}'))
+    benchutil.print_table(('path', 'import ms', 'modules', 'first verify ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare combined and detached Ed25519 verification of Discord requests.
+
+The combined path is PyNaCl's VerifyKey.verify, what verify_bot used to
+do: concatenate timestamp and body, prepend the signature and let
+crypto_sign_open copy the message out. The detached path is
+ed25519_verify.VerifyKey, which hands the parts to
+crypto_sign_verify_detached.
+
+Usage: python benchmarks/bench_verify.py
+"""
+import benchutil
+
+from ed25519_verify import VerifyKey
+from nacl.signing import SigningKey
+
+BODY_SIZES = (1024, 10 * 1024, 100 * 1024)
+
+
+def main():
+    signing_key = SigningKey.generate()
+    verify_key = signing_key.verify_key
+    detached_key = VerifyKey(verify_key.encode())
+    timestamp = '1700000000'
+
+    rows = []
+    for size in BODY_SIZES:
+        body = '{"type":2,"data":"' + 'x' * (size - 20) + '"}'
+        signature = signing_key.sign((timestamp + body).encode()).signature
+        number = max(200, 2_000_000 // size)
+
+        def combined():
+            message = timestamp.encode() + body.encode()
+            verify_key.verify(message, signature)
+
+        def detached():
+            detached_key.verify_detached(signature, timestamp.encode(), body.encode())
+
+        combined_us = benchutil.best_of(combined, number)
+        detached_us = benchutil.best_of(detached, number)
+        rows.append((
+            f'{size // 1024} KB',
+            f'{combined_us:.1f}',
+            f'{detached_us:.1f}',
+            f'{combined_us - detached_us:.1f}',
+            benchutil.peak_allocated(combined),
+            benchutil.peak_allocated(detached),
+        ))
+
+    benchutil.print_table(
+        (
+            'body',
+            'combined us',
+            'detached us',
+            'saved us',
+            'combined bytes',
+            'detached bytes',
+        ),
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Helpers shared by the benchmark scripts.
+
+The scripts are run directly (``python benchmarks/bench_verify.py``) from a
+checkout. The repository root goes first on ``sys.path`` so the benchmarks
+exercise the modules shipped to Lambda; PyNaCl comes from the installed
+packages (requirements.txt). ``package/`` is only appended, for
+verify_bot: its vendored nacl has no compiled _sodium in a checkout and its
+old bot.py must not shadow the root one.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HANDLER_DIR = os.path.join(ROOT, 'package')
+
+if ROOT in sys.path:
+    sys.path.remove(ROOT)
+sys.path.insert(0, ROOT)
+if HANDLER_DIR not in sys.path:
+    sys.path.append(HANDLER_DIR)
+
+
+def best_of(func, number, repeat=7):
+    """
+    Run ``func`` ``number`` times per round and return the fastest round's
+    time per call in microseconds.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / number * 1e6
+
+
+def peak_allocated(func):
+    """
+    Return the peak number of bytes allocated by Python during one call.
+    """
+    func()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def print_table(header, rows):
+    """
+    Print rows as a fixed width table.
+    """
+    widths = [
+        max(len(str(row[i])) for row in [header] + rows)
+        for i in range(len(header))
+    ]
+    for row in [header] + rows:
+        print('  '.join(str(cell).rjust(width) for cell, width in zip(row, widths)))
@@ -0,0 +1,156 @@
+"""
+Measure the cold-start import cost of the packaged handler and enforce an
+init-time budget.
+
+Each measurement imports the handler module in a fresh interpreter with the
+bot modules first on the path, the way Lambda loads them from the zip, and
+``package/`` appended for verify_bot. Dependencies come from the installed
+packages, or from ``--package-dir`` when given, e.g. the dependency layer
+build_package.py installs under .build_cache/deps/. The median import time
+over several runs is compared with the budget; one extra run under
+``-X importtime`` gives the per-module breakdown.
+
+    python benchmarks/cold_start.py --module bot --budget-ms 150
+    python benchmarks/cold_start.py --module verify_bot --top 15 --cold-bytecode
+
+Exits with status 1 when the median exceeds the budget, so it can gate CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import benchutil
+
+# sys is loaded at startup, so this adds nothing to the measured imports
+PATH_SETUP = f'import sys; sys.path.append({benchutil.HANDLER_DIR!r}); '
+
+TIMER = PATH_SETUP + (
+    'import time; start = time.perf_counter(); import {module}; '
+    'print(time.perf_counter() - start)'
+)
+
+
+def _env(package_dir=None, pycache_prefix=None):
+    env = dict(os.environ)
+    # package/ is never put here: it would come before site-packages, and its
+    # vendored nacl has no compiled _sodium in a checkout
+    env['PYTHONPATH'] = os.pathsep.join(
+        [benchutil.ROOT] + [p for p in [package_dir, env.get('PYTHONPATH')] if p]
+    )
+    env['DISCORD_PUBLIC_KEY'] = env.get('DISCORD_PUBLIC_KEY', '00' * 32)
+    if pycache_prefix:
+        env['PYTHONPYCACHEPREFIX'] = pycache_prefix
+    return env
+
+
+def time_import(module, package_dir=None, cold_bytecode=False):
+    """
+    Import ``module`` in a fresh interpreter and return the seconds it took.
+    With ``cold_bytecode`` nothing is read from or left in __pycache__, as in
+    a zip shipped without compiled files.
+    """
+    with tempfile.TemporaryDirectory() as prefix:
+        result = subprocess.run(
+            [sys.executable, '-c', TIMER.format(module=module)],
+            env=_env(package_dir, prefix if cold_bytecode else None),
+            cwd=benchutil.ROOT, capture_output=True, text=True, check=True,
+        )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def import_breakdown(module, package_dir=None):
+    """
+    Return ``(name, self_us, cumulative_us)`` for every module imported
+    while loading ``module``, as reported by ``-X importtime``.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'{PATH_SETUP}import {module}'],
+        env=_env(package_dir), cwd=benchutil.ROOT, capture_output=True, text=True,
+        check=True,
+    )
+    # Children are printed before their parent, indented by depth. Keep the
+    # block that ends with ``module`` itself and drop interpreter startup.
+    block = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        block.append((name.strip(), int(self_us), int(cumulative_us)))
+        if not name.startswith('  '):
+            if name.strip() == module:
+                return block
+            block = []
+    return block
+
+
+def by_package(rows):
+    """
+    Sum the self time of the modules of each top-level package.
+    """
+    totals = {}
+    for name, self_us, _ in rows:
+        top = name.split('.')[0]
+        totals[top] = totals.get(top, 0) + self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cold-start import profiler')
+    parser.add_argument('--module', default='bot', help='handler module to import')
+    parser.add_argument(
+        '--package-dir', help='dependency tree to load instead of the installed packages',
+    )
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument(
+        '--budget-ms', type=float,
+        default=float(os.environ['IMPORT_BUDGET_MS']) if 'IMPORT_BUDGET_MS' in os.environ else None,
+        help='fail when the median import time exceeds this (or $IMPORT_BUDGET_MS)',
+    )
+    parser.add_argument(
+        '--cold-bytecode', action='store_true',
+        help='compile every module from source, as with a zip without __pycache__',
+    )
+    args = parser.parse_args(argv)
+
+    # Populate __pycache__ once so that warm-bytecode runs are comparable
+    if not args.cold_bytecode:
+        time_import(args.module, args.package_dir)
+    samples = [
+        time_import(args.module, args.package_dir, args.cold_bytecode) * 1000
+        for _ in range(args.runs)
+    ]
+    median = statistics.median(samples)
+
+    rows = import_breakdown(args.module, args.package_dir)
+    print(
+        f"import {args.module}: median {median:.1f} ms over {args.runs} runs "
+        f"(min {min(samples):.1f}, max {max(samples):.1f}), {len(rows)} modules"
+    )
+    print()
+    benchutil.print_table(
+        ('module', 'cumulative ms', 'self ms'),
+        [
+            (name, f'{cumulative / 1000:.2f}', f'{self_us / 1000:.2f}')
+            for name, self_us, cumulative in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]
+        ],
+    )
+    print()
+    benchutil.print_table(
+        ('package', 'self ms'),
+        [(name, f'{total / 1000:.2f}') for name, total in by_package(rows)[:args.top]],
+    )
+
+    if args.budget_ms is not None:
+        if median > args.budget_ms:
+            print(f"\nFAIL: {median:.1f} ms exceeds the {args.budget_ms:.1f} ms budget")
+            return 1
+        print(f"\nOK: {median:.1f} ms within the {args.budget_ms:.1f} ms budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Replay a corpus of signed Discord interactions through the handlers in
+process and report throughput and per-stage latency percentiles.
+
+The corpus mixes PINGs, slash commands (known and unknown) and component
+interactions carrying message objects of varying size, with header casing
+as sent through API Gateway (Title-Case) or lower-cased by HTTP APIs. Events
+are signed with a benchmark-only key when they are loaded, so a saved corpus
+always carries fresh timestamps.
+
+    python benchmarks/replay.py --events 5000 --output before.json
+    python benchmarks/replay.py --corpus corpus.json --compare before.json
+
+Targets:
+    lambda      bot.lambda_handler (no signature check)
+    verify_bot  package/verify_bot.lambda_handler
+    server      server.handle_request, the container entry point
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+
+import benchutil
+from bench_codec import component, slash_command
+
+from nacl.signing import SigningKey
+
+TARGETS = ('lambda', 'verify_bot', 'server')
+
+# Share of each interaction kind in a generated corpus
+MIX = (
+    ('ping', 0.05),
+    ('command', 0.45),
+    ('unknown_command', 0.10),
+    ('component', 0.40),
+)
+
+USER_AGENT = 'Discord-Interactions/1.0 (+https://discord.com)'
+
+
+def generate_corpus(count, seed):
+    """
+    Return ``count`` unsigned events plus the hex seed of the signing key.
+    """
+    rng = random.Random(seed)
+    signing_seed = rng.randbytes(32).hex()
+    kinds = [kind for kind, _ in MIX]
+    weights = [weight for _, weight in MIX]
+
+    events = []
+    for index in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == 'ping':
+            body = {'type': 1, 'id': '1', 'application_id': '2', 'version': 1}
+        elif kind == 'component':
+            body = component(embeds=rng.randint(0, 25))
+        else:
+            body = slash_command()
+            body['data']['name'] = rng.choice(('hello', 'info')) if kind == 'command' else 'buscar'
+        # Unique IDs give unique signatures, which the replay cache requires
+        body['id'] = str(1200000000000000000 + index)
+        events.append({
+            'kind': kind,
+            'lowercase_headers': rng.random() < 0.5,
+            'body': json.dumps(body, ensure_ascii=False),
+        })
+    return {'signing_seed': signing_seed, 'events': events}
+
+
+def sign_corpus(corpus):
+    """
+    Turn a corpus into signed Lambda proxy events.
+    """
+    signing_key = SigningKey(bytes.fromhex(corpus['signing_seed']))
+    timestamp = str(int(time.time()))
+
+    events = []
+    for entry in corpus['events']:
+        body = entry['body']
+        signature = signing_key.sign((timestamp + body).encode()).signature.hex()
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': USER_AGENT,
+            'X-Signature-Ed25519': signature,
+            'X-Signature-Timestamp': timestamp,
+        }
+        if entry['lowercase_headers']:
+            headers = {name.lower(): value for name, value in headers.items()}
+        events.append({'headers': headers, 'body': body})
+    return signing_key.verify_key.encode().hex(), events
+
+
+def load_target(name, public_key):
+    """
+    Return ``call(event, log)`` for a target, with its key registry pointing
+    at the benchmark key.
+    """
+    os.environ['DISCORD_PUBLIC_KEY'] = public_key
+    os.environ.pop('DISCORD_PUBLIC_KEYS', None)
+    import public_keys
+    public_keys.reset_registry()
+
+    if name == 'lambda':
+        import bot
+        return bot.handle_event
+    if name == 'verify_bot':
+        import verify_bot
+        return verify_bot.handle_event
+
+    import server
+
+    def call(event, log):
+        headers = {key.lower(): value for key, value in event['headers'].items()}
+        return server.handle_request('POST', '/', headers, event['body'].encode(), log)
+
+    return call
+
+
+def replay(call, events, warmup):
+    """
+    Run every event through ``call`` and return per-stage samples in
+    seconds plus the wall time of the timed run.
+    """
+    from request_log import RequestLog
+
+    # Log lines are rendered as in production but discarded
+    logger = logging.getLogger('terrabot.replay')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    for event in events[:warmup]:
+        call(event, RequestLog(logger))
+    # Forget the warm-up signatures so the timed run is not seen as a replay
+    import replay_cache
+    replay_cache.set_cache(replay_cache.ReplayCache())
+
+    samples = {'total': []}
+    started = time.perf_counter()
+    for event in events:
+        log = RequestLog(logger)
+        begin = time.perf_counter()
+        response = call(event, log)
+        samples['total'].append(time.perf_counter() - begin)
+        if response['statusCode'] != 200:
+            raise SystemExit(f"Unexpected status {response['statusCode']}: {response.get('body')}")
+        for stage, seconds in log.stages.items():
+            samples.setdefault(stage, []).append(seconds)
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples):
+    summary = {}
+    for stage, values in samples.items():
+        cuts = statistics.quantiles(values, n=100, method='inclusive')
+        summary[stage] = {
+            'count': len(values),
+            'mean_us': statistics.fmean(values) * 1e6,
+            'p50_us': cuts[49] * 1e6,
+            'p95_us': cuts[94] * 1e6,
+            'p99_us': cuts[98] * 1e6,
+        }
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=benchutil.ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(
+        f"{results['target']}: {results['events']} events, "
+        f"{results['throughput_rps']:.0f} req/s, codec {results['codec']}"
+    )
+    header = ['stage', 'mean us', 'p50 us', 'p95 us', 'p99 us']
+    if baseline:
+        header += ['p50 vs base', 'p99 vs base']
+    rows = []
+    for stage, stats in results['stages'].items():
+        row = [stage] + [f"{stats[key]:.1f}" for key in ('mean_us', 'p50_us', 'p95_us', 'p99_us')]
+        if baseline:
+            base = baseline['stages'].get(stage)
+            for key in ('p50_us', 'p99_us'):
+                row.append(f"{(stats[key] / base[key] - 1) * 100:+.1f}%" if base else '-')
+        rows.append(row)
+    benchutil.print_table(header, rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--target', choices=TARGETS, default='server')
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--corpus', help='load the corpus from this file')
+    parser.add_argument('--save-corpus', help='write the generated corpus to this file')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='results JSON of a previous run to compare against')
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        with open(args.corpus, encoding='utf-8') as f:
+            corpus = json.load(f)
+    else:
+        corpus = generate_corpus(args.events, args.seed)
+        if args.save_corpus:
+            with open(args.save_corpus, 'w', encoding='utf-8') as f:
+                json.dump(corpus, f, ensure_ascii=False)
+
+    public_key, events = sign_corpus(corpus)
+    call = load_target(args.target, public_key)
+    samples, wall = replay(call, events, args.warmup)
+
+    import codec
+    results = {
+        'target': args.target,
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'codec': codec.CODEC.name,
+        'events': len(events),
+        'mix': {kind: sum(e['kind'] == kind for e in corpus['events']) for kind, _ in MIX},
+        'throughput_rps': len(events) / wall,
+        'stages': summarize(samples),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
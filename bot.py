@@ -1,118 +1,193 @@
 import os
-import json
 import logging
+import math
+
+import codec
+import commands
+import components
+import followup
+import modals
+import rate_limit
+import warmup
+from applications import event_path, get_applications
+from autocomplete import MAX_CHOICES
+from interaction import (
+    APPLICATION_COMMAND, APPLICATION_COMMAND_AUTOCOMPLETE, MESSAGE_COMPONENT, MODAL_SUBMIT,
+    PING, Interaction, normalize_headers,
+)
+from request_log import RequestLog
+from responses import (
+    ResponseTemplate, autocomplete_result, channel_message, ephemeral_message, json_response,
+)
 
 # Set up logging
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Responses serialized once per container
+PONG_RESPONSE = json_response({'type': 1})
+DEFERRED_RESPONSE = json_response({'type': 5})  # DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+UNKNOWN_COMMAND_RESPONSE = ResponseTemplate(
+    channel_message('Comando `{command_name}` no reconocido.')
+)
+COMPONENT_RESPONSE = ResponseTemplate(
+    channel_message('Interacción con componente `{custom_id}` recibida.')
+)
+NO_CHOICES_RESPONSE = json_response(autocomplete_result([]))
+RATE_LIMITED_RESPONSE = ResponseTemplate(
+    ephemeral_message('Vas demasiado rápido. Inténtalo de nuevo en {seconds} s.')
+)
+UNKNOWN_MODAL_RESPONSE = json_response(
+    ephemeral_message('Este formulario ya no está disponible.')
+)
+UNSUPPORTED_RESPONSE = json_response(
+    channel_message('Tipo de interacción no soportado.')
+)
+ERROR_RESPONSE = json_response({'error': 'Internal server error'}, 500)
+
 
 def lambda_handler(event, context):
     """
     AWS Lambda handler function for Discord interactions.
     For simplicity, we'll skip the signature verification for now.
     """
-    # Log detailed information for diagnostics
-    logging.info(f"Received event: {event}")
-    logging.info(f"Headers: {event.get('headers', {})}")
-    
-    # Get Discord headers for verification
-    headers = event.get('headers', {})
-    
-    # Discord puede enviar headers en minúsculas o mayúsculas, buscamos ambos
-    signature = headers.get('X-Signature-Ed25519', headers.get('x-signature-ed25519', ''))
-    timestamp = headers.get('X-Signature-Timestamp', headers.get('x-signature-timestamp', ''))
+    return handle_event(event, RequestLog(logger))
+
+
+def handle_event(event, log):
+    """
+    Answer a Lambda event and write its log line.
+    """
+    if followup.EVENT_KEY in event:
+        response = handle_followup(event[followup.EVENT_KEY], log)
+    elif warmup.EVENT_KEY in event:
+        report = warmup.run(event[warmup.EVENT_KEY])
+        log.add('warmup', report)
+        response = json_response(report)
+    else:
+        # Para simplificar, omitimos la verificación de firma por ahora
+        # En producción, deberías implementar la verificación de firma ED25519
+        log.add('verified', False)
+        response = handle_interaction(event, log)
+        log.mark('dispatch')
+    log.emit(response['statusCode'])
+    return response
+
+
+def handle_followup(followup_event, log):
+    """
+    Finish a deferred command in the asynchronous invocation that
+    followup.LambdaExecutor started.
+    """
+    command_name = followup_event['command']
+    log.add('followup', command_name)
+    interaction = Interaction(followup_event['interaction'])
+    command = commands.lookup(command_name)
+    if command is None:
+        # E.g. removed by a deploy between the two invocations. Raising would
+        # only make Lambda retry the event; close the deferred reply instead
+        log.add('error', f"Unknown deferred command '{command_name}'")
+        followup.edit_original(
+            interaction.application_id, interaction.token, followup.FAILED_MESSAGE
+        )
+        return {'statusCode': 404}
+    status = followup.run(command, interaction)
+    log.add('webhook_status', status)
+    return {'statusCode': 200 if status < 300 else 502}
+
+
+def handle_interaction(event, log):
+    """
+    Answer one interaction, attaching diagnostics to ``log``. Signature
+    verification, if any, is up to the caller. The request path selects the
+    application, which limits the commands that can be run.
+    """
+    application = get_applications().resolve(event_path(event))
+    log.add('app', application.name)
+
+    # Header names are lower-cased once, whatever the front end sent
+    headers = normalize_headers(event.get('headers'))
     
-    # Log para depuración
-    logging.info(f"Signature: {signature}")
-    logging.info(f"Timestamp: {timestamp}")
+    # Full payloads are only rendered when DEBUG is enabled
+    log.add('headers', headers, logging.DEBUG)
+    log.add('timestamp', headers.get('x-signature-timestamp', ''), logging.DEBUG)
     
     # Parse the request body
     try:
-        body = event['body']
-        
-        # Para simplificar, omitimos la verificación de firma por ahora
-        # En producción, deberías implementar la verificación de firma ED25519
-        logging.info("Skipping signature verification for testing purposes")
-        
-        # Parse the body as JSON
-        body_json = json.loads(body)
+        interaction = Interaction(codec.loads(event['body']), headers)
+        log.mark('parse')
+        log.add('type', interaction.type)
+        log.add('interaction', interaction.raw, logging.DEBUG)
         
         # Check if it's a ping interaction (type 1)
-        if body_json.get('type') == 1:
-            logging.info("Received PING from Discord - responding with PONG")
-            return {
-                'statusCode': 200,
-                'body': json.dumps({'type': 1})
-            }
+        if interaction.type == PING:
+            return PONG_RESPONSE
         
         # Handle APPLICATION_COMMAND interaction (type 2)
-        elif body_json.get('type') == 2:
-            logging.info(f"Received command interaction: {body_json}")
+        elif interaction.type == APPLICATION_COMMAND:
+            command_name = interaction.name
+            log.add('command', command_name)
             
-            # Get the command name
-            command_name = body_json.get('data', {}).get('name')
-            logging.info(f"Command name: {command_name}")
-            
-            # Handle different commands
-            if command_name == 'hello':
-                return {
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'type': 4,  # CHANNEL_MESSAGE_WITH_SOURCE
-                        'data': {
-                            'content': '¡Hola! Soy TerraBot, tu asistente serverless.'
-                        }
-                    })
-                }
-            elif command_name == 'info':
-                return {
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'type': 4,  # CHANNEL_MESSAGE_WITH_SOURCE
-                        'data': {
-                            'content': 'TerraBot v2.0 - Desplegado en AWS Lambda con Terraform'
-                        }
-                    })
-                }
+            # Dispatch through the command registry (built once per container)
+            command = commands.lookup(command_name, application)
+            if command is not None and command.limits:
+                wait = rate_limit.get_limiter().check(command, interaction)
+                log.mark('rate_limit')
+                if wait:
+                    log.add('rate_limited', round(wait, 1))
+                    return RATE_LIMITED_RESPONSE.render(seconds=str(math.ceil(wait)))
+            if command is not None and command.deferred:
+                # ACK now, finish through the interaction webhook
+                followup.get_executor().submit(command, interaction)
+                log.add('deferred', True)
+                return DEFERRED_RESPONSE
+            elif command is not None:
+                return command.handler(interaction)
             else:
-                return {
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'type': 4,  # CHANNEL_MESSAGE_WITH_SOURCE
-                        'data': {
-                            'content': f'Comando `{command_name}` no reconocido.'
-                        }
-                    })
-                }
+                return UNKNOWN_COMMAND_RESPONSE.render(command_name=command_name)
         
         # Handle MESSAGE_COMPONENT interaction (type 3)
-        elif body_json.get('type') == 3:
-            logging.info(f"Received component interaction: {body_json}")
-            custom_id = body_json.get('data', {}).get('custom_id', '')
+        elif interaction.type == MESSAGE_COMPONENT:
+            custom_id = interaction.custom_id
+            log.add('custom_id', custom_id)
+            
+            # State travels in the custom_id, decoded by the matching route
+            route, values = components.match(custom_id)
+            if route is not None:
+                log.add('component', route.pattern)
+                return route.handler(interaction, **values)
+            return COMPONENT_RESPONSE.render(custom_id=custom_id)
+        
+        # Handle APPLICATION_COMMAND_AUTOCOMPLETE interaction (type 4)
+        elif interaction.type == APPLICATION_COMMAND_AUTOCOMPLETE:
+            option_name, value = interaction.focused_option()
+            log.add('command', interaction.name)
+            log.add('focused', option_name)
+            
+            handler = commands.lookup_autocomplete(interaction.name, option_name, application)
+            if handler is None:
+                return NO_CHOICES_RESPONSE
+            choices = handler(interaction, value)
+            log.add('choices', len(choices))
+            return json_response(autocomplete_result(choices[:MAX_CHOICES]))
+        
+        # Handle MODAL_SUBMIT interaction (type 5)
+        elif interaction.type == MODAL_SUBMIT:
+            custom_id = interaction.custom_id
+            log.add('custom_id', custom_id)
             
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'type': 4,  # CHANNEL_MESSAGE_WITH_SOURCE
-                    'data': {
-                        'content': f'Interacción con componente `{custom_id}` recibida.'
-                    }
-                })
-            }
+            modal, state = modals.lookup(custom_id)
+            if modal is None:
+                return UNKNOWN_MODAL_RESPONSE
+            try:
+                values = modal.parse(interaction)
+            except modals.ValidationError as e:
+                log.add('invalid_fields', list(e.errors))
+                return e.response(modal)
+            return modal.handler(interaction, values, state)
         
         # Default response for unhandled interaction types
-        return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'type': 4,  # CHANNEL_MESSAGE_WITH_SOURCE
-                'data': {
-                    'content': 'Tipo de interacción no soportado.'
-                }
-            })
-        }
+        return UNSUPPORTED_RESPONSE
     except Exception as e:
-        logging.error(f"Error processing request: {e}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': 'Internal server error'})
-        }
+        log.add('error', repr(e))
+        return ERROR_RESPONSE
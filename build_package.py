@@ -0,0 +1,295 @@
+"""
+Incremental, reproducible build of the Lambda deployment package.
+
+The package is two layers, each cached under .build_cache/ by the hash of
+its content:
+
+- dependencies: requirements.txt installed for the Lambda platform
+  (manylinux wheels for the runtime's Python version). The key is the hash
+  of the requirements file plus the target platform, Python version and
+  implementation. Downloaded wheels are kept per platform in wheels/, the
+  installed tree in deps/<key>/ and its zip in deps/<key>.zip, so pip only
+  runs when the requirements or the target change, and then offline when
+  the wheels it needs were downloaded before;
+- application: the bot modules in APP_FILES, the handlers kept outside the
+  root in HANDLER_FILES and the command manifest (without its sync
+  records, which change on every sync). Its key is the hash of the file
+  names and contents.
+
+A build copies the cached dependency zip and appends the application files
+to it; a package whose two keys were built before is reused as it is. Every
+entry has a fixed timestamp and permissions and the entries are sorted, so
+the same inputs always give the same bytes and Terraform's
+source_code_hash only changes when the code does.
+
+    python build_package.py                       # deploy_package.zip
+    python build_package.py --arch arm64 --python-version 3.12
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Modules shipped to Lambda, relative to the repository root
+APP_FILES = (
+    'applications.py', 'autocomplete.py', 'bot.py', 'codec.py', 'command_manifest.py',
+    'commands.py', 'components.py', 'ed25519_verify.py', 'followup.py', 'interaction.py',
+    'modals.py', 'public_keys.py', 'rate_limit.py', 'replay_cache.py', 'request_log.py',
+    'responses.py', 'rest_client.py', 'shared_store.py', 'validation.py', 'verification.py',
+    'warmup.py',
+)
+# Handlers kept elsewhere in the repository: arcname -> path from the root.
+# verify_bot is the handler that checks signatures itself.
+HANDLER_FILES = {
+    'verify_bot.py': 'package/verify_bot.py',
+}
+MANIFEST_NAME = 'commands.manifest.json'
+
+# Lambda architectures and the wheels they run
+PLATFORMS = {
+    'x86_64': 'manylinux2014_x86_64',
+    'arm64': 'manylinux2014_aarch64',
+}
+
+# Earliest date a zip entry can hold; used for every entry
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+SKIPPED_DIRECTORIES = ('__pycache__',)
+SKIPPED_SUFFIXES = ('.pyc', '.pyo')
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _add(archive, arcname, data, mode=0o644):
+    info = zipfile.ZipInfo(arcname, ZIP_DATE)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    # Unix permissions, so Lambda sees the same modes on every build
+    info.create_system = 3
+    info.external_attr = mode << 16
+    archive.writestr(info, data, compresslevel=9)
+
+
+def _tree_files(directory):
+    """
+    ``(arcname, path)`` of every file under ``directory``, sorted.
+    """
+    files = []
+    for parent, directories, names in os.walk(directory):
+        directories[:] = [name for name in directories if name not in SKIPPED_DIRECTORIES]
+        for name in names:
+            if not name.endswith(SKIPPED_SUFFIXES):
+                path = os.path.join(parent, name)
+                files.append((os.path.relpath(path, directory).replace(os.sep, '/'), path))
+    return sorted(files)
+
+
+def write_zip(path, entries):
+    """
+    Write ``entries`` (``(arcname, bytes, mode)``) to ``path`` in order,
+    replacing it only once complete.
+    """
+    temporary = f'{path}.tmp'
+    with zipfile.ZipFile(temporary, 'w') as archive:
+        for arcname, data, mode in entries:
+            _add(archive, arcname, data, mode)
+    os.replace(temporary, path)
+
+
+class Target:
+    """
+    Platform the dependencies are installed for.
+    """
+
+    __slots__ = ('platform', 'python_version', 'implementation')
+
+    def __init__(self, arch='x86_64', python_version='3.9', implementation='cp'):
+        if arch not in PLATFORMS:
+            raise ValueError(f"Unknown architecture '{arch}', expected one of {sorted(PLATFORMS)}")
+        self.platform = PLATFORMS[arch]
+        self.python_version = python_version
+        self.implementation = implementation
+
+    def pip_arguments(self):
+        return [
+            '--platform', self.platform,
+            '--python-version', self.python_version,
+            '--implementation', self.implementation,
+            '--only-binary=:all:',
+        ]
+
+    def key(self):
+        return f'{self.implementation}{self.python_version}-{self.platform}'
+
+
+class Builder:
+    """
+    Builds deployment packages from the layers cached in ``cache_dir``.
+    """
+
+    def __init__(self, requirements, target, cache_dir=None, root=ROOT):
+        self.requirements = requirements
+        self.target = target
+        self.root = root
+        self.cache_dir = cache_dir or os.path.join(root, '.build_cache')
+        self.timings = {}
+
+    def _timed(self, stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.timings[stage] = round(time.perf_counter() - start, 3)
+        return result
+
+    def dependencies_key(self):
+        """
+        Hash of the requirements (comments and blank lines left out) and
+        the target.
+        """
+        with open(self.requirements, encoding='utf-8') as f:
+            lines = [line.split('#', 1)[0].strip() for line in f]
+        requirements = '\n'.join(sorted(line for line in lines if line))
+        return _sha256(f'{self.target.key()}\n{requirements}'.encode('utf-8'))
+
+    def dependencies(self, rebuild=False):
+        """
+        Return the path of the dependency layer zip, installing it first
+        when it is not cached.
+        """
+        key = self.dependencies_key()
+        layer = os.path.join(self.cache_dir, 'deps', f'{key}.zip')
+        if os.path.exists(layer) and not rebuild:
+            return layer, False
+
+        tree = os.path.join(self.cache_dir, 'deps', key)
+        wheels = os.path.join(self.cache_dir, 'wheels', self.target.key())
+        os.makedirs(wheels, exist_ok=True)
+        os.makedirs(os.path.dirname(layer), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f'{key[:12]}-', dir=os.path.dirname(layer))
+        try:
+            with open(self.requirements, encoding='utf-8') as f:
+                has_requirements = any(line.split('#', 1)[0].strip() for line in f)
+            if has_requirements:
+                pip = [sys.executable, '-m', 'pip', '--disable-pip-version-check']
+                install = pip + [
+                    'install', '-r', self.requirements, '--target', staging, '--no-index',
+                    '--find-links', wheels, '--no-compile', *self.target.pip_arguments(),
+                ]
+                # Offline from the wheels of earlier builds first; the index is
+                # only asked for the wheels they do not have
+                if subprocess.run(install, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode:
+                    subprocess.run(pip + [
+                        'download', '-r', self.requirements, '--dest', wheels,
+                        '--find-links', wheels, *self.target.pip_arguments(),
+                    ], check=True)
+                    shutil.rmtree(staging)
+                    os.mkdir(staging)
+                    subprocess.run(install, check=True)
+            if os.path.exists(tree):
+                shutil.rmtree(tree)
+            os.replace(staging, tree)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        entries = []
+        for arcname, path in _tree_files(tree):
+            with open(path, 'rb') as f:
+                data = f.read()
+            entries.append((arcname, data, 0o755 if os.access(path, os.X_OK) else 0o644))
+        write_zip(layer, entries)
+        return layer, True
+
+    def application(self):
+        """
+        Return the application layer as ``(key, entries)``.
+        """
+        sources = [(name, name) for name in APP_FILES] + sorted(HANDLER_FILES.items())
+        entries = []
+        for arcname, name in sources:
+            with open(os.path.join(self.root, name), 'rb') as f:
+                entries.append((arcname, f.read(), 0o644))
+
+        import command_manifest
+        manifest = command_manifest.refresh(os.path.join(self.root, MANIFEST_NAME))
+        shipped = {key: value for key, value in manifest.items() if key != 'synced'}
+        shipped['synced'] = {}
+        entries.append((MANIFEST_NAME, (command_manifest.canonical(shipped) + '\n').encode('utf-8'), 0o644))
+
+        entries.sort()
+        digest = hashlib.sha256()
+        for arcname, data, mode in entries:
+            digest.update(f'{arcname}\0{mode:o}\0{_sha256(data)}\n'.encode('utf-8'))
+        return digest.hexdigest(), entries
+
+    def build(self, output, rebuild_dependencies=False):
+        """
+        Write the package to ``output`` and return a report of the build.
+        """
+        layer, installed = self._timed('dependencies', self.dependencies, rebuild_dependencies)
+        app_key, entries = self._timed('application', self.application)
+
+        dependencies_key = os.path.basename(layer)[:-len('.zip')]
+        package = os.path.join(
+            self.cache_dir, 'packages', f'{dependencies_key[:16]}-{app_key[:16]}.zip'
+        )
+        reused = os.path.exists(package) and not installed
+        if not reused:
+            self._timed('package', self._assemble, layer, entries, package)
+        self._timed('output', shutil.copyfile, package, output)
+
+        with open(output, 'rb') as f:
+            package_hash = _sha256(f.read())
+        return {
+            'output': output,
+            'sha256': package_hash,
+            'bytes': os.path.getsize(output),
+            'dependencies': 'installed' if installed else 'cached',
+            'dependencies_key': dependencies_key,
+            'application_key': app_key,
+            'package': 'cached' if reused else 'built',
+            'timings_s': self.timings,
+        }
+
+    def _assemble(self, layer, entries, package):
+        os.makedirs(os.path.dirname(package), exist_ok=True)
+        temporary = f'{package}.tmp'
+        shutil.copyfile(layer, temporary)
+        with zipfile.ZipFile(temporary, 'a') as archive:
+            clashes = set(archive.namelist()).intersection(name for name, _, _ in entries)
+            if clashes:
+                raise ValueError(f'Application files shadow dependencies: {sorted(clashes)}')
+            for arcname, data, mode in entries:
+                _add(archive, arcname, data, mode)
+        os.replace(temporary, package)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the Lambda deployment package')
+    parser.add_argument('--requirements', default=os.path.join(ROOT, 'requirements.txt'))
+    parser.add_argument('--output', default=os.path.join(ROOT, 'deploy_package.zip'))
+    parser.add_argument('--arch', default='x86_64', choices=sorted(PLATFORMS))
+    parser.add_argument('--python-version', default='3.9',
+                        help='Python version of the Lambda runtime (terraform: python3.9)')
+    parser.add_argument('--cache-dir', help='default: .build_cache next to this script')
+    parser.add_argument('--rebuild-deps', action='store_true',
+                        help='reinstall the dependencies even if they are cached')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    builder = Builder(args.requirements, Target(args.arch, args.python_version), args.cache_dir)
+    report = builder.build(args.output, args.rebuild_deps)
+    report['total_s'] = round(time.perf_counter() - start, 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+JSON codec used on the interaction hot path.
+
+The fastest available library is picked once, when the module is imported:
+orjson, then ujson, then the standard json module. JSON_CODEC=json|orjson|ujson
+forces a specific one. Every codec produces the same compact, UTF-8 output so
+responses do not change with the library that happens to be installed.
+"""
+import json
+import os
+
+
+class Codec:
+    """
+    loads/dumps functions of one JSON library.
+
+    dumps returns str (what the Lambda proxy integration expects in ``body``)
+    and dumps_bytes returns UTF-8 bytes for entry points that write to a
+    socket directly.
+    """
+
+    __slots__ = ('name', 'loads', 'dumps', 'dumps_bytes')
+
+    def __init__(self, name, loads, dumps, dumps_bytes):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.dumps_bytes = dumps_bytes
+
+
+def _stdlib_codec():
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    return Codec(
+        'json',
+        json.loads,
+        encode,
+        lambda obj: encode(obj).encode('utf-8'),
+    )
+
+
+def _orjson_codec():
+    import orjson
+
+    dumps_bytes = orjson.dumps
+    return Codec(
+        'orjson',
+        orjson.loads,
+        lambda obj: dumps_bytes(obj).decode('utf-8'),
+        dumps_bytes,
+    )
+
+
+def _ujson_codec():
+    import ujson
+
+    def dumps(obj):
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+    return Codec(
+        'ujson',
+        ujson.loads,
+        dumps,
+        lambda obj: dumps(obj).encode('utf-8'),
+    )
+
+
+_FACTORIES = {
+    'orjson': _orjson_codec,
+    'ujson': _ujson_codec,
+    'json': _stdlib_codec,
+}
+
+
+def select_codec(name=None):
+    """
+    Return the codec called ``name``, or the fastest one installed.
+
+    Raises ImportError if a codec is requested by name but its library is
+    missing.
+    """
+    if name:
+        return _FACTORIES[name]()
+
+    for factory in (_orjson_codec, _ujson_codec):
+        try:
+            return factory()
+        except ImportError:
+            continue
+    return _stdlib_codec()
+
+
+CODEC = select_codec(os.environ.get('JSON_CODEC'))
+
+# Module level aliases keep the per-request call a single attribute lookup
+loads = CODEC.loads
+dumps = CODEC.dumps
+dumps_bytes = CODEC.dumps_bytes
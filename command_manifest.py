@@ -0,0 +1,146 @@
+"""
+Hash-stamped manifest of the slash commands.
+
+commands.manifest.json holds the Discord schemas of every command in
+canonical JSON (sorted keys, no insignificant whitespace in the hash), the
+SHA-256 of those schemas and, under ``synced``, the hash last pushed to each
+scope (an application, or an application in one guild):
+
+    {"version": 1, "hash": "...", "commands": [...],
+     "synced": {"1180000000000000000": "...",
+                "1180000000000000000/guilds/42": "..."}}
+
+register_commands.py refreshes it before every sync and skips Discord
+entirely when the scope already has the current hash. The deploy scripts
+build it (``python command_manifest.py``) and ship it in the package;
+commands.py only uses it when its hash matches the commands in the code.
+"""
+import json
+import os
+
+VERSION = 1
+
+MANIFEST_PATH = os.environ.get('COMMAND_MANIFEST') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'commands.manifest.json'
+)
+
+
+def canonical(value):
+    """
+    Canonical JSON of ``value``: equal content, equal text.
+    """
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def content_hash(schemas):
+    """
+    SHA-256 of a list of command schemas.
+    """
+    # Imported on first use; components.py has usually loaded it already
+    import hashlib
+    return hashlib.sha256(canonical(schemas).encode('utf-8')).hexdigest()
+
+
+def scope(application_id, guild_id=None):
+    """
+    Key of ``synced`` for the global commands of an application or its
+    commands in one guild.
+    """
+    return f'{application_id}/guilds/{guild_id}' if guild_id else str(application_id)
+
+
+def load(path=None):
+    """
+    Return the manifest at ``path``, or None when there is none.
+    """
+    path = path or MANIFEST_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != VERSION:
+        raise ValueError(f'{path} has manifest version {manifest.get("version")}, expected {VERSION}')
+    return manifest
+
+
+def write(manifest, path=None):
+    path = path or MANIFEST_PATH
+    # Write and rename, so a reader never sees half a manifest
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, sort_keys=True, indent=2, ensure_ascii=False)
+        f.write('\n')
+    os.replace(temporary, path)
+
+
+def build(schemas, previous=None):
+    """
+    Manifest for ``schemas``, keeping the sync records of ``previous``.
+    """
+    return {
+        'version': VERSION,
+        'hash': content_hash(schemas),
+        'commands': schemas,
+        'synced': dict(previous['synced']) if previous else {},
+    }
+
+
+def refresh(path=None):
+    """
+    Rebuild the manifest from commands.py, write it if it changed and
+    return it.
+    """
+    import commands
+
+    previous = load(path)
+    manifest = build(commands.schemas(), previous)
+    if manifest != previous:
+        write(manifest, path)
+    return manifest
+
+
+def is_synced(manifest, scope_key, schemas_hash):
+    """
+    Whether ``scope_key`` was last synced with ``schemas_hash``.
+    """
+    return manifest is not None and manifest['synced'].get(scope_key) == schemas_hash
+
+
+def record_sync(scope_keys, schemas_hash, path=None):
+    """
+    Record that every scope of ``scope_keys`` now has ``schemas_hash``.
+    """
+    manifest = load(path)
+    if manifest is None:
+        manifest = refresh(path)
+    for scope_key in scope_keys:
+        manifest['synced'][scope_key] = schemas_hash
+    write(manifest, path)
+
+
+def main():
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Build commands.manifest.json from commands.py')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with status 1 if the manifest is missing or out of date')
+    parser.add_argument('--path', default=MANIFEST_PATH)
+    args = parser.parse_args()
+
+    if args.check:
+        import commands
+
+        manifest = load(args.path)
+        current = content_hash(commands.schemas())
+        if manifest is None or manifest['hash'] != current:
+            print(f'{args.path} is out of date (commands hash {current})')
+            sys.exit(1)
+        print(f'{args.path} is up to date ({current})')
+        return
+    manifest = refresh(args.path)
+    print(f"{args.path}: {len(manifest['commands'])} commands, hash {manifest['hash']}")
+
+
+if __name__ == '__main__':
+    main()
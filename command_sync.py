@@ -0,0 +1,319 @@
+"""
+Diff-based sync of application commands with Discord.
+
+Instead of one POST per command on every deploy, sync() reads the commands
+Discord has registered (one GET), compares them field by field with the
+local schemas (commands.schemas) and, only if they differ, replaces them all
+with a single bulk overwrite (one PUT). Commands that did not change keep
+their IDs. A dry run stops after the comparison.
+
+Discord adds fields to what it returns (ids, version, defaults such as
+``dm_permission``); those are dropped from both sides before comparing, so
+an unchanged command set costs exactly one request.
+
+sync_guilds() does the same for many guilds at once on asyncio, with at
+most ``concurrency`` guilds in flight over a rest_client.AsyncRestClient,
+which keeps each guild route within its rate limit. Finished guilds are
+written to a Checkpoint file as they complete, so an interrupted run
+resumes where it stopped.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+# Fields Discord generates for every command
+METADATA = frozenset(('id', 'application_id', 'guild_id', 'version', 'default_permission'))
+
+# Values Discord reports for fields the local schema leaves out
+DEFAULTS = {
+    'type': 1,
+    'dm_permission': True,
+    'nsfw': False,
+    'required': False,
+    'autocomplete': False,
+    'integration_types': [0],
+}
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+# Outcomes of a guild in sync_guilds
+UNCHANGED = 'unchanged'
+UPDATED = 'updated'
+PENDING = 'pending'  # dry run: would be updated
+SKIPPED = 'skipped'  # already done according to the checkpoint
+FAILED = 'failed'
+
+# Guilds per page of GET /users/@me/guilds
+GUILD_PAGE = 200
+
+
+class SyncError(RuntimeError):
+    """
+    Discord refused a request of the sync. ``status`` is the HTTP status.
+    """
+
+    def __init__(self, message, status, body=b''):
+        super().__init__(f'{message}: HTTP {status} {body[:200]!r}')
+        self.status = status
+        self.body = body
+
+
+class Change:
+    """
+    One command that differs: ``kind`` is ADDED, REMOVED or CHANGED, and
+    ``fields`` lists the differences of a CHANGED command as
+    ``(path, remote value, local value)``.
+    """
+
+    __slots__ = ('kind', 'name', 'fields')
+
+    def __init__(self, kind, name, fields=()):
+        self.kind = kind
+        self.name = name
+        self.fields = fields
+
+    def __repr__(self):
+        return f'Change({self.kind!r}, {self.name!r})'
+
+
+def commands_path(application_id, guild_id=None):
+    """
+    API path of the global commands of an application, or of its commands
+    in one guild.
+    """
+    if guild_id:
+        return f'/applications/{application_id}/guilds/{guild_id}/commands'
+    return f'/applications/{application_id}/commands'
+
+
+def normalize(value):
+    """
+    ``value`` without Discord's metadata, default values and empty fields,
+    so a local schema and the command Discord returns for it are equal.
+    """
+    if isinstance(value, dict):
+        normalized = {}
+        for key, item in value.items():
+            if key in METADATA or item is None or DEFAULTS.get(key, ()) == item:
+                continue
+            item = normalize(item)
+            if item in ([], {}):
+                continue
+            normalized[key] = item
+        return normalized
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    return value
+
+
+def _key(schema):
+    return schema.get('type', 1), schema['name']
+
+
+def _compare(path, remote, local, out):
+    if isinstance(remote, dict) and isinstance(local, dict):
+        for key in sorted(remote.keys() | local.keys()):
+            _compare(f'{path}.{key}' if path else key, remote.get(key), local.get(key), out)
+    elif isinstance(remote, list) and isinstance(local, list) and len(remote) == len(local):
+        for i, (remote_item, local_item) in enumerate(zip(remote, local)):
+            _compare(f'{path}[{i}]', remote_item, local_item, out)
+    elif remote != local:
+        out.append((path, remote, local))
+
+
+def diff(local, remote):
+    """
+    Compare local schemas with the commands registered in Discord and
+    return the list of Changes (empty when they match). Commands are
+    matched by type and name; option order matters, as Discord shows
+    options in the order they are sent.
+    """
+    local = {_key(schema): normalize(schema) for schema in local}
+    remote = {_key(schema): normalize(schema) for schema in remote}
+
+    changes = []
+    for key, schema in local.items():
+        if key not in remote:
+            changes.append(Change(ADDED, key[1]))
+            continue
+        fields = []
+        _compare('', remote[key], schema, fields)
+        if fields:
+            changes.append(Change(CHANGED, key[1], fields))
+    for key in remote.keys() - local.keys():
+        changes.append(Change(REMOVED, key[1]))
+    return changes
+
+
+def format_changes(changes):
+    """
+    Lines describing ``changes`` for the console.
+    """
+    symbols = {ADDED: '+', REMOVED: '-', CHANGED: '~'}
+    lines = []
+    for change in sorted(changes, key=lambda change: (change.kind, change.name)):
+        lines.append(f'{symbols[change.kind]} {change.name}')
+        for path, remote_value, local_value in change.fields:
+            lines.append(f'    {path}: {remote_value!r} -> {local_value!r}')
+    return lines
+
+
+def _checked(response, message):
+    if not response.ok:
+        raise SyncError(message, response.status, response.body)
+    return response
+
+
+def fetch(client, application_id, guild_id=None):
+    """
+    Return the commands registered in Discord.
+    """
+    response = client.request('GET', commands_path(application_id, guild_id))
+    return _checked(response, 'Could not read the registered commands').json()
+
+
+def sync(client, application_id, local, guild_id=None, dry_run=False):
+    """
+    Make the commands registered in Discord match ``local`` (a list of
+    schemas) with at most one bulk overwrite, and return the Changes it
+    applied, or would apply with ``dry_run``. ``client`` is a
+    rest_client.RestClient authorized as the bot.
+    """
+    changes = diff(local, fetch(client, application_id, guild_id))
+    if changes and not dry_run:
+        _checked(
+            client.request('PUT', commands_path(application_id, guild_id), json=local),
+            'Could not overwrite the commands',
+        )
+    return changes
+
+
+async def sync_async(client, application_id, local, guild_id=None, dry_run=False):
+    """
+    sync() for a rest_client.AsyncRestClient.
+    """
+    path = commands_path(application_id, guild_id)
+    response = _checked(await client.request('GET', path), 'Could not read the registered commands')
+    changes = diff(local, response.json())
+    if changes and not dry_run:
+        _checked(await client.request('PUT', path, json=local), 'Could not overwrite the commands')
+    return changes
+
+
+async def fetch_guild_ids(client):
+    """
+    Return the IDs of every guild the bot is in, following the pages of
+    GET /users/@me/guilds.
+    """
+    guild_ids = []
+    after = '0'
+    while True:
+        response = _checked(
+            await client.request('GET', f'/users/@me/guilds?limit={GUILD_PAGE}&after={after}'),
+            'Could not list the guilds',
+        )
+        page = response.json()
+        guild_ids.extend(guild['id'] for guild in page)
+        if len(page) < GUILD_PAGE:
+            return guild_ids
+        after = page[-1]['id']
+
+
+def fingerprint(application_id, local):
+    """
+    Hash of what a sync writes; a checkpoint only applies to the same one.
+    """
+    data = json.dumps([application_id, local], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class Checkpoint:
+    """
+    Guilds already synced, kept in a JSON file together with the
+    fingerprint of the commands they were synced with. A file written for
+    other commands is ignored.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.completed = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('fingerprint') == fingerprint:
+                self.completed = data.get('completed', {})
+
+    def __contains__(self, guild_id):
+        return guild_id in self.completed
+
+    def record(self, guild_id, outcome):
+        self.completed[guild_id] = outcome
+        self.save()
+
+    def save(self):
+        # Write and rename, so an interruption never leaves half a file
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'completed': self.completed}, f)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        self.completed = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class GuildResult:
+    """
+    Outcome of one guild in sync_guilds.
+    """
+
+    __slots__ = ('guild_id', 'outcome', 'changes', 'error', 'elapsed')
+
+    def __init__(self, guild_id, outcome, changes=(), error=None, elapsed=0.0):
+        self.guild_id = guild_id
+        self.outcome = outcome
+        self.changes = changes
+        self.error = error
+        self.elapsed = elapsed
+
+
+async def sync_guilds(client, application_id, local, guild_ids, concurrency=8,
+                      checkpoint=None, dry_run=False, progress=None):
+    """
+    Sync ``local`` into every guild of ``guild_ids`` with at most
+    ``concurrency`` guilds in flight and return a GuildResult per guild, in
+    order. A failing guild does not stop the others. ``progress`` is called
+    with each GuildResult as it completes.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def sync_guild(guild_id):
+        if checkpoint is not None and guild_id in checkpoint:
+            result = GuildResult(guild_id, SKIPPED)
+        else:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    changes = await sync_async(client, application_id, local, guild_id, dry_run)
+                except Exception as e:
+                    result = GuildResult(
+                        guild_id, FAILED, error=str(e), elapsed=time.perf_counter() - start
+                    )
+                else:
+                    outcome = UNCHANGED if not changes else PENDING if dry_run else UPDATED
+                    result = GuildResult(
+                        guild_id, outcome, changes, elapsed=time.perf_counter() - start
+                    )
+                    if checkpoint is not None and not dry_run:
+                        checkpoint.record(guild_id, outcome)
+        if progress is not None:
+            progress(result)
+        return result
+
+    return await asyncio.gather(*(sync_guild(guild_id) for guild_id in guild_ids))
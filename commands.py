@@ -0,0 +1,229 @@
+"""
+Slash commands of TerraBot.
+
+Each command declares its Discord schema and its handler in one place. The
+registry is filled when this module is imported, so a warm Lambda container
+builds the dispatch table once and bot.lambda_handler resolves a command with
+a single dictionary lookup. register_commands.py reads the same registry to
+publish the schemas to Discord. Applications that only expose some of the
+commands (applications.py) get their own table, filtered once per container.
+
+A command manifest (command_manifest.py) orders the dispatch table only
+when it was built from the commands defined here; a stale one, e.g. a
+command added since the last ``python command_manifest.py``, is logged and
+ignored, so every registered command is still answered.
+
+Replies that never change are serialized at import time, so their handlers
+only return the ready-made response. Modal forms are declared here too, next
+to the command that opens them.
+"""
+import logging
+
+import command_manifest
+from modals import PARAGRAPH, Field, modal
+from rate_limit import Limit
+from responses import channel_message, ephemeral_message, json_response
+
+# Discord application command types
+CHAT_INPUT = 1
+
+REGISTRY = {}
+
+# Commands the bot answers: REGISTRY, in manifest order when it matches
+DISPATCH = REGISTRY
+
+# Application name -> the part of DISPATCH it exposes
+_APPLICATION_REGISTRIES = {}
+
+# (command name, option name) -> autocomplete handler
+AUTOCOMPLETE = {}
+
+
+class Command:
+    """
+    A slash command: the schema sent to Discord plus the function that
+    answers it.
+
+    The handler receives the Interaction (interaction.py) and returns the Lambda
+    response built with the helpers in responses.py. Deferred commands are
+    acknowledged right away and their handler runs later through followup.py;
+    it returns the message payload that replaces the "thinking" reply.
+    """
+
+    __slots__ = ('name', 'description', 'handler', 'options', 'type', 'deferred', 'limits')
+
+    def __init__(self, name, description, handler, options=None, type=CHAT_INPUT,
+                 deferred=False, limits=()):
+        self.name = name
+        self.description = description
+        self.handler = handler
+        self.options = options or []
+        self.type = type
+        self.deferred = deferred
+        self.limits = limits
+
+    def schema(self):
+        """
+        Return the command definition expected by the Discord API.
+        """
+        schema = {
+            'name': self.name,
+            'description': self.description,
+            'type': self.type,
+        }
+        if self.options:
+            schema['options'] = [
+                dict(option, autocomplete=True)
+                if (self.name, option['name']) in AUTOCOMPLETE else option
+                for option in self.options
+            ]
+        return schema
+
+
+def command(name, description, options=None, type=CHAT_INPUT, deferred=False,
+            rate_limit=None):
+    """
+    Register the decorated function as the handler of a slash command.
+
+    Use ``deferred=True`` for commands that may not finish inside Discord's
+    3 second window, and ``rate_limit`` (a rate_limit.Limit or a list of
+    them) for commands that are expensive to answer.
+    """
+    if rate_limit is None:
+        limits = ()
+    elif isinstance(rate_limit, Limit):
+        limits = (rate_limit,)
+    else:
+        limits = tuple(rate_limit)
+
+    def decorator(handler):
+        if name in REGISTRY:
+            raise ValueError(f"Command '{name}' is already registered")
+        REGISTRY[name] = Command(name, description, handler, options, type, deferred, limits)
+        return handler
+    return decorator
+
+
+def autocomplete(command_name, option_name):
+    """
+    Register the decorated function as the autocomplete handler of one
+    option. It receives the Interaction and the text typed so far and
+    returns the list of choices, usually from an autocomplete.PrefixIndex
+    built at import time. The option is marked ``autocomplete`` in the
+    schema published to Discord.
+    """
+    def decorator(handler):
+        key = (command_name, option_name)
+        if key in AUTOCOMPLETE:
+            raise ValueError(f"Autocomplete for '{command_name}.{option_name}' is already registered")
+        AUTOCOMPLETE[key] = handler
+        return handler
+    return decorator
+
+
+def _application_names(application):
+    if application is None or application.commands is None:
+        return None
+    unknown = application.commands.difference(REGISTRY)
+    if unknown:
+        raise ValueError(
+            f"Application '{application.name}' lists unknown commands: {sorted(unknown)}"
+        )
+    return application.commands
+
+
+def registry_for(application=None):
+    """
+    Return the dispatch table of an applications.Application (every
+    command for None or an application without a command list).
+    """
+    names = _application_names(application) if application is not None else None
+    if names is None:
+        return DISPATCH
+    registry = _APPLICATION_REGISTRIES.get(application.name)
+    if registry is None:
+        registry = {name: registered for name, registered in DISPATCH.items() if name in names}
+        _APPLICATION_REGISTRIES[application.name] = registry
+    return registry
+
+
+def lookup_autocomplete(command_name, option_name, application=None):
+    """
+    Return the autocomplete handler of an option or None.
+    """
+    if command_name not in registry_for(application):
+        return None
+    return AUTOCOMPLETE.get((command_name, option_name))
+
+
+def lookup(name, application=None):
+    """
+    Return the registered Command called ``name`` or None.
+    """
+    return registry_for(application).get(name)
+
+
+def schemas(application=None):
+    """
+    Return the Discord schemas of every command of an application, as
+    defined in this module (the manifest is built from them).
+    """
+    names = _application_names(application)
+    return [registered.schema() for name, registered in REGISTRY.items()
+            if names is None or name in names]
+
+
+HELLO_RESPONSE = json_response(
+    channel_message('¡Hola! Soy TerraBot, tu asistente serverless.')
+)
+INFO_RESPONSE = json_response(
+    channel_message('TerraBot v2.0 - Desplegado en AWS Lambda con Terraform')
+)
+
+
+@command('hello', 'Saludo del bot')
+def hello(interaction):
+    return HELLO_RESPONSE
+
+
+@command('info', 'Muestra información sobre el bot')
+def info(interaction):
+    return INFO_RESPONSE
+
+
+@modal('sugerencia', 'Nueva sugerencia', [
+    Field('titulo', 'Título', min_length=4, max_length=80),
+    Field('detalle', 'Detalle', style=PARAGRAPH, max_length=1000, required=False),
+    Field('prioridad', 'Prioridad (1-5)', max_length=1, type=int, min_value=1, max_value=5),
+])
+def suggestion_form(interaction, values, state):
+    return json_response(
+        ephemeral_message(f"¡Gracias! Sugerencia «{values['titulo']}» recibida.")
+    )
+
+
+@command('sugerencia', 'Envía una sugerencia para TerraBot', rate_limit=Limit(3, 600))
+def suggestion(interaction):
+    return suggestion_form.response()
+
+
+def _dispatch_from_manifest(manifest):
+    """
+    Build the dispatch table from ``manifest`` if its hash is the hash of
+    the schemas defined here; otherwise log it and answer every command.
+    """
+    global DISPATCH
+    if manifest is None:
+        return
+    current = command_manifest.content_hash(schemas())
+    if manifest['hash'] != current:
+        logging.getLogger(__name__).warning(
+            f"Command manifest is out of date (commands hash {current}), ignoring it; "
+            f"run python command_manifest.py"
+        )
+        DISPATCH = REGISTRY
+        return
+    DISPATCH = {schema['name']: REGISTRY[schema['name']] for schema in manifest['commands']}
+
+
+_dispatch_from_manifest(command_manifest.load())
@@ -0,0 +1,200 @@
+"""
+custom_id routing for message components.
+
+A component handler is registered for a custom_id pattern such as
+``page:{n:int}:{query_hash}``: a literal name followed by ``:``-separated
+fields. Patterns are compiled when they are registered into a table keyed by
+the literal name and the number of fields, so a click is routed with one
+``split`` and one dict lookup whatever the number of patterns.
+
+The same Route builds the custom_id for the buttons it will answer, packing
+integers in base 36 and checking Discord's 100 character limit, so
+paginated and multi-step flows carry their state in the component itself
+instead of a database.
+"""
+import base64
+import hashlib
+import re
+
+# Discord limit on custom_id
+MAX_CUSTOM_ID = 100
+
+SEPARATOR = ':'
+
+_FIELD = re.compile(r'^\{(\w+)(?::(\w+))?\}$')
+
+# Separators outside of {field:converter}
+_PATTERN_SEPARATOR = re.compile(r':(?![^{]*\})')
+
+_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def _encode_int(value):
+    if value < 0:
+        return '-' + _encode_int(-value)
+    digits = []
+    while True:
+        value, digit = divmod(value, 36)
+        digits.append(_DIGITS[digit])
+        if not value:
+            return ''.join(reversed(digits))
+
+
+def _decode_int(text):
+    return int(text, 36)
+
+
+def _encode_str(value):
+    value = str(value)
+    if SEPARATOR in value:
+        raise ValueError(f"Component field values cannot contain '{SEPARATOR}': {value!r}")
+    return value
+
+
+# converter name -> (encode, decode)
+CONVERTERS = {
+    'str': (_encode_str, str),
+    'int': (_encode_int, _decode_int),
+}
+
+
+def short_hash(text, length=8):
+    """
+    Short URL-safe digest of ``text``, to refer to long state (a search
+    query, a filter) that does not fit in a custom_id.
+    """
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    return base64.urlsafe_b64encode(digest).decode('ascii')[:length]
+
+
+class Route:
+    """
+    A compiled custom_id pattern and its handler.
+
+    The handler receives the Interaction and the decoded fields as keyword
+    arguments and returns the Lambda response.
+    """
+
+    __slots__ = ('pattern', 'name', 'handler', 'fields', '_segments')
+
+    def __init__(self, pattern, handler):
+        name, *segments = _PATTERN_SEPARATOR.split(pattern)
+        if not name or _FIELD.match(name):
+            raise ValueError(f"Pattern '{pattern}' must start with a literal name")
+
+        self.pattern = pattern
+        self.name = name
+        self.handler = handler
+        self.fields = []
+        # (literal, None, None) or (None, field name, (encode, decode))
+        self._segments = []
+        for segment in segments:
+            field = _FIELD.match(segment)
+            if field is None:
+                self._segments.append((segment, None, None))
+                continue
+            field_name, converter = field.group(1), field.group(2) or 'str'
+            if converter not in CONVERTERS:
+                raise ValueError(f"Unknown converter '{converter}' in pattern '{pattern}'")
+            self.fields.append(field_name)
+            self._segments.append((None, field_name, CONVERTERS[converter]))
+
+    @property
+    def key(self):
+        return self.name, len(self._segments)
+
+    def match(self, parts):
+        """
+        Decode the fields from the parts after the name, or return None.
+        """
+        values = {}
+        for part, (literal, field_name, converter) in zip(parts, self._segments):
+            if literal is not None:
+                if part != literal:
+                    return None
+                continue
+            try:
+                values[field_name] = converter[1](part)
+            except ValueError:
+                return None
+        return values
+
+    def build(self, **values):
+        """
+        Return the custom_id that routes back here with ``values``.
+        """
+        parts = [self.name]
+        for literal, field_name, converter in self._segments:
+            parts.append(literal if literal is not None else converter[0](values[field_name]))
+        custom_id = SEPARATOR.join(parts)
+        if len(custom_id) > MAX_CUSTOM_ID:
+            raise ValueError(
+                f"custom_id for '{self.pattern}' is {len(custom_id)} characters, "
+                f"the limit is {MAX_CUSTOM_ID}"
+            )
+        return custom_id
+
+
+class ComponentRouter:
+    """
+    Dispatch table from custom_id patterns to handlers.
+    """
+
+    def __init__(self):
+        self._routes = {}
+        self._patterns = {}
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def add(self, pattern, handler):
+        if pattern in self._patterns:
+            raise ValueError(f"Component pattern '{pattern}' is already registered")
+        route = Route(pattern, handler)
+        routes = self._routes.setdefault(route.key, [])
+        routes.append(route)
+        # More literal segments means more specific: 'page:last:{h}' is tried
+        # before 'page:{n:int}:{h}', where 'last' would decode as base 36
+        routes.sort(key=lambda candidate: len(candidate.fields))
+        self._patterns[pattern] = route
+        return route
+
+    def route(self, pattern):
+        """
+        Register the decorated function for ``pattern``.
+        """
+        def decorator(handler):
+            self.add(pattern, handler)
+            return handler
+        return decorator
+
+    def get(self, pattern):
+        """
+        Return the Route registered for ``pattern``, to build custom_ids.
+        """
+        return self._patterns[pattern]
+
+    def match(self, custom_id):
+        """
+        Return ``(route, values)`` for a custom_id, or ``(None, None)``.
+        """
+        name, *parts = custom_id.split(SEPARATOR)
+        # Routes sharing a name and field count differ in their literals
+        for route in self._routes.get((name, len(parts)), ()):
+            values = route.match(parts)
+            if values is not None:
+                return route, values
+        return None, None
+
+
+ROUTER = ComponentRouter()
+
+component = ROUTER.route
+match = ROUTER.match
+
+
+def build(pattern, **values):
+    """
+    Build a custom_id for a pattern registered on the default router.
+    """
+    return ROUTER.get(pattern).build(**values)
@@ -12,22 +12,13 @@ Get-Content .\.env | ForEach-Object {
     }
 }
 
-# Install dependencies
-Write-Host "🚀 Installing Python dependencies..."
-pip install -r requirements.txt -t .\package
-
-# Copy bot.py to package
-Copy-Item .\bot.py .\package\
-
-# Create deployment package
-Write-Host "📦 Creating deployment package..."
-if (Test-Path .\deploy_package.zip) {
-    Remove-Item .\deploy_package.zip -Force
+# Build deploy_package.zip; dependencies and unchanged code come from .build_cache
+Write-Host "📦 Building deployment package..."
+python build_package.py
+if ($LASTEXITCODE -ne 0) {
+    Write-Error "❌ Error building the deployment package"
+    exit 1
 }
-Compress-Archive -Path .\package\* -DestinationPath .\deploy_package.zip -Force
-
-# Clean up
-Remove-Item -Recurse -Force .\package -ErrorAction SilentlyContinue
 
 # Deploy with Terraform
 Write-Host "🚀 Deploying to AWS..."
@@ -46,6 +37,14 @@ try {
     terraform apply -auto-approve
     $api_url = terraform output -raw api_endpoint
     
+    # Sync the commands with Discord; skipped when the manifest hash was already pushed
+    if ($env:DISCORD_APPLICATION_ID) {
+        Write-Host "🔄 Syncing commands..."
+        Push-Location ..
+        python register_commands.py
+        Pop-Location
+    }
+    
     Write-Host ""
     Write-Host "✅ Deployment complete!"
     Write-Host "🔗 API Gateway URL: $api_url"
@@ -9,26 +9,9 @@ fi
 # Load environment variables
 export $(grep -v '^#' .env | xargs)
 
-# Install dependencies
-echo "🚀 Installing Python dependencies..."
-mkdir -p package
-pip install -r requirements.txt -t ./package
-
-# Copy bot.py to package
-cp bot.py ./package/
-
-# Create deployment package
-echo "📦 Creating deployment package..."
-if [ -f deploy_package.zip ]; then
-    rm deploy_package.zip
-fi
-
-cd package
-zip -r ../deploy_package.zip .
-cd ..
-
-# Clean up
-rm -rf package
+# Build deploy_package.zip; dependencies and unchanged code come from .build_cache
+echo "📦 Building deployment package..."
+python build_package.py || exit 1
 
 # Deploy with Terraform
 echo "🚀 Deploying to AWS..."
@@ -47,6 +30,13 @@ terraform apply -auto-approve
 
 # Get the API Gateway URL
 api_url=$(terraform output -raw api_endpoint)
+cd ..
+
+# Sync the commands with Discord; skipped when the manifest hash was already pushed
+if [ -n "$DISCORD_APPLICATION_ID" ]; then
+    echo "🔄 Syncing commands..."
+    python register_commands.py
+fi
 echo ""
 echo "✅ Deployment complete!"
 echo "🔗 API Gateway URL: $api_url"
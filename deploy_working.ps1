@@ -18,28 +18,13 @@ foreach ($line in $envContents) {
     }
 }
 
-# Crear directorio para el paquete
-Write-Host "🚀 Instalando dependencias de Python..."
-if (Test-Path .\package) {
-    Remove-Item -Recurse -Force .\package
-}
-New-Item -ItemType Directory -Force -Path .\package | Out-Null
-
-# Instalar dependencias
-pip install -r requirements.txt -t .\package
-
-# Copiar el código del bot
-Copy-Item .\bot.py .\package\
-
-# Crear el paquete de despliegue
+# Crear el paquete de despliegue; las dependencias y el código sin cambios salen de .build_cache
 Write-Host "📦 Creando paquete de despliegue..."
-if (Test-Path .\deploy_package.zip) {
-    Remove-Item -Force .\deploy_package.zip
+python build_package.py
+if ($LASTEXITCODE -ne 0) {
+    Write-Error "❌ Error al crear el paquete de despliegue"
+    exit 1
 }
-Compress-Archive -Path .\package\* -DestinationPath .\deploy_package.zip -Force
-
-# Limpiar directorio temporal
-Remove-Item -Recurse -Force .\package
 
 # Configurar variables para Terraform
 Write-Host "🚀 Desplegando en AWS..."
@@ -64,6 +49,14 @@ try {
     # Obtener ID de la aplicación de Discord
     $app_id = [System.Environment]::GetEnvironmentVariable('DISCORD_APPLICATION_ID', 'Process')
     
+    # Sincronizar los comandos con Discord; se omite si el hash del manifiesto ya se envió
+    if ($app_id) {
+        Write-Host "🔄 Sincronizando comandos..."
+        Push-Location ..
+        python register_commands.py
+        Pop-Location
+    }
+    
     # Generar el enlace completo por partes para evitar problemas de parseo
     $invite_part1 = "https://discord.com/api/oauth2/authorize?client_id="
     $invite_part2 = "permissions=0"
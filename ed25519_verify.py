@@ -0,0 +1,104 @@
+"""
+Lean Ed25519 signature verification for Discord interactions.
+
+``import nacl.signing`` goes through ``nacl.bindings``, whose __init__ imports
+every binding module (aead, box, pwhash, secretstream, kx...) and evaluates
+their ``lib.*_bytes()`` constants, although a bot only ever checks detached
+Ed25519 signatures. This module loads the compiled sodium FFI directly and
+resolves the single libsodium function it needs, so none of that runs during
+a cold start. Signing, key generation and the rest of PyNaCl stay available
+through ``nacl.signing`` for code that really needs them.
+"""
+import ctypes
+
+import nacl.exceptions
+from nacl import _sodium
+
+ffi = _sodium.ffi
+lib = _sodium.lib
+
+PUBLIC_KEY_BYTES = 32
+SIGNATURE_BYTES = 64
+
+
+def _sodium_init():
+    if lib.sodium_init() == -1:
+        raise nacl.exceptions.RuntimeError('Could not initialize sodium')
+
+
+def _load_verify_detached():
+    """
+    Return libsodium's crypto_sign_verify_detached, or None when it cannot be
+    reached. The compiled FFI does not declare it, but the statically linked
+    libsodium exports the symbol; its address is cast through the existing
+    ffi so no cdef has to be parsed at import time.
+    """
+    verify = getattr(lib, 'crypto_sign_verify_detached', None)
+    if verify is not None:
+        return verify
+
+    try:
+        handle = ctypes.CDLL(_sodium.__file__)
+        address = ctypes.cast(handle.crypto_sign_verify_detached, ctypes.c_void_p).value
+    except (AttributeError, OSError):
+        return None
+    return ffi.cast(
+        'int(*)(const unsigned char *, const unsigned char *, '
+        'unsigned long long, const unsigned char *)',
+        address,
+    )
+
+
+ffi.init_once(_sodium_init, 'libsodium')
+_verify_detached = _load_verify_detached()
+
+
+def _verify_combined(signature, message, public_key):
+    # Fallback through crypto_sign_open, which wants signature + message
+    signed = signature + bytes(message)
+    opened = ffi.new('unsigned char[]', len(signed))
+    opened_len = ffi.new('unsigned long long *')
+    return lib.crypto_sign_open(opened, opened_len, signed, len(signed), public_key) == 0
+
+
+class VerifyKey:
+    """
+    Ed25519 public key that checks detached signatures. Unlike
+    ``nacl.signing.VerifyKey.verify``, the signature and the message parts
+    are passed separately and nothing is copied out.
+    """
+
+    __slots__ = ('_key',)
+
+    def __init__(self, key):
+        if not isinstance(key, bytes) or len(key) != PUBLIC_KEY_BYTES:
+            raise nacl.exceptions.ValueError(
+                f'The key must be exactly {PUBLIC_KEY_BYTES} bytes long'
+            )
+        self._key = key
+
+    def __bytes__(self):
+        return self._key
+
+    def encode(self):
+        return self._key
+
+    def verify_detached(self, signature, *parts):
+        """
+        Check ``signature`` over the concatenation of ``parts``. Returns True
+        or raises BadSignatureError. A single part is passed to libsodium in
+        place; several parts are joined once.
+        """
+        if not isinstance(signature, bytes) or len(signature) != SIGNATURE_BYTES:
+            raise nacl.exceptions.BadSignatureError('Signature was forged or corrupt')
+
+        message = parts[0] if len(parts) == 1 else b''.join(parts)
+        if _verify_detached is not None:
+            if not isinstance(message, bytes):
+                message = ffi.from_buffer(message)
+            valid = _verify_detached(signature, message, len(message), self._key) == 0
+        else:
+            valid = _verify_combined(signature, message, self._key)
+        if not valid:
+            raise nacl.exceptions.BadSignatureError('Signature was forged or corrupt')
+        return True
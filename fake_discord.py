@@ -0,0 +1,213 @@
+"""
+Local HTTP stand-in for the Discord API.
+
+Runs a threaded HTTP server on 127.0.0.1 that records every request and
+answers with canned responses, so code that talks to Discord (follow-up
+webhooks, command registration) can be exercised without network access:
+
+    with FakeDiscord() as discord:
+        executor = followup.ThreadExecutor(api_base=discord.api_base)
+        ...
+        assert discord.requests[0].method == 'PATCH'
+
+It can also emulate Discord's rate limits: ``limit()`` declares a bucket
+for the paths under a prefix and ``global_limit()`` the limit shared by all
+requests. Responses carry the ``X-RateLimit-*`` headers and exhausted
+buckets answer 429 with ``retry_after``, like the real API.
+"""
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class RecordedRequest:
+    """
+    A request received by the stand-in.
+    """
+
+    __slots__ = ('method', 'path', 'headers', 'body')
+
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class _Bucket:
+    """
+    Fixed window of ``limit`` requests every ``per`` seconds.
+    """
+
+    def __init__(self, name, limit, per):
+        self.name = name
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self, now):
+        """
+        Take one request; return 0.0 or the seconds until the window resets.
+        """
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.per
+        if self.remaining == 0:
+            return self.reset_at - now
+        self.remaining -= 1
+        return 0.0
+
+    def headers(self, now):
+        return {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': f'{time.time() + self.reset_at - now:.3f}',
+            'X-RateLimit-Reset-After': f'{self.reset_at - now:.3f}',
+            'X-RateLimit-Bucket': self.name,
+        }
+
+
+class FakeDiscord:
+    """
+    Discord API stand-in. ``responses`` maps ``(method, path)`` to a
+    ``(status, payload)`` pair; anything else gets ``200 {}``.
+    """
+
+    def __init__(self, responses=None, latency=0.0):
+        self.responses = dict(responses or {})
+        # Seconds each response is delayed, like the round trip to Discord
+        self.latency = latency
+        self.requests = []
+        self.rate_limited = 0
+        # Requests being answered right now, and the most there ever were
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._limits = []
+        self._global = None
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def api_base(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/api/v10'
+
+    def respond(self, method, path, status=200, payload=None):
+        """
+        Set the response for ``method`` on ``path`` (relative to api_base).
+        """
+        self.responses[(method, path)] = (status, payload if payload is not None else {})
+
+    def limit(self, method, prefix, limit, per, bucket=None):
+        """
+        Allow ``limit`` requests every ``per`` seconds to the paths starting
+        with ``prefix``, all sharing one bucket.
+        """
+        name = bucket or f'{method}:{prefix}'
+        self._limits.append((method, prefix, _Bucket(name, limit, per)))
+
+    def global_limit(self, limit, per=1.0):
+        """
+        Allow ``limit`` requests every ``per`` seconds in total.
+        """
+        self._global = _Bucket('global', limit, per)
+
+    def handle(self, method, path, headers, body):
+        """
+        Record a request and return ``(status, headers, payload)``.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.requests.append(RecordedRequest(method, path, headers, body))
+            if self._global is not None:
+                wait = self._global.take(now)
+                if wait:
+                    self.rate_limited += 1
+                    return 429, {'X-RateLimit-Global': 'true', 'X-RateLimit-Scope': 'global',
+                                 'Retry-After': str(math.ceil(wait))}, {
+                        'message': 'You are being rate limited.',
+                        'retry_after': round(wait, 3),
+                        'global': True,
+                    }
+            response_headers = {}
+            for limit_method, prefix, bucket in self._limits:
+                if limit_method == method and path.startswith(prefix):
+                    wait = bucket.take(now)
+                    response_headers = bucket.headers(now)
+                    if wait:
+                        self.rate_limited += 1
+                        response_headers['X-RateLimit-Scope'] = 'user'
+                        response_headers['Retry-After'] = str(math.ceil(wait))
+                        return 429, response_headers, {
+                            'message': 'You are being rate limited.',
+                            'retry_after': round(wait, 3),
+                            'global': False,
+                        }
+                    break
+            status, payload = self.responses.get((method, path), (200, {}))
+        return status, response_headers, payload
+
+    def start(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like the real API
+            protocol_version = 'HTTP/1.1'
+
+            def _dispatch(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                path = self.path
+                if path.startswith('/api/v10'):
+                    path = path[len('/api/v10'):]
+                with stand_in._lock:
+                    stand_in.in_flight += 1
+                    stand_in.peak_in_flight = max(stand_in.peak_in_flight, stand_in.in_flight)
+                try:
+                    status, headers, payload = stand_in.handle(
+                        self.command, path, dict(self.headers), body
+                    )
+                    if stand_in.latency:
+                        time.sleep(stand_in.latency)
+                finally:
+                    with stand_in._lock:
+                        stand_in.in_flight -= 1
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        # Short poll interval: stop() returns right away
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
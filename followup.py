@@ -0,0 +1,126 @@
+"""
+Follow-up work for deferred commands.
+
+A deferred command is acknowledged with DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+inside Discord's 3 second window and its handler runs afterwards, editing the
+original response through the interaction webhook.
+
+Lambda freezes the container as soon as the handler returns, so there the
+work is handed to a second, asynchronous invocation of the same function
+(LambdaExecutor). Long-running processes use a thread pool (ThreadExecutor).
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import codec
+
+# Key of the asynchronous event that carries a follow-up to lambda_handler
+EVENT_KEY = 'terrabot_followup'
+
+FAILED_MESSAGE = {'content': 'No se pudo completar el comando.'}
+
+logger = logging.getLogger(__name__)
+
+
+def edit_original(application_id, token, message, api_base=None):
+    """
+    PATCH the original interaction response with ``message`` and return the
+    HTTP status code. Goes through the pooled, rate limit aware client of
+    rest_client.py, so a warm container reuses its connection to Discord.
+    """
+    # http.client, email and ssl take ~30 ms to import; only follow-ups need them
+    from rest_client import get_client
+
+    response = get_client(api_base).request(
+        'PATCH', f'/webhooks/{application_id}/{token}/messages/@original', json=message
+    )
+    if not response.ok:
+        logger.error(f"Follow-up edit failed with HTTP {response.status}: {response.body[:200]!r}")
+    return response.status
+
+
+def run(command, interaction, api_base=None):
+    """
+    Run a deferred command for an Interaction and deliver its message. The
+    handler returns the message payload (content, embeds, components...) to
+    put in the response.
+    """
+    try:
+        message = command.handler(interaction)
+    except Exception as e:
+        logger.error(f"Deferred command '{command.name}' failed: {e!r}")
+        message = FAILED_MESSAGE
+    return edit_original(
+        interaction.application_id, interaction.token, message, api_base
+    )
+
+
+class ThreadExecutor:
+    """
+    Runs follow-ups on a thread pool of the current process.
+    """
+
+    def __init__(self, max_workers=4, api_base=None):
+        self.api_base = api_base
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='followup'
+        )
+
+    def submit(self, command, interaction):
+        return self._pool.submit(run, command, interaction, self.api_base)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+class LambdaExecutor:
+    """
+    Hands follow-ups to an asynchronous invocation of a Lambda function,
+    by default the one currently running.
+    """
+
+    def __init__(self, function_name=None, client=None):
+        self.function_name = function_name or os.environ['AWS_LAMBDA_FUNCTION_NAME']
+        self._client = client
+
+    def submit(self, command, interaction):
+        if self._client is None:
+            # boto3 is slow to import; only deferred commands pay for it
+            import boto3
+            self._client = boto3.client('lambda')
+
+        payload = {EVENT_KEY: {'command': command.name, 'interaction': interaction.raw}}
+        return self._client.invoke(
+            FunctionName=self.function_name,
+            InvocationType='Event',
+            Payload=codec.dumps_bytes(payload),
+        )
+
+
+_executor = None
+
+
+def get_executor():
+    """
+    Return the executor of this process, created on first use.
+
+    FOLLOWUP_EXECUTOR=lambda|thread selects one explicitly; by default Lambda
+    uses LambdaExecutor and anything else a ThreadExecutor.
+    """
+    global _executor
+    if _executor is None:
+        kind = os.environ.get('FOLLOWUP_EXECUTOR')
+        if kind is None:
+            kind = 'lambda' if 'AWS_LAMBDA_FUNCTION_NAME' in os.environ else 'thread'
+        _executor = LambdaExecutor() if kind == 'lambda' else ThreadExecutor()
+    return _executor
+
+
+def set_executor(executor):
+    """
+    Replace the executor, e.g. with a ThreadExecutor pointing at a local
+    Discord stand-in.
+    """
+    global _executor
+    _executor = executor
@@ -0,0 +1,205 @@
+"""
+Parsed Discord interaction.
+
+Interaction wraps the decoded request body and gives handlers attribute
+access to the fields they use. Nested objects (data, options, member,
+resolved) are looked up the first time they are read and then kept, and
+missing ones resolve to shared empty values instead of a fresh ``{}`` per
+lookup. Request headers are lower-cased once, so callers never have to try
+two casings.
+"""
+from types import MappingProxyType
+
+# Interaction types
+PING = 1
+APPLICATION_COMMAND = 2
+MESSAGE_COMPONENT = 3
+APPLICATION_COMMAND_AUTOCOMPLETE = 4
+MODAL_SUBMIT = 5
+
+# Application command option types whose value is a snowflake in ``resolved``
+SUB_COMMAND = 1
+SUB_COMMAND_GROUP = 2
+USER = 6
+CHANNEL = 7
+ROLE = 8
+MENTIONABLE = 9
+ATTACHMENT = 11
+
+EMPTY = MappingProxyType({})
+
+_UNSET = object()
+
+
+def normalize_headers(headers):
+    """
+    Return ``headers`` with lower case names. API Gateway keeps the casing
+    sent by Discord while HTTP APIs and the container server lower-case it.
+    """
+    if not headers:
+        return EMPTY
+    return {name.lower(): value for name, value in headers.items()}
+
+
+def _flatten_options(options):
+    values = {}
+    for option in options:
+        if option.get('type') in (SUB_COMMAND, SUB_COMMAND_GROUP):
+            values[option['name']] = _flatten_options(option.get('options', ()))
+        else:
+            values[option['name']] = option.get('value')
+    return values
+
+
+class Resolved:
+    """
+    The users, members, roles, channels, messages and attachments an
+    interaction refers to, each a mapping from ID to object as sent by
+    Discord.
+    """
+
+    __slots__ = ('users', 'members', 'roles', 'channels', 'messages', 'attachments')
+
+    def __init__(self, resolved):
+        self.users = resolved.get('users', EMPTY)
+        self.members = resolved.get('members', EMPTY)
+        self.roles = resolved.get('roles', EMPTY)
+        self.channels = resolved.get('channels', EMPTY)
+        self.messages = resolved.get('messages', EMPTY)
+        self.attachments = resolved.get('attachments', EMPTY)
+
+    def lookup(self, option_type, snowflake):
+        """
+        Return the object an option of ``option_type`` points at, or None.
+        """
+        if option_type == USER:
+            return self.users.get(snowflake)
+        if option_type == CHANNEL:
+            return self.channels.get(snowflake)
+        if option_type == ROLE:
+            return self.roles.get(snowflake)
+        if option_type == ATTACHMENT:
+            return self.attachments.get(snowflake)
+        if option_type == MENTIONABLE:
+            return self.users.get(snowflake) or self.roles.get(snowflake)
+        return None
+
+
+EMPTY_RESOLVED = Resolved(EMPTY)
+
+
+class Interaction:
+    """
+    One interaction received from Discord. ``raw`` is the decoded body,
+    kept as is so it can be serialized again (e.g. for a follow-up), and
+    ``headers`` the request headers from normalize_headers.
+    """
+
+    __slots__ = (
+        'raw', 'headers', 'type', 'id', 'application_id', 'token',
+        '_data', '_options', '_index', '_member', '_resolved',
+    )
+
+    def __init__(self, raw, headers=EMPTY):
+        self.raw = raw
+        self.headers = headers
+        self.type = raw.get('type')
+        self.id = raw.get('id')
+        self.application_id = raw.get('application_id')
+        self.token = raw.get('token')
+        self._data = _UNSET
+        self._options = _UNSET
+        self._index = _UNSET
+        self._member = _UNSET
+        self._resolved = _UNSET
+
+    @property
+    def data(self):
+        if self._data is _UNSET:
+            self._data = self.raw.get('data') or EMPTY
+        return self._data
+
+    @property
+    def name(self):
+        """
+        Name of the invoked command.
+        """
+        return self.data.get('name')
+
+    @property
+    def custom_id(self):
+        """
+        custom_id of the component or modal that was used, '' otherwise.
+        """
+        return self.data.get('custom_id', '')
+
+    @property
+    def options(self):
+        """
+        Option values by name. A subcommand or group maps to the values of
+        its own options.
+        """
+        if self._options is _UNSET:
+            options = self.data.get('options')
+            self._options = _flatten_options(options) if options else EMPTY
+        return self._options
+
+    @property
+    def member(self):
+        """
+        Guild member that invoked the interaction, empty in DMs.
+        """
+        if self._member is _UNSET:
+            self._member = self.raw.get('member') or EMPTY
+        return self._member
+
+    @property
+    def user(self):
+        """
+        User that invoked the interaction, in a guild or in DMs.
+        """
+        return self.member.get('user') or self.raw.get('user') or EMPTY
+
+    @property
+    def resolved(self):
+        if self._resolved is _UNSET:
+            resolved = self.data.get('resolved')
+            self._resolved = Resolved(resolved) if resolved else EMPTY_RESOLVED
+        return self._resolved
+
+    def option(self, name, default=None):
+        """
+        Value of a top-level option, with users, roles, channels and
+        attachments replaced by their resolved objects.
+        """
+        if self._index is _UNSET:
+            self._index = {option['name']: option for option in self.data.get('options', ())}
+        option = self._index.get(name)
+        if option is None:
+            return default
+        value = option.get('value')
+        found = self.resolved.lookup(option.get('type'), value)
+        return value if found is None else found
+
+    def focused_option(self):
+        """
+        ``(name, value)`` of the option being typed in an autocomplete
+        interaction, looking inside subcommands, or ``(None, '')``.
+        """
+        options = self.data.get('options', ())
+        while options:
+            for option in options:
+                if option.get('focused'):
+                    return option['name'], option.get('value', '')
+            options = next(
+                (option.get('options', ()) for option in options
+                 if option.get('type') in (SUB_COMMAND, SUB_COMMAND_GROUP)),
+                (),
+            )
+        return None, ''
+
+    def header(self, name, default=''):
+        """
+        Value of a request header, ``name`` in lower case.
+        """
+        return self.headers.get(name, default)
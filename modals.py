@@ -0,0 +1,207 @@
+"""
+Modal forms and their submissions.
+
+A Modal is declared next to the command that opens it, with one Field per
+text input. Everything that does not depend on the request is prepared when
+the module is imported: the MODAL response the command returns, the
+compiled regular expressions and the converter of each field. A
+MODAL_SUBMIT interaction is then parsed in one pass into a dict of typed
+values, or rejected with every field error at once so the user can fix the
+form in a single round trip.
+"""
+import re
+
+from components import MAX_CUSTOM_ID
+from responses import ephemeral_message, json_response, modal as modal_payload
+
+# Text input styles
+SHORT = 1
+PARAGRAPH = 2
+
+ACTION_ROW = 1
+TEXT_INPUT = 4
+
+# Part of the custom_id before this separator names the modal; the rest is
+# free for state (e.g. 'reporte:1180000000000000000')
+SEPARATOR = ':'
+
+REGISTRY = {}
+
+
+class ValidationError(ValueError):
+    """
+    A submission broke one or more field rules. ``errors`` maps field
+    custom_ids to messages.
+    """
+
+    def __init__(self, errors):
+        super().__init__('; '.join(f'{name}: {message}' for name, message in errors.items()))
+        self.errors = errors
+
+    def response(self, modal):
+        lines = [f'**{modal.labels[name]}**: {message}' for name, message in self.errors.items()]
+        return json_response(ephemeral_message('Revisa el formulario:\n' + '\n'.join(lines)))
+
+
+class Field:
+    """
+    A text input and the rules its value must follow. ``type`` is str, int
+    or float; ``min_value``/``max_value`` apply to numbers and ``pattern``
+    to the raw text.
+    """
+
+    __slots__ = (
+        'custom_id', 'label', 'style', 'required', 'min_length', 'max_length',
+        'pattern', 'type', 'min_value', 'max_value', 'placeholder',
+    )
+
+    def __init__(self, custom_id, label, style=SHORT, required=True, min_length=None,
+                 max_length=None, pattern=None, type=str, min_value=None, max_value=None,
+                 placeholder=None):
+        if type not in (str, int, float):
+            raise ValueError(f"Field '{custom_id}' has unsupported type {type!r}")
+        self.custom_id = custom_id
+        self.label = label
+        self.style = style
+        self.required = required
+        self.min_length = min_length
+        self.max_length = max_length
+        self.pattern = re.compile(pattern) if pattern else None
+        self.type = type
+        self.min_value = min_value
+        self.max_value = max_value
+        self.placeholder = placeholder
+
+    def component(self):
+        """
+        The text input as sent to Discord. Length limits are enforced by the
+        client as well.
+        """
+        text_input = {
+            'type': TEXT_INPUT,
+            'custom_id': self.custom_id,
+            'label': self.label,
+            'style': self.style,
+            'required': self.required,
+        }
+        if self.min_length is not None:
+            text_input['min_length'] = self.min_length
+        if self.max_length is not None:
+            text_input['max_length'] = self.max_length
+        if self.placeholder:
+            text_input['placeholder'] = self.placeholder
+        return {'type': ACTION_ROW, 'components': [text_input]}
+
+    def convert(self, text):
+        """
+        Return the typed value of ``text`` or raise ValueError with the
+        message shown to the user.
+        """
+        if not text:
+            if self.required:
+                raise ValueError('es obligatorio')
+            return None
+        if self.min_length is not None and len(text) < self.min_length:
+            raise ValueError(f'debe tener al menos {self.min_length} caracteres')
+        if self.max_length is not None and len(text) > self.max_length:
+            raise ValueError(f'debe tener como máximo {self.max_length} caracteres')
+        if self.pattern is not None and not self.pattern.fullmatch(text):
+            raise ValueError('no tiene el formato esperado')
+        if self.type is str:
+            return text
+
+        try:
+            value = self.type(text.strip().replace(',', '.') if self.type is float else text)
+        except ValueError:
+            raise ValueError('debe ser un número') from None
+        if self.min_value is not None and value < self.min_value:
+            raise ValueError(f'debe ser como mínimo {self.min_value}')
+        if self.max_value is not None and value > self.max_value:
+            raise ValueError(f'debe ser como máximo {self.max_value}')
+        return value
+
+
+class Modal:
+    """
+    A form: its schema, the prebuilt response that opens it and the handler
+    of its submissions. The handler receives the Interaction, the dict of
+    typed values and the state passed to response() (or None) and returns
+    the Lambda response.
+    """
+
+    __slots__ = ('name', 'title', 'fields', 'handler', 'labels', '_fields', '_response')
+
+    def __init__(self, name, title, fields, handler):
+        self.name = name
+        self.title = title
+        self.fields = fields
+        self.handler = handler
+        self.labels = {field.custom_id: field.label for field in fields}
+        self._fields = {field.custom_id: field for field in fields}
+        self._response = json_response(
+            modal_payload(name, title, [field.component() for field in fields])
+        )
+
+    def response(self, state=None):
+        """
+        The MODAL reply that opens this form. ``state`` is appended to the
+        custom_id and comes back with the submission; ValueError when the
+        custom_id would go over Discord's 100 characters (keep long state
+        server side and pass a key, e.g. components.short_hash).
+        """
+        if state is None:
+            return self._response
+        custom_id = f'{self.name}{SEPARATOR}{state}'
+        if len(custom_id) > MAX_CUSTOM_ID:
+            raise ValueError(
+                f"custom_id for modal '{self.name}' is {len(custom_id)} characters, "
+                f"the limit is {MAX_CUSTOM_ID}"
+            )
+        return json_response(modal_payload(
+            custom_id, self.title,
+            [field.component() for field in self.fields],
+        ))
+
+    def parse(self, interaction):
+        """
+        Return the typed values of a submission by field custom_id, or raise
+        ValidationError listing every invalid field.
+        """
+        submitted = {}
+        for row in interaction.data.get('components', ()):
+            for text_input in row.get('components', ()):
+                submitted[text_input.get('custom_id')] = text_input.get('value') or ''
+
+        values = {}
+        errors = {}
+        for custom_id, field in self._fields.items():
+            try:
+                values[custom_id] = field.convert(submitted.get(custom_id, ''))
+            except ValueError as e:
+                errors[custom_id] = str(e)
+        if errors:
+            raise ValidationError(errors)
+        return values
+
+
+def modal(name, title, fields):
+    """
+    Register the decorated function as the submit handler of a new modal and
+    return the Modal, so the command that opens it can return
+    ``modal.response()``.
+    """
+    def decorator(handler):
+        if name in REGISTRY:
+            raise ValueError(f"Modal '{name}' is already registered")
+        REGISTRY[name] = Modal(name, title, fields, handler)
+        return REGISTRY[name]
+    return decorator
+
+
+def lookup(custom_id):
+    """
+    Return ``(modal, state)`` for a submitted custom_id; modal is None when
+    it is unknown and state None when the custom_id carries none.
+    """
+    name, _, state = custom_id.partition(SEPARATOR)
+    return REGISTRY.get(name), state or None
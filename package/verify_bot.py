@@ -1,71 +1,77 @@
 import os
-import json
 import logging
-import nacl.exceptions
-from nacl.signing import VerifyKey
+
+import codec
+from applications import event_path, get_applications
+from interaction import APPLICATION_COMMAND, PING, Interaction, normalize_headers
+from request_log import RequestLog
+from verification import verify_request
 
 # Set up logging
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 def lambda_handler(event, context):
     """
     AWS Lambda handler function with proper ED25519 signature verification.
     """
-    # Log detailed information for diagnostics
-    logging.info(f"Received event: {event}")
-    logging.info(f"Headers: {event.get('headers', {})}")
-    
+    return handle_event(event, RequestLog(logger))
+
+
+def handle_event(event, log):
+    """
+    Answer a Lambda event and write its log line.
+    """
+    response = handle_interaction(event, log)
+    log.mark('dispatch')
+    log.emit(response['statusCode'])
+    return response
+
+
+def handle_interaction(event, log):
+    """
+    Verify and answer one interaction, attaching diagnostics to ``log``.
+    The request path selects the application whose keys are checked.
+    """
+    application = get_applications().resolve(event_path(event))
+    log.add('app', application.name)
+
     # Get Discord headers for verification
-    headers = event.get('headers', {})
-    signature = headers.get('X-Signature-Ed25519', '')
-    timestamp = headers.get('X-Signature-Timestamp', '')
+    # Discord puede enviar headers en minúsculas o mayúsculas; se normalizan una vez
+    headers = normalize_headers(event.get('headers'))
     
-    # Get Discord public key from environment variables
-    verify_key = os.environ.get('DISCORD_PUBLIC_KEY', '')
+    # Full payloads are only rendered when DEBUG is enabled
+    log.add('headers', headers, logging.DEBUG)
     
     # Parse the request body
     try:
         body = event['body']
         
-        # Verify the signature if we're not in debug mode
-        # For verification ping, we need to validate the signature
-        try:
-            verify_key_bytes = bytes.fromhex(verify_key)
-            signature_bytes = bytes.fromhex(signature)
-            message = timestamp.encode() + body.encode()
-            
-            # Create the verify key from the public key
-            discord_verify_key = VerifyKey(verify_key_bytes)
-            
-            # Verify the signature
-            discord_verify_key.verify(message, signature_bytes)
-            logging.info("Signature verification successful")
-        except (nacl.exceptions.BadSignatureError, ValueError) as e:
-            logging.error(f"Signature verification failed: {e}")
-            return {
-                'statusCode': 401,
-                'body': json.dumps({'error': 'Invalid request signature'})
-            }
+        # Headers, size, signature and replay checks, shared with server.py
+        rejection = verify_request(headers, body, application, log)
+        if rejection is not None:
+            return rejection
         
         # Parse the body as JSON
-        body_json = json.loads(body)
+        interaction = Interaction(codec.loads(body), headers)
+        log.mark('parse')
+        log.add('type', interaction.type)
+        log.add('interaction', interaction.raw, logging.DEBUG)
         
         # Handle Discord PING (type 1)
-        if body_json.get('type') == 1:
-            logging.info("Received PING from Discord - responding with PONG")
+        if interaction.type == PING:
             return {
                 'statusCode': 200,
                 'headers': {
                     'Content-Type': 'application/json'
                 },
-                'body': json.dumps({'type': 1})  # PONG response
+                'body': codec.dumps({'type': 1})  # PONG response
             }
         
         # Handle application commands (type 2)
-        if body_json.get('type') == 2:
-            command_name = body_json.get('data', {}).get('name', '')
-            logging.info(f"Received command: {command_name}")
+        if interaction.type == APPLICATION_COMMAND:
+            command_name = interaction.name or ''
+            log.add('command', command_name)
             
             # Handle ping command
             if command_name == 'ping':
@@ -74,7 +80,7 @@ def lambda_handler(event, context):
                     'headers': {
                         'Content-Type': 'application/json'
                     },
-                    'body': json.dumps({
+                    'body': codec.dumps({
                         'type': 4,  # CHANNEL_MESSAGE_WITH_SOURCE
                         'data': {
                             'content': 'Pong! 🏓'
@@ -88,7 +94,7 @@ def lambda_handler(event, context):
                 'headers': {
                     'Content-Type': 'application/json'
                 },
-                'body': json.dumps({
+                'body': codec.dumps({
                     'type': 4,
                     'data': {
                         'content': f'Command received: {command_name}'
@@ -102,15 +108,15 @@ def lambda_handler(event, context):
             'headers': {
                 'Content-Type': 'application/json'
             },
-            'body': json.dumps({'message': 'Event processed successfully'})
+            'body': codec.dumps({'message': 'Event processed successfully'})
         }
         
     except Exception as e:
-        logging.error(f'Error processing event: {e}')
+        log.add('error', repr(e))
         return {
             'statusCode': 500,
             'headers': {
                 'Content-Type': 'application/json'
             },
-            'body': json.dumps({'error': str(e)})
+            'body': codec.dumps({'error': str(e)})
         }
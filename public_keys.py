@@ -0,0 +1,158 @@
+import os
+
+import nacl.exceptions
+
+from applications import get_applications
+# Lean verifier: loads the sodium FFI without the rest of nacl.bindings
+from ed25519_verify import VerifyKey
+
+# Applications without an explicit entry fall back to these keys
+DEFAULT_APP = None
+
+
+class KeyRegistry:
+    """
+    Container-scoped store of Discord public keys.
+
+    Every key is decoded and wrapped in a VerifyKey once and then reused by all
+    warm invocations. Several keys can be active at the same time for the same
+    application (old and new during a rotation) and keys can be scoped to an
+    application ID. The hit/miss counters show how often a key object was
+    reused versus built.
+    """
+
+    def __init__(self):
+        self._verify_keys = {}
+        self._apps = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """
+        Build a registry from DISCORD_PUBLIC_KEY and DISCORD_PUBLIC_KEYS.
+
+        DISCORD_PUBLIC_KEYS is a comma separated list where each entry is
+        either a hex key or ``application_id:hex key``.
+        """
+        environ = os.environ if environ is None else environ
+        registry = cls()
+
+        single_key = environ.get('DISCORD_PUBLIC_KEY', '').strip()
+        if single_key:
+            registry.add_key(single_key)
+
+        for entry in environ.get('DISCORD_PUBLIC_KEYS', '').split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            app_id, _, public_key = entry.rpartition(':')
+            registry.add_key(public_key, app_id or DEFAULT_APP)
+
+        return registry
+
+    def add_key(self, public_key, app_id=DEFAULT_APP):
+        """
+        Activate a hex encoded public key, keeping any key already active.
+        """
+        public_key = public_key.strip().lower()
+        self._get(public_key)
+        active = self._apps.get(app_id, ())
+        if public_key not in active:
+            self._apps[app_id] = active + (public_key,)
+
+    def remove_key(self, public_key, app_id=DEFAULT_APP):
+        """
+        Retire a key once the rotation is complete.
+        """
+        public_key = public_key.strip().lower()
+        active = tuple(k for k in self._apps.get(app_id, ()) if k != public_key)
+        if active:
+            self._apps[app_id] = active
+        else:
+            self._apps.pop(app_id, None)
+        if not any(public_key in keys for keys in self._apps.values()):
+            self._verify_keys.pop(public_key, None)
+
+    def active_keys(self, app_id=DEFAULT_APP):
+        """
+        Return the VerifyKey objects accepted for an application.
+        """
+        hex_keys = self._apps.get(app_id)
+        if hex_keys is None:
+            hex_keys = self._apps.get(DEFAULT_APP, ())
+        return tuple(self._get(public_key) for public_key in hex_keys)
+
+    def verify(self, signature, *message_parts, app_id=DEFAULT_APP):
+        """
+        Check a detached signature over ``message_parts`` (e.g. timestamp and
+        body) against every active key of an application.
+
+        Raises ValueError when no key is configured and BadSignatureError when
+        none of the active keys accepts the signature.
+        """
+        verify_keys = self.active_keys(app_id)
+        if not verify_keys:
+            raise ValueError('No Discord public key configured')
+
+        if len(message_parts) > 1 and len(verify_keys) > 1:
+            # Join once instead of once per key during a rotation
+            message_parts = (b''.join(message_parts),)
+
+        for verify_key in verify_keys:
+            try:
+                return verify_key.verify_detached(signature, *message_parts)
+            except nacl.exceptions.BadSignatureError:
+                continue
+
+        raise nacl.exceptions.BadSignatureError(
+            'Signature was forged or corrupt'
+        )
+
+    def stats(self):
+        """
+        Snapshot of the cache counters for logging or metrics.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'keys': len(self._verify_keys),
+            'applications': len(self._apps),
+        }
+
+    def _get(self, public_key):
+        verify_key = self._verify_keys.get(public_key)
+        if verify_key is not None:
+            self.hits += 1
+            return verify_key
+
+        self.misses += 1
+        verify_key = VerifyKey(bytes.fromhex(public_key))
+        self._verify_keys[public_key] = verify_key
+        return verify_key
+
+
+_registry = None
+
+
+def get_registry():
+    """
+    Return the registry of this container, loading it on first use with the
+    keys from the environment and those of every configured application.
+    """
+    global _registry
+    if _registry is None:
+        registry = KeyRegistry.from_env()
+        for application in get_applications():
+            for public_key in application.public_keys:
+                registry.add_key(public_key, application.id)
+        _registry = registry
+    return _registry
+
+
+def reset_registry():
+    """
+    Drop the cached registry so the next call reloads it from the environment.
+    """
+    global _registry
+    _registry = None
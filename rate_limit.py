@@ -0,0 +1,235 @@
+"""
+Token bucket rate limiting for commands.
+
+Each command declares its limits (``command(..., rate_limit=Limit(5, 60))``)
+and every limit keeps one bucket per user, guild or the whole bot,
+depending on its scope. A bucket holds up to ``burst`` tokens and refills
+at ``rate`` tokens every ``per`` seconds; a request takes one token or is
+answered right away with the time until the next one.
+
+Buckets live in memory, so a warm container answers from a dict. Limits
+declared with ``shared=True`` keep their bucket in the shared store
+(shared_store.py) instead, updated with conditional writes so the limit
+holds across containers. Without a configured store they stay in memory
+like the others. The in-memory buckets are guarded by a lock, which is
+never held while the store is called, so requests answered on parallel
+threads (server.py with a shared store) only wait on each other in memory.
+"""
+import logging
+import os
+import threading
+import time
+
+from shared_store import get_store
+
+USER = 'user'
+GUILD = 'guild'
+GLOBAL = 'global'
+
+# Buckets kept in memory before full ones are dropped
+MAX_BUCKETS = int(os.environ.get('RATE_LIMIT_MAX_BUCKETS', '10000'))
+
+# Conditional writes retried on conflicts before letting a request through
+SHARED_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class Limit:
+    """
+    ``rate`` requests every ``per`` seconds, with bursts of up to ``burst``
+    (``rate`` by default), counted per ``scope``.
+    """
+
+    __slots__ = ('rate', 'per', 'scope', 'burst', 'shared')
+
+    def __init__(self, rate, per, scope=USER, burst=None, shared=False):
+        if scope not in (USER, GUILD, GLOBAL):
+            raise ValueError(f"Unknown rate limit scope '{scope}'")
+        self.rate = rate
+        self.per = per
+        self.scope = scope
+        self.burst = burst or rate
+        self.shared = shared
+
+    def refill(self, tokens, elapsed):
+        return min(self.burst, tokens + elapsed * self.rate / self.per)
+
+    def wait(self, tokens):
+        """
+        Seconds until a bucket holding ``tokens`` has a whole token.
+        """
+        return (1 - tokens) * self.per / self.rate
+
+
+def bucket_key(limit, command_name, interaction):
+    if limit.scope == GLOBAL:
+        owner = '*'
+    elif limit.scope == GUILD:
+        # DMs have no guild: fall back to the user
+        owner = interaction.raw.get('guild_id') or interaction.user.get('id')
+    else:
+        owner = interaction.user.get('id')
+    # Applications sharing a deployment keep separate buckets
+    return f'rl:{interaction.application_id}:{command_name}:{limit.scope}:{owner}'
+
+
+class RateLimiter:
+    """
+    Takes tokens from the buckets of a command's limits.
+    """
+
+    def __init__(self, store=None, max_buckets=MAX_BUCKETS, clock=time.time):
+        self.store = store
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+        self.shared_failures = 0
+
+    def check(self, command, interaction):
+        """
+        Take a token from every bucket of ``command`` and return 0.0, or the
+        seconds to wait when one of them is empty. A rejected request takes
+        nothing: every bucket is checked before any token is taken.
+        """
+        now = self.clock()
+        local = []
+        shared = []
+        for limit in command.limits:
+            key = bucket_key(limit, command.name, interaction)
+            if limit.shared and self.store is not None:
+                shared.append((key, limit))
+            else:
+                local.append((key, limit))
+
+        with self._lock:
+            wait = self._local_wait(local, now)
+        if wait:
+            self.limited += 1
+            return wait
+
+        taken = []
+        for key, limit in shared:
+            wait = self._take_shared(key, limit, now)
+            if wait:
+                break
+            taken.append((key, limit))
+        else:
+            with self._lock:
+                # Checked again: another thread may have emptied a bucket
+                # while the store was called
+                wait = self._local_wait(local, now)
+                if not wait:
+                    for key, limit in local:
+                        self._buckets[key] = (self._peek_local(key, limit, now) - 1, now, limit)
+                    self.allowed += 1
+                    return 0.0
+
+        # Give back what the shared buckets lent this request
+        for key, limit in taken:
+            self._refund_shared(key, limit, now)
+        self.limited += 1
+        return wait
+
+    def _local_wait(self, local, now):
+        wait = 0.0
+        for key, limit in local:
+            tokens = self._peek_local(key, limit, now)
+            if tokens < 1:
+                wait = max(wait, limit.wait(tokens))
+        return wait
+
+    def _peek_local(self, key, limit, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._prune(now)
+            return limit.burst
+        return limit.refill(bucket[0], now - bucket[1])
+
+    def _take_shared(self, key, limit, now):
+        try:
+            for _ in range(SHARED_ATTEMPTS):
+                item = self.store.get(key)
+                if item is None:
+                    tokens, version = limit.burst, None
+                else:
+                    tokens = limit.refill(item['tokens'], now - item['updated'])
+                    version = item['version']
+                if tokens < 1:
+                    return limit.wait(tokens)
+                # The item can go once the bucket would be full again
+                expires = now + limit.burst * limit.per / limit.rate
+                item = {'tokens': tokens - 1, 'updated': now, 'expires': expires}
+                if self.store.put_if(key, item, version):
+                    return 0.0
+        except Exception as e:
+            logger.warning(f"Shared rate limit store failed for {key}: {e!r}")
+        # Contention or an unavailable store: let the request through
+        self.shared_failures += 1
+        return 0.0
+
+    def _refund_shared(self, key, limit, now):
+        try:
+            for _ in range(SHARED_ATTEMPTS):
+                item = self.store.get(key)
+                if item is None:
+                    # Expired meanwhile: the bucket is full anyway
+                    return
+                tokens = min(limit.burst, limit.refill(item['tokens'], now - item['updated']) + 1)
+                refunded = dict(item, tokens=tokens, updated=now)
+                if self.store.put_if(key, refunded, item['version']):
+                    return
+        except Exception as e:
+            logger.warning(f"Shared rate limit store failed for {key}: {e!r}")
+        # The token stays taken; the bucket refills on its own
+        self.shared_failures += 1
+
+    def _prune(self, now):
+        # Full buckets carry no information; drop them first
+        full = [
+            key for key, (tokens, updated, limit) in self._buckets.items()
+            if limit.refill(tokens, now - updated) >= limit.burst
+        ]
+        for key in full:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_buckets:
+            # Still too many: forget the least recently used half
+            oldest = sorted(self._buckets, key=lambda key: self._buckets[key][1])
+            for key in oldest[:len(oldest) // 2]:
+                del self._buckets[key]
+
+    def stats(self):
+        """
+        Snapshot of the counters for logging or metrics.
+        """
+        return {
+            'buckets': len(self._buckets),
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'shared_failures': self.shared_failures,
+        }
+
+
+_limiter = None
+
+
+def get_limiter():
+    """
+    Return the limiter of this container, created on first use.
+    """
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter(get_store())
+    return _limiter
+
+
+def set_limiter(limiter):
+    """
+    Replace the limiter, e.g. with one using a shared_store.LocalStore.
+    """
+    global _limiter
+    _limiter = limiter
@@ -1,8 +1,16 @@
+import argparse
+import asyncio
 import os
-import json
-import requests
+import sys
+import time
 from dotenv import load_dotenv
 
+import command_manifest
+import command_sync
+import commands as command_registry
+from applications import get_applications
+from rest_client import AsyncRestClient, RestClient
+
 # Cargar variables de entorno desde .env
 load_dotenv()
 
@@ -10,46 +18,136 @@ load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 APPLICATION_ID = os.getenv('DISCORD_APPLICATION_ID')
 
-# URL base para la API de Discord
-BASE_URL = f"https://discord.com/api/v10/applications/{APPLICATION_ID}/commands"
-
-# Headers para la autenticación
-headers = {
-    "Authorization": f"Bot {TOKEN}",
-    "Content-Type": "application/json"
-}
-
-# Definir los comandos que queremos registrar
-commands = [
-    {
-        "name": "hello",
-        "description": "Saludo del bot",
-        "type": 1
-    },
-    {
-        "name": "info",
-        "description": "Muestra información sobre el bot",
-        "type": 1
-    }
-]
-
-def register_commands():
-    """Registra los comandos en Discord"""
-    print(f"Registrando {len(commands)} comandos para la aplicación {APPLICATION_ID}...")
+# Los comandos se definen una sola vez en commands.py, junto a sus handlers;
+# DISCORD_APPLICATIONS puede limitar los que expone cada aplicación
+commands = command_registry.schemas(get_applications().by_id(APPLICATION_ID))
+
+# Lo último que se envió a cada destino queda en commands.manifest.json
+COMMANDS_HASH = command_manifest.content_hash(commands)
+
+def register_commands(guild_id=None, dry_run=False, force=False):
+    """Sincroniza los comandos con Discord: una lectura y, solo si hay cambios, una escritura"""
+    scope = f"el servidor {guild_id}" if guild_id else "todos los servidores"
+    manifest = command_manifest.refresh()
+    scope_key = command_manifest.scope(APPLICATION_ID, guild_id)
+    if not force and command_manifest.is_synced(manifest, scope_key, COMMANDS_HASH):
+        print(f"[OK] Los comandos de {scope} no han cambiado desde la última sincronización "
+              f"({COMMANDS_HASH[:12]}); no se contacta con Discord")
+        return True
+    print(f"Sincronizando {len(commands)} comandos de la aplicación {APPLICATION_ID} en {scope}...")
+    
+    client = RestClient(TOKEN)
+    try:
+        changes = command_sync.sync(client, APPLICATION_ID, commands, guild_id, dry_run)
+    except command_sync.SyncError as e:
+        print(f"[ERROR] {e}")
+        return False
+    finally:
+        client.close()
+    if not dry_run:
+        command_manifest.record_sync([scope_key], COMMANDS_HASH)
+    
+    if not changes:
+        print("[OK] Los comandos registrados ya coinciden; no se ha enviado nada")
+        return True
+    for line in command_sync.format_changes(changes):
+        print(line)
+    if dry_run:
+        print(f"[DRY-RUN] {len(changes)} comandos cambiarían; no se ha enviado nada")
+    else:
+        print(f"[OK] {len(changes)} comandos actualizados con una sola petición")
+    return True
+
+def _print_result(result):
+    """Muestra el resultado de un servidor en cuanto termina"""
+    if result.outcome == command_sync.FAILED:
+        print(f"[ERROR] {result.guild_id}: {result.error}")
+    elif result.outcome != command_sync.SKIPPED:
+        print(f"[{result.outcome.upper()}] {result.guild_id} ({len(result.changes)} cambios, {result.elapsed:.2f} s)")
+
+def _pending(guild_ids, manifest):
+    """Los servidores que ya tienen esta versión de los comandos no se consultan"""
+    pending = [guild_id for guild_id in guild_ids if not command_manifest.is_synced(
+        manifest, command_manifest.scope(APPLICATION_ID, guild_id), COMMANDS_HASH)]
+    if len(pending) < len(guild_ids):
+        print(f"{len(guild_ids) - len(pending)} servidores ya tienen estos comandos ({COMMANDS_HASH[:12]})")
+    return pending
+
+async def _register_guilds(guild_ids, all_guilds, concurrency, checkpoint, dry_run, manifest):
+    async with AsyncRestClient(TOKEN, pool_size=concurrency) as client:
+        if all_guilds:
+            guild_ids = await command_sync.fetch_guild_ids(client)
+        if manifest is not None:
+            guild_ids = _pending(guild_ids, manifest)
+        print(f"Sincronizando {len(commands)} comandos en {len(guild_ids)} servidores "
+              f"({concurrency} a la vez)...")
+        return await command_sync.sync_guilds(
+            client, APPLICATION_ID, commands, guild_ids, concurrency, checkpoint, dry_run,
+            progress=_print_result,
+        )
+
+def register_guilds(guild_ids=(), all_guilds=False, concurrency=8,
+                    checkpoint_path='.register_checkpoint.json', restart=False, dry_run=False,
+                    force=False):
+    """Sincroniza los comandos en muchos servidores en paralelo, reanudando desde el checkpoint"""
+    manifest = None if force else command_manifest.refresh()
+    checkpoint = command_sync.Checkpoint(
+        checkpoint_path, command_sync.fingerprint(APPLICATION_ID, commands)
+    )
+    if restart:
+        checkpoint.clear()
+    elif checkpoint.completed:
+        print(f"Reanudando: {len(checkpoint.completed)} servidores ya sincronizados")
+    
+    start = time.perf_counter()
+    results = asyncio.run(
+        _register_guilds(list(guild_ids), all_guilds, concurrency, checkpoint, dry_run, manifest)
+    )
+    elapsed = time.perf_counter() - start
     
-    # Registrar cada comando
-    for command in commands:
-        print(f"Registrando comando: {command['name']}")
-        response = requests.post(BASE_URL, headers=headers, json=command)
-        
-        if response.status_code == 200 or response.status_code == 201:
-            print(f"[OK] Comando '{command['name']}' registrado correctamente")
-        else:
-            print(f"[ERROR] Error al registrar el comando '{command['name']}': {response.status_code}")
-            print(response.text)
+    totals = {}
+    for result in results:
+        totals[result.outcome] = totals.get(result.outcome, 0) + 1
+    if not dry_run:
+        command_manifest.record_sync([
+            command_manifest.scope(APPLICATION_ID, result.guild_id) for result in results
+            if result.outcome != command_sync.FAILED
+        ], COMMANDS_HASH)
+    summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(totals.items()))
+    print(f"Terminado en {elapsed:.1f} s: {summary}")
+    failed = totals.get(command_sync.FAILED, 0)
+    if not failed and not dry_run:
+        # Todo sincronizado: la próxima ejecución empieza de cero
+        checkpoint.clear()
+    return not failed
+
+def _guild_ids(args):
+    guild_ids = [guild for guild in (args.guilds or '').split(',') if guild.strip()]
+    if args.guilds_file:
+        with open(args.guilds_file, encoding='utf-8') as f:
+            guild_ids.extend(line.strip() for line in f if line.strip())
+    return [guild.strip() for guild in guild_ids]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza los comandos de TerraBot con Discord")
+    parser.add_argument('--guild', help="registrar en un servidor concreto (los cambios son inmediatos)")
+    parser.add_argument('--dry-run', action='store_true', help="mostrar las diferencias sin aplicarlas")
+    parser.add_argument('--guilds', help="lista de servidores separados por comas, sincronizados en paralelo")
+    parser.add_argument('--guilds-file', help="fichero con un servidor por línea")
+    parser.add_argument('--all-guilds', action='store_true', help="todos los servidores en los que está el bot")
+    parser.add_argument('--concurrency', type=int, default=8, help="servidores sincronizados a la vez")
+    parser.add_argument('--checkpoint', default='.register_checkpoint.json',
+                        help="fichero de progreso para reanudar una ejecución interrumpida")
+    parser.add_argument('--restart', action='store_true', help="ignorar el checkpoint y empezar de cero")
+    parser.add_argument('--force', action='store_true',
+                        help="consultar Discord aunque el manifiesto indique que no hay cambios")
+    args = parser.parse_args()
+    
     if not TOKEN or not APPLICATION_ID:
         print("Error: Asegúrate de que DISCORD_TOKEN y DISCORD_APPLICATION_ID estén definidos en el archivo .env")
-    else:
-        register_commands()
+    elif args.guilds or args.guilds_file or args.all_guilds:
+        if not register_guilds(_guild_ids(args), args.all_guilds, args.concurrency,
+                               args.checkpoint, args.restart, args.dry_run, args.force):
+            sys.exit(1)
+    elif not register_commands(args.guild, args.dry_run, args.force):
+        sys.exit(1)
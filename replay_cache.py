@@ -0,0 +1,180 @@
+"""
+Replay protection for verified interactions.
+
+A captured request stays valid for as long as its timestamp is inside the
+skew window, so every accepted signature is remembered for that long and a
+second request with the same signature is turned away before dispatch.
+
+Entries live in a ring of time buckets: inserting and looking up are dict
+operations, and expiring a whole bucket happens when the ring wraps onto it.
+The number of entries is capped; past the cap the oldest bucket is dropped
+early. Optionally the cache sits in front of a store shared by every
+container (shared_store.py, or anything with ``add_if_absent(key, ttl)``),
+so a request replayed against another container is caught as well; the
+store is called outside the cache's lock, so threads answering requests in
+parallel (server.py with a shared store) do not wait on each other. If the
+store fails, the request is let through when ``fail_open`` is set (the
+default: this container's own cache still applies) and turned away
+otherwise; either way the failure is counted in ``shared_failures``.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+from shared_store import get_store
+from validation import MAX_SKEW
+
+# Signatures are remembered for the whole window a timestamp is accepted in
+TTL = 2 * MAX_SKEW
+
+# Hard cap on remembered signatures (~160 bytes each with the dict slot)
+MAX_ENTRIES = int(os.environ.get('REPLAY_CACHE_MAX_ENTRIES', '50000'))
+
+# Whether a request is accepted when the shared store cannot be reached
+FAIL_OPEN = os.environ.get('REPLAY_STORE_FAIL_OPEN', '1') != '0'
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayCache:
+    """
+    Bounded TTL set of request signatures.
+    """
+
+    def __init__(self, ttl=TTL, buckets=16, max_entries=MAX_ENTRIES, store=None,
+                 fail_open=FAIL_OPEN, clock=time.time):
+        self.ttl = ttl
+        self.width = ttl / buckets
+        self.max_entries = max_entries
+        self.store = store
+        self.fail_open = fail_open
+        self.clock = clock
+        self._seen = {}
+        self._ring = [[] for _ in range(buckets)]
+        self._slots = [None] * buckets
+        self._oldest = None
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.duplicates = 0
+        self.shared_duplicates = 0
+        self.shared_failures = 0
+        self.evicted = 0
+
+    def first_seen(self, key):
+        """
+        Record ``key`` (the signature bytes) and return True, or return
+        False if it was already seen within the TTL here or, with a shared
+        store, in any container.
+        """
+        with self._lock:
+            self.lookups += 1
+            slot = int(self.clock() // self.width)
+            self._expire(slot)
+
+            if key in self._seen:
+                self.duplicates += 1
+                return False
+
+            if len(self._seen) >= self.max_entries:
+                self._evict_oldest()
+            self._seen[key] = slot
+            self._bucket(slot).append(key)
+
+        if self.store is not None:
+            # Store keys are strings (DynamoDB rejects bytes)
+            shared_key = f'replay:{key.hex()}'
+            try:
+                added = self.store.add_if_absent(shared_key, self.ttl)
+            except Exception as e:
+                logger.warning(f"Shared replay store failed for {shared_key}: {e!r}")
+                self.shared_failures += 1
+                return self.fail_open
+            if not added:
+                self.shared_duplicates += 1
+                return False
+        return True
+
+    def _bucket(self, slot):
+        index = slot % len(self._ring)
+        if self._slots[index] != slot:
+            # The ring wrapped onto a bucket left over from an older slot
+            self._drop(index)
+            self._slots[index] = slot
+            if self._oldest is None:
+                self._oldest = slot
+        return self._ring[index]
+
+    def _expire(self, slot):
+        # Nothing to do until the oldest bucket falls out of the window; after
+        # a long idle period this is one sweep over the ring
+        horizon = slot - len(self._ring)
+        if self._oldest is None or self._oldest > horizon:
+            return
+        for index, bucket_slot in enumerate(self._slots):
+            if bucket_slot is not None and bucket_slot <= horizon:
+                self._drop(index)
+        live = [s for s in self._slots if s is not None]
+        self._oldest = min(live) if live else None
+
+    def _evict_oldest(self):
+        live = [(s, i) for i, s in enumerate(self._slots) if s is not None and self._ring[i]]
+        if live:
+            _, index = min(live)
+            self.evicted += len(self._ring[index])
+            self._drop(index)
+
+    def _drop(self, index):
+        seen = self._seen
+        for key in self._ring[index]:
+            seen.pop(key, None)
+        self._ring[index] = []
+        self._slots[index] = None
+
+    def memory_bytes(self):
+        """
+        Approximate memory held by the cache, keys included.
+        """
+        size = sys.getsizeof(self._seen) + sys.getsizeof(self._ring)
+        size += sum(sys.getsizeof(bucket) for bucket in self._ring)
+        size += sum(sys.getsizeof(key) for key in self._seen)
+        return size
+
+    def stats(self):
+        """
+        Snapshot of the counters for logging or metrics.
+        """
+        duplicates = self.duplicates + self.shared_duplicates
+        return {
+            'entries': len(self._seen),
+            'lookups': self.lookups,
+            'duplicates': duplicates,
+            'shared_duplicates': self.shared_duplicates,
+            'shared_failures': self.shared_failures,
+            'hit_rate': duplicates / self.lookups if self.lookups else 0.0,
+            'evicted': self.evicted,
+            'memory_bytes': self.memory_bytes(),
+        }
+
+
+_cache = None
+
+
+def get_cache():
+    """
+    Return the replay cache of this container, created on first use and
+    backed by the shared store when one is configured.
+    """
+    global _cache
+    if _cache is None:
+        _cache = ReplayCache(store=get_store())
+    return _cache
+
+
+def set_cache(cache):
+    """
+    Replace the cache, e.g. with one in front of a shared_store.LocalStore.
+    """
+    global _cache
+    _cache = cache
@@ -0,0 +1,120 @@
+"""
+One structured log line per interaction.
+
+Handlers attach fields to a RequestLog as they go; values are stored by
+reference and only rendered when the line is emitted and its level is
+enabled. Fields attached at DEBUG (the raw event, headers, parsed body) cost
+nothing at the default INFO level. Secrets are redacted and every field is
+capped so a large interaction cannot blow up the log.
+"""
+import json
+import logging
+import os
+import time
+
+# Keys whose values never reach the logs (compared in lower case)
+REDACTED_KEYS = frozenset((
+    'x-signature-ed25519',
+    'authorization',
+    'token',
+    'discord_token',
+))
+REDACTED = '[redacted]'
+
+# Maximum rendered size of one field, in characters
+FIELD_LIMIT = int(os.environ.get('LOG_FIELD_LIMIT', '512'))
+
+
+def _redact(value):
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if str(key).lower() in REDACTED_KEYS else _redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_redact(item) for item in value]
+    return value
+
+
+def _render(value, limit):
+    if callable(value):
+        value = value()
+    value = _redact(value)
+    if isinstance(value, str):
+        text = value
+    else:
+        text = json.dumps(value, separators=(',', ':'), default=str)
+    if len(text) <= limit:
+        return value
+    return f'{text[:limit]}...(+{len(text) - limit} chars)'
+
+
+class RequestLog:
+    """
+    Accumulates the fields of one request and emits them as a compact JSON
+    line through ``logger``.
+    """
+
+    __slots__ = ('logger', 'field_limit', 'stages', '_fields', '_start', '_last')
+
+    def __init__(self, logger=None, field_limit=FIELD_LIMIT):
+        self.logger = logger or logging.getLogger()
+        self.field_limit = field_limit
+        self.stages = {}
+        self._fields = []
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        """
+        Record the time spent since the previous mark (or the start of the
+        request) under ``stage``, in seconds.
+        """
+        now = time.perf_counter()
+        self.stages[stage] = now - self._last
+        self._last = now
+
+    def add(self, key, value, level=logging.INFO):
+        """
+        Attach a field. Nothing is formatted until emit(), and fields whose
+        level is disabled are never formatted at all. A callable value is
+        only called when its field is rendered.
+        """
+        self._fields.append((key, value, level))
+
+    def emit(self, status_code, level=None):
+        """
+        Write the line for this request. The level defaults to ERROR for 5xx,
+        WARNING for 4xx and INFO otherwise.
+        """
+        if level is None:
+            if status_code >= 500:
+                level = logging.ERROR
+            elif status_code >= 400:
+                level = logging.WARNING
+            else:
+                level = logging.INFO
+
+        logger = self.logger
+        if not logger.isEnabledFor(level):
+            return None
+
+        record = {
+            'status': status_code,
+            'duration_ms': round((time.perf_counter() - self._start) * 1000, 3),
+        }
+        if self.stages:
+            record['stages_ms'] = {
+                stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()
+            }
+        limit = self.field_limit
+        for key, value, field_level in self._fields:
+            if not logger.isEnabledFor(field_level):
+                continue
+            if key.lower() in REDACTED_KEYS:
+                record[key] = REDACTED
+            else:
+                record[key] = _render(value, limit)
+
+        line = json.dumps(record, separators=(',', ':'), default=str)
+        logger.log(level, line)
+        return line
@@ -0,0 +1,141 @@
+"""
+Lambda proxy responses for Discord interactions.
+
+Replies that never change are serialized once, when the module that declares
+them is imported, and every request returns the same ready-made envelope.
+Replies that only differ in a few strings are compiled into a
+ResponseTemplate, which keeps the serialized JSON around the gaps and only
+escapes the values on each request.
+"""
+import re
+from json.encoder import encode_basestring
+
+import codec
+
+# Discord interaction response types
+PONG = 1
+CHANNEL_MESSAGE_WITH_SOURCE = 4
+UPDATE_MESSAGE = 7
+APPLICATION_COMMAND_AUTOCOMPLETE_RESULT = 8
+MODAL = 9
+
+# Message flag that shows a reply only to the user who triggered it
+EPHEMERAL = 1 << 6
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# A placeholder is {name} inside a JSON string. Object literals always contain
+# quotes or are empty, so they never match.
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+def envelope(body, status_code=200):
+    """
+    Wrap an already serialized body in the API Gateway proxy response.
+    """
+    return {
+        'statusCode': status_code,
+        'headers': JSON_HEADERS,
+        'body': body
+    }
+
+
+def json_response(payload, status_code=200):
+    """
+    Serialize ``payload`` into a response envelope.
+
+    Static replies call this at import time and return the same envelope for
+    every request, so it must not be modified by the caller.
+    """
+    return envelope(codec.dumps(payload), status_code)
+
+
+def channel_message(content):
+    """
+    Payload of a CHANNEL_MESSAGE_WITH_SOURCE reply.
+    """
+    return {
+        'type': CHANNEL_MESSAGE_WITH_SOURCE,
+        'data': {
+            'content': content
+        }
+    }
+
+
+def ephemeral_message(content):
+    """
+    Payload of a CHANNEL_MESSAGE_WITH_SOURCE reply only its user can see.
+    """
+    return {
+        'type': CHANNEL_MESSAGE_WITH_SOURCE,
+        'data': {
+            'content': content,
+            'flags': EPHEMERAL
+        }
+    }
+
+
+def update_message(data):
+    """
+    Payload of an UPDATE_MESSAGE reply, which edits the message a component
+    is attached to (e.g. to show the next page).
+    """
+    return {
+        'type': UPDATE_MESSAGE,
+        'data': data
+    }
+
+
+def autocomplete_result(choices):
+    """
+    Payload of an APPLICATION_COMMAND_AUTOCOMPLETE_RESULT reply.
+    """
+    return {
+        'type': APPLICATION_COMMAND_AUTOCOMPLETE_RESULT,
+        'data': {
+            'choices': choices
+        }
+    }
+
+
+def modal(custom_id, title, components):
+    """
+    Payload of a MODAL reply, which opens a form.
+    """
+    return {
+        'type': MODAL,
+        'data': {
+            'custom_id': custom_id,
+            'title': title,
+            'components': components
+        }
+    }
+
+
+class ResponseTemplate:
+    """
+    A response serialized once with named {placeholders} in its strings.
+
+    render() escapes each value and splices it between the pre-serialized
+    fragments, which is much cheaper than rebuilding and dumping the payload.
+    """
+
+    __slots__ = ('status_code', '_fragments', '_fields')
+
+    def __init__(self, payload, status_code=200):
+        parts = _PLACEHOLDER.split(codec.dumps(payload))
+        self.status_code = status_code
+        self._fragments = parts[::2]
+        self._fields = parts[1::2]
+
+    def render(self, **values):
+        """
+        Return the envelope with every placeholder replaced by its value.
+        """
+        fragments = self._fragments
+        pieces = [fragments[0]]
+        for index, field in enumerate(self._fields, 1):
+            # Same escaping as the codec (UTF-8, no \u escapes), minus quotes
+            pieces.append(encode_basestring(str(values[field]))[1:-1])
+            pieces.append(fragments[index])
+        return envelope(''.join(pieces), self.status_code)
@@ -0,0 +1,519 @@
+"""
+Client for the Discord REST API.
+
+Every request goes through one client per API base (get_client), which
+keeps:
+
+- a pool of persistent HTTP/1.1 connections, so only the first request to
+  Discord pays for the TCP and TLS handshakes;
+- the rate limit buckets Discord reports in the ``X-RateLimit-*`` headers.
+  Requests to a route whose bucket is empty wait for its reset instead of
+  collecting a 429;
+- a pace below Discord's global limit of 50 requests per second. If a
+  global 429 comes anyway, every request waits out its ``retry_after``.
+
+429 responses are retried after the time Discord asks for; 5xx responses
+and connection errors with jittered exponential backoff. RestClient blocks
+the calling thread. AsyncRestClient has the same interface for asyncio
+code: it waits with asyncio.sleep and sends on a thread pool over the same
+connections.
+
+Only the standard library is used, so the client fits in the Lambda
+package. fake_discord.FakeDiscord can emulate buckets and the global limit
+locally.
+"""
+import http.client
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import codec
+
+API_BASE = os.environ.get('DISCORD_API_BASE', 'https://discord.com/api/v10')
+USER_AGENT = 'DiscordBot (https://github.com/aleadalia/terrabot_v2, 2.0)'
+
+# Attempts per request, counting the first one
+MAX_ATTEMPTS = 5
+
+# Backoff after a 5xx or a connection error: up to BASE * 2 ** attempt seconds
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Path segments whose IDs get their own buckets ("major parameters")
+MAJOR_PARAMETERS = ('channels', 'guilds', 'webhooks')
+
+# Seconds between sweeps of buckets whose window has ended
+SWEEP_INTERVAL = 60.0
+
+# Requests per second the client allows itself across all routes, with
+# bursts of GLOBAL_BURST: no one second window goes over Discord's 50
+GLOBAL_RATE = 45.0
+GLOBAL_BURST = 5
+
+# Poll interval of requests waiting for the first response of a route
+PROBE_WAIT = 0.05
+
+# Reset assumed for a bucket's new window until a response reports it;
+# requests that find it empty meanwhile poll every PROBE_WAIT
+PENDING_RESET = 5.0
+
+# Errors of a reused keep-alive connection the server already closed
+STALE_CONNECTION = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+_UNKNOWN = object()
+
+logger = logging.getLogger(__name__)
+
+
+def _segments(path):
+    return path.split('?', 1)[0].strip('/').split('/')
+
+
+def _is_webhook_token(parts, i):
+    return i >= 2 and parts[i - 2] == 'webhooks'
+
+
+def route_key(method, path):
+    """
+    Rate limit route of a request: the path with minor IDs replaced, so
+    ``PATCH /channels/1/messages/2`` and ``.../messages/3`` share a bucket
+    but other channels do not. Webhook tokens, one per interaction, become
+    ``:token`` so the routes of an application stay few.
+    """
+    parts = _segments(path)
+    for i, part in enumerate(parts):
+        if _is_webhook_token(parts, i):
+            parts[i] = ':token'
+        elif part.isdigit() and (i == 0 or parts[i - 1] not in MAJOR_PARAMETERS):
+            parts[i] = ':id'
+    return f"{method} /{'/'.join(parts)}"
+
+
+def major_parameters(path):
+    """
+    The major parameters of a request (channel, guild, webhook ID and
+    token): requests to routes of one bucket hash share a bucket only when
+    these match.
+    """
+    parts = _segments(path)
+    return '/'.join(
+        part for i, part in enumerate(parts)
+        if (i and parts[i - 1] in MAJOR_PARAMETERS) or _is_webhook_token(parts, i)
+    )
+
+
+def backoff(attempt):
+    """
+    Jittered delay before retry number ``attempt`` (0 based).
+    """
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class Response:
+    """
+    Final response to a request.
+    """
+
+    __slots__ = ('status', 'headers', 'body')
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        return codec.loads(self.body) if self.body else None
+
+
+class ConnectionPool:
+    """
+    Persistent connections to one host, handed out most recently used first.
+    Safe to share between threads.
+    """
+
+    def __init__(self, api_base, size=10, timeout=10):
+        parts = urllib.parse.urlsplit(api_base)
+        self.https = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop(), True
+            self.created += 1
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout), False
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+
+    def _release(self, connection):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def send(self, method, path, body=None, headers=None):
+        """
+        Send one request and return ``(status, headers, body)``. A reused
+        connection the server has closed is replaced once.
+        """
+        while True:
+            connection, reused = self._acquire()
+            try:
+                connection.request(method, self.prefix + path, body=body, headers=headers or {})
+                response = connection.getresponse()
+                data = response.read()
+            except STALE_CONNECTION:
+                connection.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+            return response.status, response.headers, data
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class RouteBuckets:
+    """
+    Rate limit state learnt from Discord's responses: route -> bucket hash
+    (``X-RateLimit-Bucket``) and bucket (hash and major parameters) ->
+    remaining requests, reset time, limit and whether the reset time is
+    still a guess, plus the end of the current global limit. Buckets whose
+    window ended are dropped every SWEEP_INTERVAL seconds, so the buckets
+    of expired interaction tokens do not pile up.
+
+    Until the first response to a route arrives only one request to it is
+    let through, so a burst does not run into a bucket it does not know
+    about yet. All routes together are also paced at ``global_rate``
+    requests per second (None: only after a global 429).
+    """
+
+    def __init__(self, global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST):
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self._global_tokens = global_burst
+        self._global_updated = None
+        self._routes = {}
+        self._buckets = {}
+        self._probing = set()
+        self._global_until = 0.0
+        self._next_sweep = None
+        self._lock = threading.Lock()
+        self.delayed = 0
+        self.rate_limited = 0
+        self.global_limited = 0
+
+    def acquire(self, route, now, major=''):
+        """
+        Take one request from the bucket of ``route`` (with the major
+        parameters ``major``) and return 0.0, or the seconds to wait before
+        trying again.
+        """
+        with self._lock:
+            if self._global_until > now:
+                self.delayed += 1
+                return self._global_until - now
+            if self.global_rate:
+                if self._global_updated is not None:
+                    self._global_tokens = min(
+                        self.global_burst,
+                        self._global_tokens + (now - self._global_updated) * self.global_rate,
+                    )
+                self._global_updated = now
+                if self._global_tokens < 1:
+                    self.delayed += 1
+                    return (1 - self._global_tokens) / self.global_rate
+            wait = self._acquire_route(route, now, major)
+            if wait:
+                self.delayed += 1
+            elif self.global_rate:
+                self._global_tokens -= 1
+            return wait
+
+    def _acquire_route(self, route, now, major):
+        bucket_hash = self._routes.get(route, _UNKNOWN)
+        if bucket_hash is _UNKNOWN:
+            if route in self._probing:
+                return PROBE_WAIT
+            self._probing.add(route)
+            return 0.0
+        key = f'{bucket_hash}:{major}' if bucket_hash is not None else None
+        bucket = self._buckets.get(key) if key is not None else None
+        if bucket is None:
+            return 0.0
+        if bucket[1] <= now:
+            # New window; its reset time comes with the next response
+            self._buckets[key] = [bucket[2] - 1, now + PENDING_RESET, bucket[2], True]
+            return 0.0
+        if bucket[0] > 0:
+            bucket[0] -= 1
+            return 0.0
+        return PROBE_WAIT if bucket[3] else bucket[1] - now
+
+    def release(self, route):
+        """
+        Let another request probe ``route`` after one failed without a
+        response.
+        """
+        with self._lock:
+            self._probing.discard(route)
+
+    def update(self, route, headers, now, major=''):
+        """
+        Record the bucket state sent with a response.
+        """
+        bucket_hash = headers.get('X-RateLimit-Bucket')
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+        with self._lock:
+            self._probing.discard(route)
+            self._sweep(now)
+            if remaining is None or reset_after is None:
+                # Routes that never report a bucket are not limited
+                self._routes.setdefault(route, bucket_hash)
+                return
+            bucket_hash = bucket_hash or route
+            self._routes[route] = bucket_hash
+            key = f'{bucket_hash}:{major}'
+            remaining = int(remaining)
+            limit = int(headers.get('X-RateLimit-Limit') or remaining + 1)
+            bucket = self._buckets.get(key)
+            if bucket is not None and bucket[1] > now:
+                # Requests still in flight already took their tokens
+                remaining = min(remaining, bucket[0])
+            self._buckets[key] = [remaining, now + float(reset_after), limit, False]
+
+    def limited(self, route, headers, payload, now, major=''):
+        """
+        Record a 429 and return the seconds to wait before retrying.
+        """
+        payload = payload if isinstance(payload, dict) else {}
+        retry_after = payload.get('retry_after') or headers.get('Retry-After') or 1
+        retry_after = float(retry_after)
+        is_global = payload.get('global') or headers.get('X-RateLimit-Global') == 'true'
+        with self._lock:
+            self.rate_limited += 1
+            if is_global:
+                self.global_limited += 1
+                self._global_until = max(self._global_until, now + retry_after)
+            else:
+                bucket_hash = self._routes.get(route) or route
+                self._routes[route] = bucket_hash
+                key = f'{bucket_hash}:{major}'
+                limit = self._buckets[key][2] if key in self._buckets else 1
+                self._buckets[key] = [0, now + retry_after, limit, False]
+        return retry_after
+
+    def _sweep(self, now):
+        if self._next_sweep is None:
+            self._next_sweep = now + SWEEP_INTERVAL
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + SWEEP_INTERVAL
+        # An ended window holds nothing a new one would not learn again
+        ended = [key for key, bucket in self._buckets.items() if bucket[1] <= now]
+        for key in ended:
+            del self._buckets[key]
+
+    def stats(self):
+        return {
+            'routes': len(self._routes),
+            'buckets': len(self._buckets),
+            'delayed': self.delayed,
+            'rate_limited': self.rate_limited,
+            'global_limited': self.global_limited,
+        }
+
+
+class RestClient:
+    """
+    Blocking Discord REST client. ``token`` is the bot token sent as
+    ``Authorization: Bot ...`` (None: no header, e.g. for interaction
+    webhooks).
+    """
+
+    def __init__(self, token=None, api_base=None, pool_size=10, timeout=10,
+                 max_attempts=MAX_ATTEMPTS, clock=time.monotonic):
+        self.api_base = api_base or API_BASE
+        self.pool = ConnectionPool(self.api_base, pool_size, timeout)
+        self.buckets = RouteBuckets()
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._headers = {'User-Agent': USER_AGENT}
+        if token:
+            self._headers['Authorization'] = f'Bot {token}'
+        self.retries = 0
+
+    def _prepare(self, json, headers):
+        body = codec.dumps_bytes(json) if json is not None else None
+        request_headers = dict(self._headers)
+        if body is not None:
+            request_headers['Content-Type'] = 'application/json'
+        if headers:
+            request_headers.update(headers)
+        return body, request_headers
+
+    def _retry_delay(self, route, major, status, headers, body, attempt):
+        """
+        Record a response and return the seconds to wait before retrying
+        it, or None when it is final.
+        """
+        now = self.clock()
+        self.buckets.update(route, headers, now, major)
+        if attempt + 1 >= self.max_attempts:
+            return None
+        if status == 429:
+            try:
+                payload = codec.loads(body) if body else None
+            except ValueError:
+                payload = None
+            # A little jitter so waiting requests do not all retry at once
+            retry_after = self.buckets.limited(route, headers, payload, now, major)
+            return retry_after + random.uniform(0, 0.1)
+        if status >= 500:
+            return backoff(attempt)
+        return None
+
+    def request(self, method, path, json=None, headers=None):
+        """
+        Send a request to ``path`` (relative to the API base) with an
+        optional JSON body and return the final Response. Connection errors
+        are raised once the attempts run out.
+        """
+        route, major = route_key(method, path), major_parameters(path)
+        body, request_headers = self._prepare(json, headers)
+        for attempt in range(self.max_attempts):
+            wait = self.buckets.acquire(route, self.clock(), major)
+            while wait > 0:
+                time.sleep(wait)
+                wait = self.buckets.acquire(route, self.clock(), major)
+            try:
+                status, response_headers, data = self.pool.send(
+                    method, path, body, request_headers
+                )
+            except (OSError, http.client.HTTPException) as e:
+                self.buckets.release(route)
+                if attempt + 1 >= self.max_attempts:
+                    raise
+                logger.warning(f"{route} failed: {e!r}, retrying")
+                self.retries += 1
+                time.sleep(backoff(attempt))
+                continue
+            delay = self._retry_delay(route, major, status, response_headers, data, attempt)
+            if delay is None:
+                return Response(status, response_headers, data)
+            logger.info(f"{route} answered {status}, retrying in {delay:.2f} s")
+            self.retries += 1
+            time.sleep(delay)
+
+    def close(self):
+        self.pool.close()
+
+    def stats(self):
+        """
+        Snapshot of the counters for logging or metrics.
+        """
+        return {
+            'connections_created': self.pool.created,
+            'connections_reused': self.pool.reused,
+            'retries': self.retries,
+            **self.buckets.stats(),
+        }
+
+
+class AsyncRestClient(RestClient):
+    """
+    RestClient for asyncio code. Waits do not block the event loop and
+    requests run on a thread pool as large as the connection pool, so up to
+    ``pool_size`` of them are in flight at once.
+    """
+
+    def __init__(self, token=None, api_base=None, pool_size=10, timeout=10,
+                 max_attempts=MAX_ATTEMPTS, clock=time.monotonic):
+        super().__init__(token, api_base, pool_size, timeout, max_attempts, clock)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='rest')
+
+    async def request(self, method, path, json=None, headers=None):
+        # asyncio is slow to import; the blocking client does not need it
+        import asyncio
+        route, major = route_key(method, path), major_parameters(path)
+        body, request_headers = self._prepare(json, headers)
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_attempts):
+            wait = self.buckets.acquire(route, self.clock(), major)
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = self.buckets.acquire(route, self.clock(), major)
+            try:
+                status, response_headers, data = await loop.run_in_executor(
+                    self._executor, self.pool.send, method, path, body, request_headers
+                )
+            except (OSError, http.client.HTTPException) as e:
+                self.buckets.release(route)
+                if attempt + 1 >= self.max_attempts:
+                    raise
+                logger.warning(f"{route} failed: {e!r}, retrying")
+                self.retries += 1
+                await asyncio.sleep(backoff(attempt))
+                continue
+            delay = self._retry_delay(route, major, status, response_headers, data, attempt)
+            if delay is None:
+                return Response(status, response_headers, data)
+            logger.info(f"{route} answered {status}, retrying in {delay:.2f} s")
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        super().close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+_clients = {}
+
+
+def get_client(api_base=None):
+    """
+    Return the RestClient of this process for ``api_base``, created on
+    first use with the token in DISCORD_TOKEN.
+    """
+    api_base = api_base or API_BASE
+    client = _clients.get(api_base)
+    if client is None:
+        client = _clients.setdefault(
+            api_base, RestClient(os.environ.get('DISCORD_TOKEN'), api_base)
+        )
+    return client
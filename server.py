@@ -0,0 +1,249 @@
+"""
+Long-running HTTP entry point for container deployments.
+
+Serves Discord interactions over plain asyncio streams with the same code as
+the Lambda handler: requests are checked by verification.verify_request
+with the container-wide key registry (public_keys.py) of the application
+served on the request path (applications.py) and answered by
+bot.handle_interaction, so the keys, the command registry and the JSON
+codec stay warm for the life of the process. Deferred commands run on the follow-up thread pool.
+
+With a shared store (SHARED_STATE_TABLE) the replay and rate limit checks
+make blocking DynamoDB calls, so requests are then handled on the event
+loop's thread pool instead of on the loop itself.
+
+    python server.py --port 8080 --workers 4
+
+With --workers N the listening socket is bound once and N forked processes
+accept on it (POSIX only).
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+
+import bot
+import warmup
+from applications import get_applications
+from request_log import RequestLog
+from responses import json_response
+from shared_store import get_store
+from validation import MAX_BODY, REJECTION_RESPONSES
+from verification import verify_request
+
+MAX_HEADER = 16 * 1024
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    401: 'Unauthorized',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+BAD_REQUEST_RESPONSE = json_response({'error': 'Invalid Content-Length'}, 400)
+METHOD_NOT_ALLOWED_RESPONSE = json_response({'error': 'Method not allowed'}, 405)
+TOO_LARGE_RESPONSE = REJECTION_RESPONSES['body_too_large']
+HEALTH_RESPONSE = json_response({'status': 'ok'})
+
+logger = logging.getLogger()
+
+
+def handle_request(method, path, headers, body, log=None):
+    """
+    Verify and answer one HTTP request. ``headers`` has lower case names and
+    ``body`` is the raw request body as bytes.
+    """
+    if path == '/health':
+        return HEALTH_RESPONSE
+    if method != 'POST':
+        return METHOD_NOT_ALLOWED_RESPONSE
+
+    log = log or RequestLog(logger)
+    # The path picks the application, and with it the accepted keys
+    rejection = verify_request(headers, body, get_applications().resolve(path), log)
+    if rejection is not None:
+        log.emit(rejection['statusCode'])
+        return rejection
+    response = bot.handle_interaction({'headers': headers, 'body': body, 'path': path}, log)
+    log.mark('dispatch')
+    log.emit(response['statusCode'])
+    return response
+
+
+async def _read_request(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    method, path, version = lines[0].split(' ', 2)
+
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    return method, path.split('?', 1)[0], version, headers
+
+
+def _content_length(headers):
+    """
+    The request's Content-Length (0 when absent), or None when it is not a
+    plain non-negative integer.
+    """
+    value = headers.get('content-length', '0')
+    if not (value.isascii() and value.isdigit()):
+        return None
+    return int(value)
+
+
+def _serialize(response, keep_alive):
+    body = response.get('body', '')
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    status = response['statusCode']
+
+    head = [f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}"]
+    for name, value in (response.get('headers') or {}).items():
+        head.append(f'{name}: {value}')
+    head.append(f'Content-Length: {len(body)}')
+    head.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+    return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def handle_connection(reader, writer):
+    """
+    Serve requests on one connection until the client closes it or asks
+    for Connection: close.
+    """
+    try:
+        while True:
+            try:
+                method, path, version, headers = await _read_request(reader)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                break
+
+            keep_alive = (
+                version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+            )
+            length = _content_length(headers)
+            if length is None or length > MAX_BODY:
+                # The body cannot be skipped reliably: answer and close
+                rejection = BAD_REQUEST_RESPONSE if length is None else TOO_LARGE_RESPONSE
+                writer.write(_serialize(rejection, False))
+                await writer.drain()
+                break
+
+            try:
+                body = await reader.readexactly(length) if length else b''
+            except asyncio.IncompleteReadError:
+                # Closed before sending the Content-Length it announced
+                break
+            try:
+                if get_store() is None:
+                    response = handle_request(method, path, headers, body)
+                else:
+                    # Store calls block: keep the other connections moving
+                    response = await asyncio.get_running_loop().run_in_executor(
+                        None, handle_request, method, path, headers, body,
+                    )
+            except Exception as e:
+                logger.error(f"Error handling {method} {path}: {e!r}")
+                response = bot.ERROR_RESPONSE
+            writer.write(_serialize(response, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.CancelledError):
+        # Client went away, or the server is shutting down an idle keep-alive
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(sock):
+    """
+    Accept connections on an already bound socket until cancelled.
+    """
+    server = await asyncio.start_server(handle_connection, sock=sock, limit=MAX_HEADER)
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set_result, None)
+        except (NotImplementedError, RuntimeError):
+            pass
+    async with server:
+        await stop
+
+
+def warm_up():
+    """
+    Load everything a request needs before the first one arrives.
+    """
+    timings, summary = warmup.prepare()
+    if not summary['keys']:
+        raise SystemExit('DISCORD_PUBLIC_KEY or DISCORD_PUBLIC_KEYS must be set')
+    logging.info(f"Warm-up done in {sum(timings.values()):.1f} ms: {timings}")
+    return timings
+
+
+def bind(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(socket.SOMAXCONN)
+    sock.setblocking(False)
+    return sock
+
+
+def run(host='0.0.0.0', port=8080, workers=1):
+    """
+    Serve on ``host:port`` with ``workers`` processes.
+    """
+    warm_up()
+    sock = bind(host, port)
+    logging.info(f"TerraBot listening on {host}:{port} with {workers} worker(s)")
+
+    if workers <= 1 or not hasattr(os, 'fork'):
+        asyncio.run(serve(sock))
+        return
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                asyncio.run(serve(sock))
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def forward(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='TerraBot HTTP server')
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '8080')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS', '1')))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stdout, format='%(levelname)s %(message)s')
+    run(args.host, args.port, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+State shared by every container of the bot.
+
+Per-container caches (rate limit buckets, replay protection) only see the
+traffic of their own container. When a limit has to hold across containers
+the state goes to a store with DynamoDB semantics: items are read, and
+written back only if nobody changed them in between (a conditional write on
+a version number). DynamoDBStore talks to a real table; LocalStore is an
+in-process stand-in with the same behaviour for development and benchmarks.
+
+Both also implement ``add_if_absent(key, ttl)``, the first-seen check used
+by replay_cache.ReplayCache.
+"""
+import os
+import threading
+import time
+
+TABLE_NAME = os.environ.get('SHARED_STATE_TABLE')
+
+
+class LocalStore:
+    """
+    In-process stand-in for DynamoDBStore. Several limiters or caches given
+    the same instance behave like containers sharing one table.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._items = {}
+        self._lock = threading.Lock()
+        self.conflicts = 0
+
+    def get(self, key):
+        """
+        Return the item stored under ``key`` (a dict with a ``version``) or
+        None.
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item.get('expires', float('inf')) <= self.clock():
+                return None
+            return dict(item) if item is not None else None
+
+    def put_if(self, key, item, version):
+        """
+        Store ``item`` with version ``version + 1`` if the stored item still
+        has ``version`` (None: if there is no item). Returns False on a
+        conflicting write.
+        """
+        with self._lock:
+            current = self._items.get(key)
+            if current is not None and current.get('expires', float('inf')) <= self.clock():
+                current = None
+            if (current['version'] if current is not None else None) != version:
+                self.conflicts += 1
+                return False
+            self._items[key] = dict(item, version=(version or 0) + 1)
+            return True
+
+    def add_if_absent(self, key, ttl):
+        now = self.clock()
+        with self._lock:
+            current = self._items.get(key)
+            if current is not None and current.get('expires', float('inf')) > now:
+                return False
+            self._items[key] = {'version': 1, 'expires': now + ttl}
+            return True
+
+
+class DynamoDBStore:
+    """
+    Shared store on a DynamoDB table with a string partition key ``pk`` and
+    TTL enabled on the numeric ``expires`` attribute. Items hold numbers
+    only.
+    """
+
+    def __init__(self, table_name=None, client=None, clock=time.time):
+        self.table_name = table_name or TABLE_NAME
+        self.clock = clock
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            # boto3 is slow to import; only shared limits pay for it
+            import boto3
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def get(self, key):
+        response = self.client.get_item(
+            TableName=self.table_name, Key={'pk': {'S': key}}, ConsistentRead=True,
+        )
+        attributes = response.get('Item')
+        if attributes is None:
+            return None
+        item = {
+            name: float(value['N']) for name, value in attributes.items() if 'N' in value
+        }
+        item['version'] = int(item['version'])
+        # TTL deletion is lazy; treat expired items as absent
+        if item.get('expires', float('inf')) <= self.clock():
+            return None
+        return item
+
+    def put_if(self, key, item, version):
+        attributes = {'pk': {'S': key}, 'version': {'N': str((version or 0) + 1)}}
+        for name, value in item.items():
+            if name != 'version':
+                attributes[name] = {'N': repr(value)}
+        if version is None:
+            condition = 'attribute_not_exists(pk) OR expires <= :now'
+            values = {':now': {'N': repr(self.clock())}}
+        else:
+            condition = 'version = :version'
+            values = {':version': {'N': str(version)}}
+        try:
+            self.client.put_item(
+                TableName=self.table_name, Item=attributes,
+                ConditionExpression=condition, ExpressionAttributeValues=values,
+            )
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+        return True
+
+    def add_if_absent(self, key, ttl):
+        return self.put_if(key, {'expires': self.clock() + ttl}, None)
+
+
+_store = None
+
+
+def get_store():
+    """
+    Return the shared store of this container: a DynamoDBStore when
+    SHARED_STATE_TABLE is set, otherwise None.
+    """
+    global _store
+    if _store is None and TABLE_NAME:
+        _store = DynamoDBStore()
+    return _store
+
+
+def set_store(store):
+    """
+    Replace the shared store, e.g. with a LocalStore.
+    """
+    global _store
+    _store = store
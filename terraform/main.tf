@@ -9,12 +9,18 @@ resource "aws_lambda_function" "discord_bot" {
   runtime       = "python3.9"
   role          = aws_iam_role.lambda_exec.arn
   filename      = "${path.module}/../deploy_package.zip"
+  # build_package.py writes identical bytes for identical code, so the
+  # function is only updated when the package really changed
+  source_code_hash = filebase64sha256("${path.module}/../deploy_package.zip")
   timeout       = 10  # 10 seconds timeout
   
   environment {
     variables = {
-      DISCORD_TOKEN      = var.discord_token
-      DISCORD_PUBLIC_KEY = var.discord_public_key
+      DISCORD_TOKEN          = var.discord_token
+      DISCORD_PUBLIC_KEY     = var.discord_public_key
+      TIMESTAMP_SKEW_SECONDS = var.timestamp_skew_seconds
+      SHARED_STATE_TABLE     = var.enable_shared_state ? aws_dynamodb_table.shared_state[0].name : ""
+      DISCORD_APPLICATIONS   = var.discord_applications
     }
   }
 
@@ -46,6 +52,86 @@ resource "aws_iam_role_policy_attachment" "lambda_basic" {
   policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
 }
 
+# Allow the function to invoke itself asynchronously to finish deferred commands
+resource "aws_iam_role_policy" "lambda_self_invoke" {
+  name = "discord-bot-self-invoke"
+  role = aws_iam_role.lambda_exec.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action   = "lambda:InvokeFunction"
+        Effect   = "Allow"
+        Resource = aws_lambda_function.discord_bot.arn
+      }
+    ]
+  })
+}
+
+# Optional table for state shared by all containers (rate limits, replay protection)
+resource "aws_dynamodb_table" "shared_state" {
+  count        = var.enable_shared_state ? 1 : 0
+  name         = "discord-bot-shared-state"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "pk"
+
+  attribute {
+    name = "pk"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires"
+    enabled        = true
+  }
+}
+
+resource "aws_iam_role_policy" "lambda_shared_state" {
+  count = var.enable_shared_state ? 1 : 0
+  name  = "discord-bot-shared-state"
+  role  = aws_iam_role.lambda_exec.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action   = ["dynamodb:GetItem", "dynamodb:PutItem"]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.shared_state[0].arn
+      }
+    ]
+  })
+}
+
+# Scheduled warm-up that keeps var.warm_containers containers initialized
+resource "aws_cloudwatch_event_rule" "warmup" {
+  count               = var.warm_containers > 0 ? 1 : 0
+  name                = "discord-bot-warmup"
+  schedule_expression = var.warmup_schedule
+}
+
+resource "aws_cloudwatch_event_target" "warmup" {
+  count = var.warm_containers > 0 ? 1 : 0
+  rule  = aws_cloudwatch_event_rule.warmup[0].name
+  arn   = aws_lambda_function.discord_bot.arn
+
+  input = jsonencode({
+    terrabot_warmup = {
+      concurrency = var.warm_containers
+    }
+  })
+}
+
+resource "aws_lambda_permission" "warmup" {
+  count         = var.warm_containers > 0 ? 1 : 0
+  statement_id  = "AllowExecutionFromEventBridgeWarmup"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.discord_bot.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.warmup[0].arn
+}
+
 # API Gateway REST API
 resource "aws_api_gateway_rest_api" "discord_webhook" {
   name        = "discord-webhook"
@@ -69,9 +155,34 @@ resource "aws_api_gateway_integration" "discord_bot" {
   uri                     = aws_lambda_function.discord_bot.invoke_arn
 }
 
+# One interactions URL per application: POST /{app}
+resource "aws_api_gateway_resource" "application" {
+  rest_api_id = aws_api_gateway_rest_api.discord_webhook.id
+  parent_id   = aws_api_gateway_rest_api.discord_webhook.root_resource_id
+  path_part   = "{app}"
+}
+
+resource "aws_api_gateway_method" "application" {
+  rest_api_id   = aws_api_gateway_rest_api.discord_webhook.id
+  resource_id   = aws_api_gateway_resource.application.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "application" {
+  rest_api_id = aws_api_gateway_rest_api.discord_webhook.id
+  resource_id = aws_api_gateway_resource.application.id
+  http_method = aws_api_gateway_method.application.http_method
+
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.discord_bot.invoke_arn
+}
+
 resource "aws_api_gateway_deployment" "discord_webhook" {
   depends_on = [
     aws_api_gateway_integration.discord_bot,
+    aws_api_gateway_integration.application,
     aws_api_gateway_integration.options
   ]
   
@@ -82,7 +193,9 @@ resource "aws_api_gateway_deployment" "discord_webhook" {
   triggers = {
     redeployment = sha1(jsonencode([
       aws_api_gateway_integration.discord_bot,
+      aws_api_gateway_integration.application,
       aws_api_gateway_method.discord_webhook,
+      aws_api_gateway_method.application,
       aws_api_gateway_method.options
     ]))
   }
@@ -146,6 +259,14 @@ resource "aws_lambda_permission" "api_gw" {
   source_arn    = "${aws_api_gateway_rest_api.discord_webhook.execution_arn}/*/${aws_api_gateway_method.discord_webhook.http_method}/"
 }
 
+resource "aws_lambda_permission" "api_gw_application" {
+  statement_id  = "AllowExecutionFromAPIGatewayApplications"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.discord_bot.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.discord_webhook.execution_arn}/*/${aws_api_gateway_method.application.http_method}/*"
+}
+
 # Output the API Gateway URL
 output "api_endpoint" {
   description = "API Gateway endpoint URL"
@@ -10,8 +10,39 @@ variable "discord_public_key" {
   sensitive   = true
 }
 
+variable "discord_applications" {
+  description = "JSON object of the Discord applications served by the bot, keyed by name (see applications.py); empty for a single application"
+  type        = string
+  default     = ""
+  sensitive   = true
+}
+
 variable "region" {
   description = "AWS region"
   type        = string
   default     = "us-east-1"
 }
+
+variable "timestamp_skew_seconds" {
+  description = "Maximum age of X-Signature-Timestamp accepted by the bot, in seconds"
+  type        = number
+  default     = 300
+}
+
+variable "enable_shared_state" {
+  description = "Create a DynamoDB table for rate limits and replay protection shared across Lambda containers"
+  type        = bool
+  default     = false
+}
+
+variable "warm_containers" {
+  description = "Number of Lambda containers kept initialized by the scheduled warm-up (0 disables it)"
+  type        = number
+  default     = 0
+}
+
+variable "warmup_schedule" {
+  description = "EventBridge schedule expression of the warm-up"
+  type        = string
+  default     = "rate(5 minutes)"
+}
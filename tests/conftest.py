@@ -0,0 +1,27 @@
+"""
+Shared fixtures. The modules live at the repository root, like in the
+Lambda package, and the root is put first on ``sys.path``. PyNaCl comes from
+the installed packages (requirements.txt): the vendored copy under
+``package/`` has no compiled _sodium in a checkout.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT in sys.path:
+    sys.path.remove(ROOT)
+sys.path.insert(0, ROOT)
+
+from fake_discord import FakeDiscord  # noqa: E402
+
+
+@pytest.fixture
+def discord():
+    """
+    A running FakeDiscord.
+    """
+    with FakeDiscord() as stand_in:
+        yield stand_in
@@ -0,0 +1,91 @@
+import time
+
+import nacl.signing
+import pytest
+
+import applications
+import public_keys
+import replay_cache
+from applications import DEFAULT_APPLICATION, Application, ApplicationTable
+from request_log import RequestLog
+from verification import UNAUTHORIZED_RESPONSE, verify_request
+
+BODY = b'{"type": 1}'
+
+TERRABOT = Application('terrabot', id='1180000000000000000', path='/terrabot')
+STAGING = Application('staging', id='1190000000000000000', path='/Staging/', commands=['hello'])
+
+
+def test_single_application_answers_every_path():
+    table = ApplicationTable([TERRABOT])
+
+    assert table.resolve('/terrabot') is TERRABOT
+    assert table.resolve('/otro') is TERRABOT
+    assert table.resolve(None) is TERRABOT
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('/terrabot', TERRABOT),
+    ('/staging', STAGING),
+    ('/STAGING/?x=1', STAGING),
+    ('/otro', DEFAULT_APPLICATION),
+    ('/', DEFAULT_APPLICATION),
+    (None, DEFAULT_APPLICATION),
+])
+def test_several_applications_resolve_by_path(path, expected):
+    table = ApplicationTable([TERRABOT, STAGING])
+
+    assert table.resolve(path) is expected
+
+
+def test_table_from_env():
+    table = ApplicationTable.from_env({'DISCORD_APPLICATIONS': (
+        '{"staging": {"id": "1190000000000000000", "path": "/staging", "commands": ["hello"]}}'
+    )})
+
+    [staging] = table
+    assert (staging.name, staging.path, staging.commands) == ('staging', '/staging', {'hello'})
+
+
+def test_duplicate_paths_are_rejected():
+    with pytest.raises(ValueError, match='already used'):
+        ApplicationTable([STAGING, Application('copia', id='1', path='/staging')])
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    keys = {name: nacl.signing.SigningKey.generate() for name in ('default', 'terrabot', 'staging')}
+    monkeypatch.setenv('DISCORD_PUBLIC_KEY', keys['default'].verify_key.encode().hex())
+    monkeypatch.delenv('DISCORD_PUBLIC_KEYS', raising=False)
+    applications.set_applications(ApplicationTable([
+        Application(application.name, id=application.id, path=application.path,
+                    public_keys=[keys[application.name].verify_key.encode().hex()])
+        for application in (TERRABOT, STAGING)
+    ]))
+    public_keys.reset_registry()
+    replay_cache.set_cache(replay_cache.ReplayCache())
+    yield keys
+    applications.set_applications(None)
+    public_keys.reset_registry()
+    replay_cache.set_cache(None)
+
+
+def check(key, path):
+    timestamp = str(int(time.time()))
+    headers = {
+        'x-signature-ed25519': key.sign(timestamp.encode() + BODY).signature.hex(),
+        'x-signature-timestamp': timestamp,
+    }
+    application = applications.get_applications().resolve(path)
+    return verify_request(headers, BODY, application, RequestLog())
+
+
+def test_request_is_checked_against_the_keys_of_its_path(keys):
+    assert check(keys['staging'], '/staging') is None
+    assert check(keys['terrabot'], '/staging') is UNAUTHORIZED_RESPONSE
+    assert check(keys['default'], '/staging') is UNAUTHORIZED_RESPONSE
+
+
+def test_unclaimed_path_uses_the_default_keys(keys):
+    assert check(keys['default'], '/otro') is None
+    assert check(keys['staging'], '/otro') is UNAUTHORIZED_RESPONSE
@@ -0,0 +1,19 @@
+import bot
+import followup
+import rest_client
+from request_log import RequestLog
+
+INTERACTION = {'type': 2, 'application_id': '100', 'token': 'tok', 'data': {'name': 'borrado'}}
+
+
+def test_followup_of_an_unknown_command_closes_the_reply(discord, monkeypatch):
+    monkeypatch.setattr(rest_client, 'API_BASE', discord.api_base)
+    log = RequestLog()
+
+    response = bot.handle_followup({'command': 'borrado', 'interaction': INTERACTION}, log)
+
+    assert response == {'statusCode': 404}
+    assert ('error', "Unknown deferred command 'borrado'") in [field[:2] for field in log._fields]
+    [request] = discord.requests
+    assert (request.method, request.path) == ('PATCH', '/webhooks/100/tok/messages/@original')
+    assert request.json() == followup.FAILED_MESSAGE
@@ -0,0 +1,56 @@
+import ast
+import os
+import zipfile
+
+import build_package
+from build_package import APP_FILES, HANDLER_FILES, ROOT, Builder, Target
+
+
+def root_imports(name):
+    with open(os.path.join(ROOT, name), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules = [node.module]
+        else:
+            continue
+        for module in modules:
+            path = module.split('.')[0] + '.py'
+            if os.path.exists(os.path.join(ROOT, path)):
+                yield path
+
+
+def test_app_files_include_every_module_they_import():
+    shipped = APP_FILES + tuple(HANDLER_FILES.values())
+    missing = {
+        (name, imported) for name in shipped for imported in root_imports(name)
+        if imported not in APP_FILES
+    }
+    assert not missing
+
+
+def test_handlers_do_not_shadow_app_files():
+    assert not set(HANDLER_FILES).intersection(APP_FILES)
+
+
+def build(tmp_path, name):
+    requirements = tmp_path / 'requirements.txt'
+    requirements.write_text('# nothing to install\n')
+    builder = Builder(str(requirements), Target(), cache_dir=str(tmp_path / 'cache'))
+    return builder.build(str(tmp_path / name))
+
+
+def test_build_is_reproducible_and_cached(tmp_path):
+    first = build(tmp_path, 'first.zip')
+    second = build(tmp_path, 'second.zip')
+
+    assert (first['package'], second['package']) == ('built', 'cached')
+    assert first['sha256'] == second['sha256']
+    with zipfile.ZipFile(tmp_path / 'first.zip') as archive:
+        infos = archive.infolist()
+    assert [info.filename for info in infos] == sorted(
+        APP_FILES + tuple(HANDLER_FILES) + (build_package.MANIFEST_NAME,)
+    )
+    assert {info.date_time for info in infos} == {build_package.ZIP_DATE}
@@ -0,0 +1,25 @@
+import logging
+
+import command_manifest
+import commands
+
+
+def test_current_manifest_builds_the_dispatch_table(monkeypatch):
+    monkeypatch.setattr(commands, 'DISPATCH', commands.REGISTRY)
+
+    commands._dispatch_from_manifest(command_manifest.build(commands.schemas()))
+
+    assert commands.DISPATCH is not commands.REGISTRY
+    assert commands.DISPATCH == commands.REGISTRY
+
+
+def test_stale_manifest_is_ignored(monkeypatch, caplog):
+    monkeypatch.setattr(commands, 'DISPATCH', commands.REGISTRY)
+    # Built before every command but the first was added
+    manifest = command_manifest.build(commands.schemas()[:1])
+
+    with caplog.at_level(logging.WARNING, logger='commands'):
+        commands._dispatch_from_manifest(manifest)
+
+    assert commands.DISPATCH is commands.REGISTRY
+    assert 'out of date' in caplog.text
@@ -0,0 +1,136 @@
+import asyncio
+
+import command_sync
+from command_sync import ADDED, CHANGED, FAILED, REMOVED, SKIPPED, UPDATED
+from rest_client import AsyncRestClient, RestClient
+
+APP_ID = '100'
+
+LOCAL = [
+    {'name': 'ping', 'description': 'Pong'},
+    {
+        'name': 'dado',
+        'description': 'Tira un dado',
+        'options': [{'type': 4, 'name': 'caras', 'description': 'Caras', 'required': True}],
+    },
+]
+
+
+def registered(schemas):
+    """
+    ``schemas`` as Discord returns them, with ids and default values added.
+    """
+    commands = []
+    for i, schema in enumerate(schemas):
+        command = dict(schema, id=str(900 + i), application_id=APP_ID, version='1',
+                       type=1, dm_permission=True, nsfw=False, default_member_permissions=None)
+        if 'options' in command:
+            command['options'] = [dict(option, autocomplete=False) for option in command['options']]
+        commands.append(command)
+    return commands
+
+
+def methods(discord):
+    return [request.method for request in discord.requests]
+
+
+def test_normalize_drops_metadata_and_defaults():
+    assert command_sync.normalize(registered(LOCAL)) == command_sync.normalize(LOCAL)
+    assert command_sync.normalize({'name': 'a', 'options': [], 'nsfw': False}) == {'name': 'a'}
+
+
+def test_diff_reports_added_removed_and_changed():
+    remote = registered([
+        {'name': 'ping', 'description': 'Ping'},
+        {'name': 'viejo', 'description': 'Ya no existe'},
+    ])
+    changes = {change.name: change for change in command_sync.diff(LOCAL, remote)}
+
+    assert changes['dado'].kind == ADDED
+    assert changes['viejo'].kind == REMOVED
+    assert changes['ping'].kind == CHANGED
+    assert changes['ping'].fields == [('description', 'Ping', 'Pong')]
+
+
+def test_diff_is_empty_for_the_same_commands():
+    assert command_sync.diff(LOCAL, registered(LOCAL)) == []
+
+
+def test_sync_unchanged_commands_costs_one_get(discord):
+    discord.respond('GET', f'/applications/{APP_ID}/commands', payload=registered(LOCAL))
+    client = RestClient('token', discord.api_base)
+
+    assert command_sync.sync(client, APP_ID, LOCAL) == []
+    assert methods(discord) == ['GET']
+
+
+def test_sync_overwrites_changed_commands_in_one_put(discord):
+    discord.respond('GET', f'/applications/{APP_ID}/commands', payload=registered(LOCAL[:1]))
+    client = RestClient('token', discord.api_base)
+
+    changes = command_sync.sync(client, APP_ID, LOCAL)
+
+    assert [change.name for change in changes] == ['dado']
+    assert methods(discord) == ['GET', 'PUT']
+    assert discord.requests[1].json() == LOCAL
+
+
+def test_sync_dry_run_does_not_write(discord):
+    client = RestClient('token', discord.api_base)
+
+    changes = command_sync.sync(client, APP_ID, LOCAL, dry_run=True)
+
+    assert {change.kind for change in changes} == {ADDED}
+    assert methods(discord) == ['GET']
+
+
+def sync_guilds(discord, guild_ids, **kwargs):
+    async def main():
+        async with AsyncRestClient('token', discord.api_base) as client:
+            return await command_sync.sync_guilds(client, APP_ID, LOCAL, guild_ids, **kwargs)
+    return asyncio.run(main())
+
+
+def test_sync_guilds_keeps_to_the_concurrency(discord):
+    discord.latency = 0.05
+    guild_ids = [str(i) for i in range(1, 13)]
+
+    results = sync_guilds(discord, guild_ids, concurrency=3)
+
+    assert [result.outcome for result in results] == [UPDATED] * len(guild_ids)
+    assert 1 < discord.peak_in_flight <= 3
+
+
+def test_sync_guilds_resumes_from_the_checkpoint(discord, tmp_path):
+    guild_ids = [str(i) for i in range(1, 7)]
+    path = str(tmp_path / 'checkpoint.json')
+    checkpoint = command_sync.Checkpoint(path, command_sync.fingerprint(APP_ID, LOCAL))
+    for guild_id in guild_ids[:3]:
+        checkpoint.record(guild_id, UPDATED)
+
+    resumed = command_sync.Checkpoint(path, command_sync.fingerprint(APP_ID, LOCAL))
+    results = sync_guilds(discord, guild_ids, checkpoint=resumed)
+
+    assert [result.outcome for result in results] == [SKIPPED] * 3 + [UPDATED] * 3
+    touched = {request.path.split('/')[4] for request in discord.requests}
+    assert touched == set(guild_ids[3:])
+    assert set(resumed.completed) == set(guild_ids)
+
+
+def test_checkpoint_of_other_commands_is_ignored(tmp_path):
+    path = str(tmp_path / 'checkpoint.json')
+    command_sync.Checkpoint(path, 'old').record('1', UPDATED)
+
+    assert '1' not in command_sync.Checkpoint(path, 'new')
+
+
+def test_sync_guilds_failure_does_not_stop_the_others(discord):
+    discord.respond('GET', f'/applications/{APP_ID}/guilds/2/commands', status=403,
+                    payload={'message': 'Missing Access'})
+
+    results = sync_guilds(discord, ['1', '2', '3'])
+
+    assert [result.outcome for result in results] == [UPDATED, FAILED, UPDATED]
+    assert 'HTTP 403' in results[1].error
+    assert not any(request.path.startswith(f'/applications/{APP_ID}/guilds/2/')
+                   and request.method == 'PUT' for request in discord.requests)
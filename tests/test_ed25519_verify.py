@@ -0,0 +1,34 @@
+import nacl.exceptions
+import nacl.signing
+import pytest
+
+from ed25519_verify import VerifyKey
+
+SIGNING_KEY = nacl.signing.SigningKey(b'\x01' * 32)
+MESSAGE = b'1700000000{"type":1}'
+SIGNATURE = SIGNING_KEY.sign(MESSAGE).signature
+
+
+def verify_key():
+    return VerifyKey(SIGNING_KEY.verify_key.encode())
+
+
+def test_valid_signature_over_parts():
+    assert verify_key().verify_detached(SIGNATURE, MESSAGE)
+    assert verify_key().verify_detached(SIGNATURE, MESSAGE[:10], MESSAGE[10:])
+    assert verify_key().verify_detached(SIGNATURE, memoryview(MESSAGE))
+
+
+@pytest.mark.parametrize('signature, message', [
+    (SIGNATURE, MESSAGE + b' '),
+    (bytes(64), MESSAGE),
+    (SIGNATURE[:63], MESSAGE),
+])
+def test_invalid_signature_is_rejected(signature, message):
+    with pytest.raises(nacl.exceptions.BadSignatureError):
+        verify_key().verify_detached(signature, message)
+
+
+def test_key_must_be_32_bytes():
+    with pytest.raises(nacl.exceptions.ValueError):
+        VerifyKey(b'\x00' * 31)
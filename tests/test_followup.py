@@ -0,0 +1,55 @@
+import followup
+from interaction import Interaction
+
+PATH = '/webhooks/100/tok/messages/@original'
+
+
+class Command:
+    def __init__(self, name, handler):
+        self.name = name
+        self.handler = handler
+
+
+def interaction():
+    return Interaction({'type': 2, 'application_id': '100', 'token': 'tok', 'data': {'name': 'x'}})
+
+
+def test_edit_original_patches_the_response(discord):
+    status = followup.edit_original('100', 'tok', {'content': 'Listo'}, discord.api_base)
+
+    assert status == 200
+    [request] = discord.requests
+    assert (request.method, request.path) == ('PATCH', PATH)
+    assert request.json() == {'content': 'Listo'}
+
+
+def test_edit_original_returns_the_error_status(discord, caplog):
+    discord.respond('PATCH', PATH, status=404, payload={'message': 'Unknown Webhook'})
+
+    assert followup.edit_original('100', 'tok', {'content': 'Listo'}, discord.api_base) == 404
+    assert 'HTTP 404' in caplog.text
+
+
+def test_run_delivers_the_handler_message(discord):
+    command = Command('x', lambda interaction: {'content': f'Hola {interaction.token}'})
+
+    assert followup.run(command, interaction(), discord.api_base) == 200
+    assert discord.requests[0].json() == {'content': 'Hola tok'}
+
+
+def test_run_reports_a_failing_handler(discord):
+    def handler(interaction):
+        raise RuntimeError('boom')
+
+    followup.run(Command('x', handler), interaction(), discord.api_base)
+
+    assert discord.requests[0].json() == followup.FAILED_MESSAGE
+
+
+def test_thread_executor(discord):
+    executor = followup.ThreadExecutor(api_base=discord.api_base)
+    future = executor.submit(Command('x', lambda interaction: {'content': 'ok'}), interaction())
+    executor.shutdown()
+
+    assert future.result() == 200
+    assert discord.requests[0].method == 'PATCH'
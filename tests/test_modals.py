@@ -0,0 +1,29 @@
+import pytest
+
+import codec
+from components import MAX_CUSTOM_ID
+from modals import SEPARATOR, Field, Modal
+
+FORM = Modal('informe', 'Informe', [Field('texto', 'Texto')], handler=None)
+
+
+def custom_id(response):
+    return codec.loads(response['body'])['data']['custom_id']
+
+
+def test_state_is_appended_to_the_custom_id():
+    assert custom_id(FORM.response()) == 'informe'
+    assert custom_id(FORM.response('42')) == f'informe{SEPARATOR}42'
+
+
+def test_state_up_to_the_limit_fits():
+    state = 'x' * (MAX_CUSTOM_ID - len('informe') - len(SEPARATOR))
+
+    assert len(custom_id(FORM.response(state))) == MAX_CUSTOM_ID
+
+
+def test_state_over_the_limit_is_rejected():
+    state = 'x' * (MAX_CUSTOM_ID - len('informe'))
+
+    with pytest.raises(ValueError, match='101 characters, the limit is 100'):
+        FORM.response(state)
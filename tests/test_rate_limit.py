@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from commands import Command
+from interaction import Interaction
+from rate_limit import GUILD, Limit, RateLimiter
+from shared_store import LocalStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def interaction(user='u1', guild='g1'):
+    return Interaction({
+        'type': 2, 'application_id': '100', 'guild_id': guild,
+        'member': {'user': {'id': user}}, 'data': {'name': 'tirar'},
+    })
+
+
+def tokens(limiter, key):
+    return limiter._buckets[key][0]
+
+
+def test_bucket_refills_over_time():
+    clock = Clock()
+    limiter = RateLimiter(clock=clock)
+    command = Command('tirar', '', None, limits=(Limit(1, 10),))
+
+    assert limiter.check(command, interaction()) == 0.0
+    assert limiter.check(command, interaction()) == 10.0
+    clock.now += 10
+    assert limiter.check(command, interaction()) == 0.0
+
+
+def test_rejected_request_takes_no_tokens():
+    limiter = RateLimiter(clock=Clock())
+    command = Command('tirar', '', None, limits=(Limit(10, 60), Limit(1, 60, scope=GUILD)))
+
+    assert limiter.check(command, interaction()) == 0.0
+    for _ in range(4):
+        assert limiter.check(command, interaction()) > 0
+
+    assert tokens(limiter, 'rl:100:tirar:user:u1') == 9
+    assert limiter.stats()['limited'] == 4
+
+
+def test_rejected_request_gives_back_shared_tokens():
+    clock = Clock()
+    store = LocalStore(clock=clock)
+    limiter = RateLimiter(store, clock=clock)
+    command = Command('tirar', '', None, limits=(
+        Limit(10, 60, shared=True), Limit(1, 60, scope=GUILD, shared=True),
+    ))
+
+    assert limiter.check(command, interaction()) == 0.0
+    for _ in range(4):
+        assert limiter.check(command, interaction()) > 0
+
+    assert store.get('rl:100:tirar:user:u1')['tokens'] == 9
+    assert limiter.stats()['shared_failures'] == 0
+
+
+def test_unavailable_store_lets_requests_through():
+    class BrokenStore:
+        def get(self, key):
+            raise ConnectionError('down')
+
+    limiter = RateLimiter(BrokenStore(), clock=Clock())
+    command = Command('tirar', '', None, limits=(Limit(1, 60, shared=True),))
+
+    assert [limiter.check(command, interaction()) for _ in range(3)] == [0.0] * 3
+    assert limiter.stats()['shared_failures'] == 3
+
+
+class SlowStore(LocalStore):
+    def get(self, key):
+        time.sleep(0.01)
+        return super().get(key)
+
+
+def test_parallel_requests_do_not_overdraw_local_buckets():
+    clock = Clock()
+    limiter = RateLimiter(SlowStore(clock=clock), clock=clock)
+    command = Command('tirar', '', None, limits=(
+        Limit(5, 60), Limit(100, 60, scope=GUILD, shared=True),
+    ))
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        waits = list(pool.map(lambda _: limiter.check(command, interaction()), range(20)))
+
+    assert waits.count(0.0) == 5
+    assert limiter.store.get('rl:100:tirar:guild:g1')['tokens'] == 95
@@ -0,0 +1,77 @@
+import pytest
+
+from replay_cache import ReplayCache
+from shared_store import DynamoDBStore, LocalStore
+
+SIGNATURE = bytes(range(64))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class DynamoDBClient:
+    """
+    Records put_item calls and, like botocore, only accepts string keys.
+    """
+
+    class exceptions:
+        class ConditionalCheckFailedException(Exception):
+            pass
+
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, TableName, Item, ConditionExpression, ExpressionAttributeValues):
+        key = Item['pk']['S']
+        if not isinstance(key, str):
+            raise TypeError(f'Invalid type for parameter Item.pk.S, value: {key!r}')
+        if key in self.items:
+            raise self.exceptions.ConditionalCheckFailedException()
+        self.items[key] = Item
+
+
+class BrokenStore:
+    def add_if_absent(self, key, ttl):
+        raise ConnectionError('down')
+
+
+def test_duplicate_is_rejected_until_the_ttl_passes():
+    clock = Clock()
+    cache = ReplayCache(ttl=10, clock=clock)
+
+    assert cache.first_seen(SIGNATURE)
+    assert not cache.first_seen(SIGNATURE)
+    clock.now += 11
+    assert cache.first_seen(SIGNATURE)
+
+
+def test_replay_against_another_container_is_rejected():
+    store = LocalStore()
+    first, second = ReplayCache(store=store), ReplayCache(store=store)
+
+    assert first.first_seen(SIGNATURE)
+    assert not second.first_seen(SIGNATURE)
+    assert second.stats()['shared_duplicates'] == 1
+
+
+def test_dynamodb_key_is_the_hex_signature():
+    client = DynamoDBClient()
+    cache = ReplayCache(store=DynamoDBStore('replay', client))
+
+    assert cache.first_seen(SIGNATURE)
+    assert list(client.items) == [f'replay:{SIGNATURE.hex()}']
+
+
+@pytest.mark.parametrize('fail_open', [True, False])
+def test_store_failure_follows_the_policy(fail_open):
+    cache = ReplayCache(store=BrokenStore(), fail_open=fail_open)
+
+    assert cache.first_seen(SIGNATURE) is fail_open
+    assert cache.stats()['shared_failures'] == 1
+    # This container still remembers the signature
+    assert not cache.first_seen(SIGNATURE)
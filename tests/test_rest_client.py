@@ -0,0 +1,143 @@
+import pytest
+
+from rest_client import (
+    PENDING_RESET, PROBE_WAIT, SWEEP_INTERVAL, RestClient, RouteBuckets, major_parameters, route_key,
+)
+
+ROUTE = 'POST /channels/1/messages'
+
+
+def bucket_headers(remaining, reset_after, limit=5, bucket='abc'):
+    return {
+        'X-RateLimit-Bucket': bucket,
+        'X-RateLimit-Limit': str(limit),
+        'X-RateLimit-Remaining': str(remaining),
+        'X-RateLimit-Reset-After': str(reset_after),
+    }
+
+
+def test_route_key_keeps_major_parameters():
+    assert route_key('PATCH', '/channels/1/messages/2') == 'PATCH /channels/1/messages/:id'
+    assert route_key('PATCH', '/channels/1/messages/3') == route_key('PATCH', '/channels/1/messages/2')
+    assert route_key('PATCH', '/channels/2/messages/2') != route_key('PATCH', '/channels/1/messages/2')
+
+
+def test_route_key_drops_webhook_tokens():
+    path = '/webhooks/100/{}/messages/@original'
+
+    assert route_key('PATCH', path.format('tok1')) == 'PATCH /webhooks/100/:token/messages/@original'
+    assert route_key('PATCH', path.format('tok1')) == route_key('PATCH', path.format('tok2'))
+    assert major_parameters(path.format('tok1')) == '100/tok1'
+    assert major_parameters('/applications/1/guilds/2/commands') == '2'
+
+
+def test_unknown_route_lets_one_probe_through():
+    buckets = RouteBuckets(global_rate=None)
+
+    assert buckets.acquire(ROUTE, 0.0) == 0.0
+    assert buckets.acquire(ROUTE, 0.0) == PROBE_WAIT
+
+    buckets.update(ROUTE, bucket_headers(4, 1.0), 0.1)
+    assert buckets.acquire(ROUTE, 0.1) == 0.0
+
+
+def test_exhausted_bucket_waits_for_its_reset():
+    buckets = RouteBuckets(global_rate=None)
+    buckets.acquire(ROUTE, 0.0)
+    buckets.update(ROUTE, bucket_headers(0, 2.0), 0.0)
+
+    assert buckets.acquire(ROUTE, 0.5) == pytest.approx(1.5)
+    # A new window: let requests through up to the limit while its reset is unknown
+    assert buckets.acquire(ROUTE, 2.0) == 0.0
+    assert buckets._buckets['abc:'][:2] == [4, 2.0 + PENDING_RESET]
+
+
+def test_routes_share_the_bucket_discord_reports():
+    other = 'POST /channels/1/messages/:id/reactions'
+    buckets = RouteBuckets(global_rate=None)
+    buckets.update(ROUTE, bucket_headers(0, 1.0), 0.0)
+    buckets.update(other, bucket_headers(0, 1.0), 0.0)
+
+    assert buckets.acquire(other, 0.0) == pytest.approx(1.0)
+
+
+def test_bucket_hash_is_per_major_parameter():
+    route = 'PATCH /webhooks/100/:token/messages/@original'
+    buckets = RouteBuckets(global_rate=None)
+    buckets.update(route, bucket_headers(0, 1.0), 0.0, major='100/tok1')
+
+    assert buckets.acquire(route, 0.0, major='100/tok1') == pytest.approx(1.0)
+    assert buckets.acquire(route, 0.0, major='100/tok2') == 0.0
+
+
+def test_ended_buckets_are_swept():
+    route = 'PATCH /webhooks/100/:token/messages/@original'
+    buckets = RouteBuckets(global_rate=None)
+    for i in range(100):
+        buckets.update(route, bucket_headers(4, 1.0), float(i), major=f'100/tok{i}')
+
+    buckets.update(route, bucket_headers(4, 1.0), SWEEP_INTERVAL + 100, major='100/last')
+
+    assert buckets.stats()['routes'] == 1
+    assert list(buckets._buckets) == ['abc:100/last']
+
+
+def test_429_blocks_the_route_for_retry_after():
+    buckets = RouteBuckets(global_rate=None)
+
+    wait = buckets.limited(ROUTE, {}, {'retry_after': 3.0, 'global': False}, 10.0)
+
+    assert wait == 3.0
+    assert buckets.acquire(ROUTE, 11.0) == pytest.approx(2.0)
+    assert buckets.acquire('GET /users/@me', 11.0) == 0.0
+
+
+def test_global_429_blocks_every_route():
+    buckets = RouteBuckets(global_rate=None)
+
+    buckets.limited(ROUTE, {'X-RateLimit-Global': 'true'}, {'retry_after': 1.0}, 0.0)
+
+    assert buckets.acquire('GET /users/@me', 0.5) == pytest.approx(0.5)
+    assert buckets.stats()['global_limited'] == 1
+
+
+def test_global_pace():
+    buckets = RouteBuckets(global_rate=10.0, global_burst=2)
+
+    assert buckets.acquire('GET /a', 0.0) == 0.0
+    assert buckets.acquire('GET /b', 0.0) == 0.0
+    assert buckets.acquire('GET /c', 0.0) == pytest.approx(0.1)
+
+
+def test_client_stays_within_the_bucket(discord):
+    discord.limit('POST', '/channels/1/messages', limit=2, per=0.3)
+    client = RestClient('token', discord.api_base)
+
+    statuses = [client.request('POST', '/channels/1/messages', json={}).status for _ in range(5)]
+
+    assert statuses == [200] * 5
+    assert discord.rate_limited == 0
+    assert client.stats()['connections_created'] == 1
+
+
+def test_client_retries_after_a_429(discord):
+    discord.global_limit(1, per=0.2)
+    client = RestClient('token', discord.api_base)
+
+    statuses = [client.request('GET', f'/guilds/{i}').status for i in range(3)]
+
+    assert statuses == [200] * 3
+    assert discord.rate_limited >= 1
+    assert client.stats()['global_limited'] == discord.rate_limited
+
+
+def test_client_returns_errors_without_retrying(discord):
+    discord.respond('GET', '/users/@me', status=401, payload={'message': '401: Unauthorized'})
+    client = RestClient('token', discord.api_base)
+
+    response = client.request('GET', '/users/@me')
+
+    assert response.status == 401
+    assert response.json() == {'message': '401: Unauthorized'}
+    assert len(discord.requests) == 1
+    assert discord.requests[0].headers['Authorization'] == 'Bot token'
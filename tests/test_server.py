@@ -0,0 +1,154 @@
+import asyncio
+import json
+import threading
+import time
+
+import nacl.signing
+import pytest
+
+import public_keys
+import replay_cache
+import server
+import shared_store
+
+PING = b'{"type": 1, "application_id": "100", "token": "tok"}'
+
+
+@pytest.fixture
+def signing_key(monkeypatch):
+    key = nacl.signing.SigningKey.generate()
+    monkeypatch.setenv('DISCORD_PUBLIC_KEY', key.verify_key.encode().hex())
+    monkeypatch.delenv('DISCORD_PUBLIC_KEYS', raising=False)
+    public_keys.reset_registry()
+    replay_cache.set_cache(replay_cache.ReplayCache())
+    yield key
+    public_keys.reset_registry()
+    replay_cache.set_cache(None)
+
+
+def signed_headers(key, body, timestamp=None):
+    timestamp = timestamp or str(int(time.time()))
+    signature = key.sign(timestamp.encode() + body).signature.hex()
+    return {'x-signature-ed25519': signature, 'x-signature-timestamp': timestamp}
+
+
+def error(response):
+    return json.loads(response['body'])['error']
+
+
+def test_signed_ping_is_answered_once(signing_key):
+    headers = signed_headers(signing_key, PING)
+
+    response = server.handle_request('POST', '/', headers, PING)
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == {'type': 1}
+
+    replayed = server.handle_request('POST', '/', headers, PING)
+    assert replayed['statusCode'] == 401
+    assert error(replayed) == 'Request already processed'
+
+
+def test_bad_signature_is_rejected(signing_key):
+    headers = signed_headers(signing_key, PING)
+
+    response = server.handle_request('POST', '/', headers, PING.replace(b'1', b'2'))
+
+    assert response['statusCode'] == 401
+    assert error(response) == 'Invalid request signature'
+
+
+def test_stale_timestamp_is_rejected_before_verifying(signing_key):
+    headers = signed_headers(signing_key, PING, timestamp=str(int(time.time()) - 3600))
+
+    response = server.handle_request('POST', '/', headers, PING)
+
+    assert response['statusCode'] == 401
+    assert error(response) == 'Request timestamp outside the accepted window'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('0', 0), ('42', 42), ('abc', None), ('-5', None), ('+5', None), ('1_0', None), ('', None),
+])
+def test_content_length(value, expected):
+    assert server._content_length({'content-length': value}) == expected
+
+
+def exchange(request):
+    async def main():
+        tcp = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+        async with tcp:
+            port = tcp.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(request)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return response
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize('length, status', [
+    ('abc', b'400 Bad Request'), ('-5', b'400 Bad Request'), (str(10 ** 9), b'413 Payload Too Large'),
+])
+def test_bad_content_length_is_answered_and_closed(length, status):
+    response = exchange(
+        f'POST / HTTP/1.1\r\nHost: x\r\nContent-Length: {length}\r\n\r\n'.encode()
+    )
+
+    assert response.startswith(b'HTTP/1.1 ' + status)
+    assert b'Connection: close' in response
+
+
+class Writer:
+    def __init__(self):
+        self.data = b''
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_truncated_body_closes_the_connection():
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'POST / HTTP/1.1\r\nHost: x\r\nContent-Length: 100\r\n\r\nabc')
+        reader.feed_eof()
+        writer = Writer()
+        await server.handle_connection(reader, writer)
+        return writer
+
+    writer = asyncio.run(main())
+
+    assert writer.closed
+    assert writer.data == b''
+
+
+def test_health_over_keep_alive():
+    response = exchange(
+        b'GET /health HTTP/1.1\r\nHost: x\r\n\r\nGET /health HTTP/1.1\r\nConnection: close\r\n\r\n'
+    )
+
+    assert response.count(b'HTTP/1.1 200 OK') == 2
+
+
+@pytest.mark.parametrize('store, off_loop', [(None, False), (shared_store.LocalStore(), True)])
+def test_requests_leave_the_loop_only_with_a_shared_store(monkeypatch, store, off_loop):
+    threads = []
+
+    def handle_request(method, path, headers, body):
+        threads.append(threading.get_ident())
+        return server.HEALTH_RESPONSE
+
+    monkeypatch.setattr(server, 'handle_request', handle_request)
+    monkeypatch.setattr(shared_store, '_store', store)
+
+    response = exchange(b'POST / HTTP/1.1\r\nConnection: close\r\nContent-Length: 2\r\n\r\n{}')
+
+    assert response.startswith(b'HTTP/1.1 200 OK')
+    assert (threads != [threading.get_ident()]) == off_loop
@@ -0,0 +1,77 @@
+import io
+import json
+import threading
+
+import pytest
+
+import warmup
+
+
+class LambdaClient:
+    """
+    Answers each invoke with the next of ``answers``: a report, a whole
+    response envelope, an ``(function_error, payload)`` pair or an exception.
+    """
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self._lock = threading.Lock()
+
+    def invoke(self, FunctionName, InvocationType, Payload):
+        with self._lock:
+            answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        if isinstance(answer, tuple):
+            function_error, payload = answer
+            payload = io.BytesIO(json.dumps(payload).encode())
+            return {'FunctionError': function_error, 'Payload': payload}
+        if 'statusCode' not in answer:
+            answer = {'statusCode': 200, 'body': json.dumps(answer)}
+        return {'Payload': io.BytesIO(json.dumps(answer).encode())}
+
+
+@pytest.fixture
+def fan_out(monkeypatch):
+    def install(answers):
+        client = LambdaClient(answers)
+        original = warmup._fan_out
+        monkeypatch.setattr(
+            warmup, '_fan_out',
+            lambda copies, hold_ms: original(copies, hold_ms, 'terrabot', client),
+        )
+    return install
+
+
+def test_failing_copies_do_not_abort_the_warm_up(fan_out):
+    fan_out([
+        {'cold': True},
+        ('Unhandled', {'errorMessage': 'boom'}),
+        ConnectionError('throttled'),
+        {'cold': False},
+    ])
+
+    report = warmup.run({'concurrency': 5, 'hold_ms': 0})
+
+    assert report['containers'] == [{'cold': True}, {'cold': False}]
+    assert report['fan_out']['requested'] == 4
+    assert report['fan_out']['warmed'] == 2
+    assert report['fan_out']['failed'] == 2
+    assert any('boom' in error for error in report['fan_out']['errors'])
+
+
+def test_answer_without_a_report_is_a_failure():
+    client = LambdaClient([('Unhandled', None), {'statusCode': 500, 'body': '{}'}])
+
+    reports, errors = warmup._fan_out(2, 0, 'terrabot', client)
+
+    assert reports == []
+    assert len(errors) == 2
+
+
+@pytest.mark.parametrize('event', [None, True, 'now', {'concurrency': 'many'}])
+def test_any_event_value_is_a_plain_warm_up(event):
+    report = warmup.run(event)
+
+    assert 'fan_out' not in report
+    assert report['commands'] > 0
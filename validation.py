@@ -0,0 +1,118 @@
+"""
+Cheap checks that run before the Ed25519 verification.
+
+Requests with a missing or malformed signature, a missing, non numeric or
+stale timestamp, or an oversized body are turned away here with string
+operations alone, so junk traffic never pays for a signature check. Every
+rejection reason has its own status code and counter.
+
+Signature and timestamp problems answer 401 like a failed verification:
+Discord's endpoint check expects 401 for any request it tampered with.
+"""
+import os
+import time
+
+from responses import json_response
+
+# Accepted distance between X-Signature-Timestamp and the local clock
+MAX_SKEW = int(os.environ.get('TIMESTAMP_SKEW_SECONDS', '300'))
+
+# Largest request body accepted, in bytes
+MAX_BODY = int(os.environ.get('MAX_BODY_BYTES', str(1024 * 1024)))
+
+SIGNATURE_HEX_LENGTH = 128
+
+# reason -> (status code, error message)
+REJECTIONS = {
+    'missing_signature': (401, 'Missing request signature'),
+    'malformed_signature': (401, 'Malformed request signature'),
+    'missing_timestamp': (401, 'Missing request timestamp'),
+    'malformed_timestamp': (401, 'Malformed request timestamp'),
+    'stale_timestamp': (401, 'Request timestamp outside the accepted window'),
+    'body_too_large': (413, 'Payload too large'),
+    # Raised after verification, by the replay cache
+    'replayed': (401, 'Request already processed'),
+}
+
+REJECTION_RESPONSES = {
+    reason: json_response({'error': message}, status_code)
+    for reason, (status_code, message) in REJECTIONS.items()
+}
+
+
+class Rejected(ValueError):
+    """
+    A request failed validation before reaching the crypto check.
+    """
+
+    def __init__(self, reason):
+        super().__init__(REJECTIONS[reason][1])
+        self.reason = reason
+        self.status_code = REJECTIONS[reason][0]
+        self.response = REJECTION_RESPONSES[reason]
+
+
+class RequestValidator:
+    """
+    Validates the signature headers and body size of a request and counts
+    the outcome per reason.
+    """
+
+    def __init__(self, max_skew=MAX_SKEW, max_body=MAX_BODY, clock=time.time):
+        self.max_skew = max_skew
+        self.max_body = max_body
+        self.clock = clock
+        self.counters = {reason: 0 for reason in REJECTIONS if reason != 'replayed'}
+        self.counters['accepted'] = 0
+
+    def check(self, signature, timestamp, body):
+        """
+        Return the decoded signature bytes, or raise Rejected.
+
+        ``signature`` and ``timestamp`` are the raw header values and
+        ``body`` the request body as str or bytes.
+        """
+        try:
+            if len(body) > self.max_body:
+                raise Rejected('body_too_large')
+
+            if not signature:
+                raise Rejected('missing_signature')
+            if len(signature) != SIGNATURE_HEX_LENGTH:
+                raise Rejected('malformed_signature')
+            try:
+                signature_bytes = bytes.fromhex(signature)
+            except ValueError:
+                raise Rejected('malformed_signature') from None
+
+            if not timestamp:
+                raise Rejected('missing_timestamp')
+            if len(timestamp) > 12 or not (timestamp.isascii() and timestamp.isdigit()):
+                raise Rejected('malformed_timestamp')
+            if abs(self.clock() - int(timestamp)) > self.max_skew:
+                raise Rejected('stale_timestamp')
+        except Rejected as e:
+            self.counters[e.reason] += 1
+            raise
+
+        self.counters['accepted'] += 1
+        return signature_bytes
+
+    def stats(self):
+        """
+        Snapshot of the counters for logging or metrics.
+        """
+        return dict(self.counters)
+
+
+_validator = None
+
+
+def get_validator():
+    """
+    Return the validator of this container, created on first use.
+    """
+    global _validator
+    if _validator is None:
+        _validator = RequestValidator()
+    return _validator
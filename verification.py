@@ -0,0 +1,58 @@
+"""
+The checks a request passes before its interaction is answered.
+
+verify_request() runs, in order, the cheap header, timestamp and body size
+checks (validation.py), the Ed25519 signature check against the keys of the
+application (public_keys.py) and the replay check (replay_cache.py). The
+HTTP server (server.py) and the verifying Lambda handler
+(package/verify_bot.py) both call it, so they accept exactly the same
+requests.
+"""
+import logging
+
+import nacl.exceptions
+
+from public_keys import get_registry
+from replay_cache import get_cache
+from responses import json_response
+from validation import REJECTION_RESPONSES, Rejected, get_validator
+
+UNAUTHORIZED_RESPONSE = json_response({'error': 'Invalid request signature'}, 401)
+
+
+def verify_request(headers, body, application, log):
+    """
+    Check a request for ``application`` and return None when it may be
+    answered, or the response to send instead. ``headers`` has lower case
+    names; ``body`` is the raw body, as bytes or text.
+    """
+    timestamp = headers.get('x-signature-timestamp', '')
+    try:
+        signature = get_validator().check(
+            headers.get('x-signature-ed25519', ''), timestamp, body
+        )
+    except Rejected as e:
+        log.add('verified', False)
+        log.add('rejected', e.reason)
+        log.add('validation', get_validator().stats, logging.DEBUG)
+        return e.response
+    log.mark('validate')
+
+    if isinstance(body, str):
+        body = body.encode()
+    try:
+        get_registry().verify(signature, timestamp.encode(), body, app_id=application.id)
+    except (nacl.exceptions.BadSignatureError, ValueError) as e:
+        log.add('verified', False)
+        log.add('error', str(e))
+        return UNAUTHORIZED_RESPONSE
+    log.add('verified', True)
+    log.mark('verify')
+    log.add('key_registry', get_registry().stats, logging.DEBUG)
+
+    # A valid request is only answered once
+    if not get_cache().first_seen(signature):
+        log.add('rejected', 'replayed')
+        log.add('replay_cache', get_cache().stats, logging.DEBUG)
+        return REJECTION_RESPONSES['replayed']
+    return None
@@ -0,0 +1,197 @@
+"""
+Warm-up invocations.
+
+A scheduled event ``{"terrabot_warmup": {"concurrency": N}}`` makes a
+container do everything the first real interaction would otherwise pay for:
+import the crypto stack, load the public keys, build the application,
+command, component and modal tables and the response caches, and check one
+known Ed25519 signature. It answers with the time each step took and never talks to
+Discord.
+
+With ``concurrency`` above 1 the container that receives the event invokes
+the function N - 1 more times in parallel. Each copy holds its container
+for ``hold_ms`` so they overlap and land on N different containers. A copy
+that fails is counted under ``fan_out`` without stopping the others.
+"""
+import importlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import codec
+
+EVENT_KEY = 'terrabot_warmup'
+
+# Time each fanned-out copy keeps its container busy
+HOLD_MS = int(os.environ.get('WARMUP_HOLD_MS', '250'))
+
+# RFC 8032, section 7.1, test 1: empty message
+TEST_PUBLIC_KEY = bytes.fromhex(
+    'd75a980182b10ab7d54bfed3c964073a0ee172f3daa62325af021a68f707511a'
+)
+TEST_SIGNATURE = bytes.fromhex(
+    'e5564300c360ac729086e2cc806e828a84877f1eb8e5d974d873e065224901555f'
+    'b8821590a33bacc61e39701cf9b46bd25bf5f0595bbe24655141438e7a100b'
+)
+
+_STARTED = time.time()
+_warmups = 0
+
+
+def _timed(timings, stage, func):
+    start = time.perf_counter()
+    result = func()
+    timings[stage] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def prepare():
+    """
+    Initialize everything a request needs and return
+    ``(timings in ms, summary)``. Steps that already ran cost nothing.
+    """
+    timings = {}
+
+    def crypto():
+        import ed25519_verify
+        return ed25519_verify
+
+    def keys():
+        from public_keys import get_registry
+        # Keys of every application, decoded when the registry loads
+        return get_registry().stats()['keys']
+
+    def dispatch():
+        import commands
+        import components
+        import modals
+        from applications import get_applications
+        # Only for its side effect: bot builds its response caches
+        importlib.import_module('bot')
+        applications = get_applications()
+        for application in applications:
+            commands.registry_for(application)
+        return (len(applications), len(commands.DISPATCH), len(components.ROUTER),
+                len(modals.REGISTRY))
+
+    def caches():
+        from rate_limit import get_limiter
+        from replay_cache import get_cache
+        from validation import get_validator
+        get_validator()
+        get_cache()
+        get_limiter()
+
+    app_count, command_count, route_count, modal_count = _timed(timings, 'dispatch', dispatch)
+    try:
+        ed25519_verify = _timed(timings, 'crypto', crypto)
+    except ImportError:
+        # Package built without the crypto stack (bot.py does not verify)
+        key_count, verified = 0, False
+    else:
+        key_count = _timed(timings, 'keys', keys)
+        _timed(timings, 'caches', caches)
+        verified = _timed(timings, 'verify', lambda: ed25519_verify.VerifyKey(
+            TEST_PUBLIC_KEY).verify_detached(TEST_SIGNATURE, b''))
+
+    return timings, {
+        'applications': app_count,
+        'keys': key_count,
+        'commands': command_count,
+        'component_routes': route_count,
+        'modals': modal_count,
+        'verified': verified,
+    }
+
+
+def _invoke(client, function_name, payload):
+    """
+    Invoke one copy and return its warm-up report; raises ValueError when
+    the copy failed or did not answer with a report.
+    """
+    response = client.invoke(
+        FunctionName=function_name, InvocationType='RequestResponse', Payload=payload,
+    )
+    answer = codec.loads(response['Payload'].read() or b'null')
+    if response.get('FunctionError'):
+        message = answer.get('errorMessage') if isinstance(answer, dict) else answer
+        raise ValueError(f"{response['FunctionError']}: {message}")
+    if not isinstance(answer, dict) or answer.get('statusCode') != 200 or 'body' not in answer:
+        raise ValueError(f'Unexpected answer: {str(answer)[:200]}')
+    return codec.loads(answer['body'])
+
+
+def _fan_out(copies, hold_ms, function_name=None, client=None):
+    """
+    Invoke the function ``copies`` times in parallel and return
+    ``(reports, errors)``: the warm-up reports of the containers that
+    answered and the error of each copy that did not. One failing copy does
+    not stop the others.
+    """
+    if client is None:
+        # boto3 is slow to import; only the container that fans out pays for it
+        import boto3
+        client = boto3.client('lambda')
+    function_name = function_name or os.environ['AWS_LAMBDA_FUNCTION_NAME']
+    payload = codec.dumps_bytes({EVENT_KEY: {'concurrency': 1, 'hold_ms': hold_ms}})
+
+    def invoke(_):
+        try:
+            return _invoke(client, function_name, payload), None
+        except Exception as e:
+            return None, repr(e)
+
+    with ThreadPoolExecutor(max_workers=min(copies, 32)) as pool:
+        results = list(pool.map(invoke, range(copies)))
+    reports = [report for report, error in results if error is None]
+    errors = [error for report, error in results if error is not None]
+    return reports, errors
+
+
+def _int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def run(warmup_event=None):
+    """
+    Handle a warm-up event and return its report. With a fan-out,
+    ``fan_out`` counts the copies requested, warmed and failed; partial
+    success still returns the reports of the copies that answered.
+    """
+    global _warmups
+    if not isinstance(warmup_event, dict):
+        # E.g. {"terrabot_warmup": true}: a plain warm-up
+        warmup_event = {}
+    # True for the first warm-up this container has seen
+    cold = _warmups == 0
+    _warmups += 1
+
+    timings, summary = prepare()
+    report = {
+        'cold': cold,
+        'container_age_s': round(time.time() - _STARTED, 1),
+        'init_ms': timings,
+        **summary,
+    }
+
+    concurrency = _int(warmup_event.get('concurrency'), 1)
+    hold_ms = _int(warmup_event.get('hold_ms'), HOLD_MS if concurrency > 1 else 0)
+    if concurrency > 1:
+        try:
+            reports, errors = _fan_out(concurrency - 1, hold_ms)
+        except Exception as e:
+            # No client or function name: this container is still warm
+            reports, errors = [], [repr(e)] * (concurrency - 1)
+        report['containers'] = reports
+        report['fan_out'] = {
+            'requested': concurrency - 1,
+            'warmed': len(reports),
+            'failed': len(errors),
+            'errors': errors[:5],
+        }
+    elif hold_ms > 0:
+        time.sleep(hold_ms / 1000)
+    return report